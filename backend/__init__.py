@@ -2,15 +2,20 @@
 Backend package initialization
 """
 
-from .main import app
-from .database import SessionLocal, engine
-from .models import Base
-from .auth import get_current_user
-
-# Create tables if they don't exist
-Base.metadata.create_all(bind=engine)
+# .env is loaded by backend.database, without overriding variables already set
+# Tables are created by migrations (python -m backend.migrate), not on import
 
 __all__ = [
     'app',
     'get_current_user'
-]
\ No newline at end of file
+]
+
+def __getattr__(name):
+    # Imported on first use so `import backend.models` etc. don't pull in the whole app
+    if name == 'app':
+        from .main import app
+        return app
+    if name == 'get_current_user':
+        from .auth import get_current_user
+        return get_current_user
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,218 @@
+# backend/activity.py
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from backend import models
+from backend.pagination import clamp_limit, encode_cursor, paginate
+
+logger = logging.getLogger(__name__)
+
+EVENT_COLUMNS = ["type", "action", "driver_id", "parking_space_id", "user_name", "location", "amount", "created_at"]
+ACTIVITY_KEYSET = [models.ActivityEvent.id]
+
+def _event_from_row(row: models.ActivityEvent) -> dict:
+    return {"id": row.id, **{column: getattr(row, column) for column in EVENT_COLUMNS}}
+
+def to_activity(event: dict) -> dict:
+    """An event in the ``schemas.AdminActivity`` shape."""
+    amount = event["amount"]
+    return {
+        "id": event["id"],
+        "action": event["action"],
+        "user": event["user_name"],
+        "location": event["location"],
+        "amount": f"KSh {amount:,.0f}" if amount is not None else None,
+        "time": event["created_at"].isoformat(),
+        "type": event["type"]
+    }
+
+class ActivityLog:
+    """Append-only activity log: batched background writes plus a ring buffer of recent events.
+
+    ``record`` only queues; the newest page of the admin feed is served from the buffer.
+    """
+
+    def __init__(self, session_factory: Callable, buffer_size: int = 200, flush_interval: float = 1.0,
+                 batch_size: int = 500, max_pending: int = 10000, max_age: float = 10.0):
+        self.session_factory = session_factory
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.max_pending = max_pending
+        self.max_age = max_age
+        self.recorded = 0
+        self.flushed = 0
+        self.dropped = 0
+        self.flush_errors = 0
+        self.buffer_hits = 0
+        self.table_reads = 0
+        self._pending: deque = deque()
+        self._buffer: deque = deque(maxlen=buffer_size)
+        self._buffer_loaded_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    def record(self, type: str, action: str, driver_id: Optional[int] = None,
+               parking_space_id: Optional[int] = None, user_name: Optional[str] = None,
+               location: Optional[str] = None, amount: Optional[float] = None):
+        """Queue one event; names missing from it are looked up when it's flushed."""
+        event = {
+            "type": type,
+            "action": action,
+            "driver_id": driver_id,
+            "parking_space_id": parking_space_id,
+            "user_name": user_name,
+            "location": location,
+            "amount": amount,
+            "created_at": datetime.utcnow()
+        }
+        with self._lock:
+            if len(self._pending) >= self.max_pending:
+                # Database unreachable for a while; keep the newest events
+                self._pending.popleft()
+                self.dropped += 1
+            self._pending.append(event)
+            self.recorded += 1
+
+    def _take_batch(self) -> List[dict]:
+        with self._lock:
+            return [self._pending.popleft() for _ in range(min(self.batch_size, len(self._pending)))]
+
+    def _requeue(self, batch: List[dict]):
+        with self._lock:
+            self._pending.extendleft(reversed(batch))
+            while len(self._pending) > self.max_pending:
+                self._pending.popleft()
+                self.dropped += 1
+
+    def _fill_names(self, db: Session, batch: List[dict]):
+        driver_ids = {event["driver_id"] for event in batch if event["driver_id"] and not event["user_name"]}
+        space_ids = {event["parking_space_id"] for event in batch if event["parking_space_id"] and not event["location"]}
+        names = dict(db.execute(
+            select(models.Driver.id, models.Driver.full_name).filter(models.Driver.id.in_(driver_ids))
+        ).all()) if driver_ids else {}
+        locations = dict(db.execute(
+            select(models.ParkingSpace.id, models.ParkingSpace.name).filter(models.ParkingSpace.id.in_(space_ids))
+        ).all()) if space_ids else {}
+        for event in batch:
+            if not event["user_name"]:
+                event["user_name"] = names.get(event["driver_id"])
+            if not event["location"]:
+                event["location"] = locations.get(event["parking_space_id"])
+
+    def _write(self, batch: List[dict]):
+        db = self.session_factory()
+        try:
+            self._fill_names(db, batch)
+            ids = db.scalars(
+                insert(models.ActivityEvent).returning(models.ActivityEvent.id, sort_by_parameter_order=True),
+                [{column: event[column] for column in EVENT_COLUMNS} for event in batch]
+            ).all()
+            db.commit()
+        finally:
+            db.close()
+        for event, event_id in zip(batch, ids):
+            event["id"] = event_id
+        with self._lock:
+            self._buffer.extend(batch)
+            self.flushed += len(batch)
+
+    def flush(self) -> int:
+        """Write every queued event in batches; returns how many were written."""
+        written = 0
+        # The shutdown flush must not race the background one over the same queue
+        with self._flush_lock:
+            while True:
+                batch = self._take_batch()
+                if not batch:
+                    return written
+                try:
+                    self._write(batch)
+                except Exception:
+                    self._requeue(batch)
+                    with self._lock:
+                        self.flush_errors += 1
+                    raise
+                written += len(batch)
+
+    def _refresh_buffer(self, db: Session):
+        rows = db.scalars(
+            select(models.ActivityEvent).order_by(models.ActivityEvent.id.desc()).limit(self._buffer.maxlen)
+        ).all()
+        with self._lock:
+            merged = {event["id"]: event for event in self._buffer}
+            merged.update((row.id, _event_from_row(row)) for row in rows)
+            self._buffer.clear()
+            self._buffer.extend(merged[event_id] for event_id in sorted(merged)[-self._buffer.maxlen:])
+            self._buffer_loaded_at = time.monotonic()
+
+    def recent(self, db: Session, limit: Optional[int] = None, cursor: Optional[str] = None):
+        """Newest-first page of events as ``AdminActivity`` dicts; returns ``(activities, next_cursor)``."""
+        limit = clamp_limit(limit)
+        if cursor is None and limit <= self._buffer.maxlen:
+            loaded_at = self._buffer_loaded_at
+            if loaded_at is None or time.monotonic() - loaded_at > self.max_age:
+                self._refresh_buffer(db)
+            with self._lock:
+                # Batches from other workers can interleave ids, so sort rather than reverse
+                events = sorted(self._buffer, key=lambda event: event["id"], reverse=True)
+                self.buffer_hits += 1
+            page = events[:limit]
+            # A full buffer may only be the newest slice of the table
+            more = len(events) > limit or len(events) == self._buffer.maxlen
+            next_cursor = encode_cursor("activities", [page[-1]["id"]]) if more and page else None
+            return [to_activity(event) for event in page], next_cursor
+        with self._lock:
+            self.table_reads += 1
+        rows, next_cursor = paginate(
+            db, select(models.ActivityEvent), "activities", ACTIVITY_KEYSET, cursor, limit, descending=True
+        )
+        return [to_activity(_event_from_row(row)) for row in rows], next_cursor
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await asyncio.to_thread(self.flush)
+            except Exception as e:
+                logger.error(f"Activity log flush failed: {str(e)}", exc_info=True)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        # Don't lose what was queued since the last tick
+        try:
+            await asyncio.to_thread(self.flush)
+        except Exception as e:
+            logger.error(f"Final activity log flush failed: {str(e)}", exc_info=True)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "recorded": self.recorded,
+                "flushed": self.flushed,
+                "pending": len(self._pending),
+                "dropped": self.dropped,
+                "flush_errors": self.flush_errors,
+                "buffered": len(self._buffer),
+                "buffer_size": self._buffer.maxlen,
+                "buffer_hits": self.buffer_hits,
+                "table_reads": self.table_reads
+            }
@@ -0,0 +1,41 @@
+# backend/alembic/env.py
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import create_engine, pool
+
+from backend import models  # registers every table on Base.metadata
+from backend.database import DATABASE_URL
+
+config = context.config
+
+if config.config_file_name is not None and config.attributes.get("configure_logger", True):
+    fileConfig(config.config_file_name)
+
+target_metadata = models.Base.metadata
+
+def database_url() -> str:
+    # An explicit sqlalchemy.url (set by migrate.upgrade or the plan checker) wins over DATABASE_URL
+    return config.get_main_option("sqlalchemy.url") or DATABASE_URL
+
+def run_migrations_offline():
+    context.configure(
+        url=database_url(),
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+def run_migrations_online():
+    connectable = create_engine(database_url(), poolclass=pool.NullPool)
+    with connectable.connect() as connection:
+        context.configure(connection=connection, target_metadata=target_metadata, render_as_batch=True)
+        with context.begin_transaction():
+            context.run_migrations()
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
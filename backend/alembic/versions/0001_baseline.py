@@ -0,0 +1,84 @@
+"""Baseline schema, as previously created by Base.metadata.create_all
+
+Revision ID: 0001_baseline
+Revises:
+Create Date: 2026-10-17 12:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0001_baseline'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        'drivers',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('full_name', sa.String(), nullable=False),
+        sa.Column('email', sa.String()),
+        sa.Column('phone', sa.String()),
+        sa.Column('hashed_password', sa.String()),
+        sa.Column('role', sa.String()),
+        sa.Column('created_at', sa.DateTime()),
+        sa.Column('updated_at', sa.DateTime()),
+    )
+    op.create_index('ix_drivers_id', 'drivers', ['id'])
+    op.create_index('ix_drivers_email', 'drivers', ['email'], unique=True)
+
+    op.create_table(
+        'vehicles',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('plate_number', sa.String()),
+        sa.Column('model', sa.String()),
+        sa.Column('color', sa.String()),
+        sa.Column('created_at', sa.DateTime()),
+    )
+    op.create_index('ix_vehicles_id', 'vehicles', ['id'])
+    op.create_index('ix_vehicles_plate_number', 'vehicles', ['plate_number'], unique=True)
+
+    op.create_table(
+        'vehicle_owner',
+        sa.Column('driver_id', sa.Integer(), sa.ForeignKey('drivers.id')),
+        sa.Column('vehicle_id', sa.Integer(), sa.ForeignKey('vehicles.id')),
+    )
+
+    op.create_table(
+        'parking_spaces',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('address', sa.String(), nullable=False),
+        sa.Column('latitude', sa.Float()),
+        sa.Column('longitude', sa.Float()),
+        sa.Column('total_spots', sa.Integer()),
+        sa.Column('available_spots', sa.Integer()),
+        sa.Column('price_per_hour', sa.Float()),
+        sa.Column('features', sa.String()),
+        sa.Column('rating', sa.Float()),
+        sa.Column('created_at', sa.DateTime()),
+        sa.Column('updated_at', sa.DateTime()),
+    )
+    op.create_index('ix_parking_spaces_id', 'parking_spaces', ['id'])
+
+    op.create_table(
+        'bookings',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('driver_id', sa.Integer(), sa.ForeignKey('drivers.id')),
+        sa.Column('parking_space_id', sa.Integer(), sa.ForeignKey('parking_spaces.id')),
+        sa.Column('start_time', sa.DateTime()),
+        sa.Column('end_time', sa.DateTime()),
+        sa.Column('duration_hours', sa.Float()),
+        sa.Column('status', sa.String()),
+        sa.Column('payment_method', sa.String()),
+        sa.Column('created_at', sa.DateTime()),
+        sa.Column('updated_at', sa.DateTime()),
+    )
+    op.create_index('ix_bookings_id', 'bookings', ['id'])
+
+def downgrade():
+    op.drop_table('bookings')
+    op.drop_table('parking_spaces')
+    op.drop_table('vehicle_owner')
+    op.drop_table('vehicles')
+    op.drop_table('drivers')
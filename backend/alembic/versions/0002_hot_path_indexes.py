@@ -0,0 +1,58 @@
+"""Composite and partial indexes for the hot booking and parking queries
+
+Revision ID: 0002_hot_path_indexes
+Revises: 0001_baseline
+Create Date: 2026-10-17 12:10:00
+
+Built CONCURRENTLY on Postgres so existing tables stay writable during the deploy.
+Run `python -m backend.plan_check` against a seeded database to confirm the planner
+uses them.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0002_hot_path_indexes'
+down_revision = '0001_baseline'
+branch_labels = None
+depends_on = None
+
+LIVE_BOOKING = "status NOT IN ('cancelled', 'completed')"
+ACTIVE_BOOKING = "status = 'active'"
+AVAILABLE_SPACE = "available_spots > 0"
+
+# (name, table, columns, partial predicate)
+INDEXES = [
+    # GET /api/bookings and recent bookings: WHERE driver_id = ? ORDER BY created_at DESC, id DESC
+    ('ix_bookings_driver_created', 'bookings', ['driver_id', 'created_at', 'id'], None),
+    # Availability: one space's live bookings overlapping a window
+    ('ix_bookings_space_window', 'bookings', ['parking_space_id', 'start_time', 'end_time'], LIVE_BOOKING),
+    # Expiry sweeper: active bookings by end_time
+    ('ix_bookings_active_end_time', 'bookings', ['end_time'], ACTIVE_BOOKING),
+    # Bounding-box lookups on coordinates
+    ('ix_parking_spaces_lat_lng', 'parking_spaces', ['latitude', 'longitude'], None),
+    # Spot listings in keyset order, unfiltered and filter=available
+    ('ix_parking_spaces_created', 'parking_spaces', ['created_at', 'id'], None),
+    ('ix_parking_spaces_available_created', 'parking_spaces', ['created_at', 'id'], AVAILABLE_SPACE),
+]
+
+# Created by create_all on databases bootstrapped from earlier model definitions
+SUPERSEDED = ['ix_bookings_status_end_time', 'ix_bookings_space_window']
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        for name in SUPERSEDED:
+            op.execute(f"DROP INDEX IF EXISTS {name}")
+        for name, table, columns, where in INDEXES:
+            predicate = sa.text(where) if where else None
+            op.create_index(
+                name, table, columns,
+                if_not_exists=True,
+                postgresql_concurrently=True,
+                postgresql_where=predicate,
+                sqlite_where=predicate,
+            )
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=True)
@@ -0,0 +1,34 @@
+"""pg_trgm GIN indexes for name/address substring search (Postgres only)
+
+Revision ID: 0003_search_trigram_indexes
+Revises: 0002_hot_path_indexes
+Create Date: 2026-10-17 12:20:00
+
+Other databases fall back to the in-memory search index in crud.
+"""
+from alembic import op
+
+revision = '0003_search_trigram_indexes'
+down_revision = '0002_hot_path_indexes'
+branch_labels = None
+depends_on = None
+
+COLUMNS = ['name', 'address']
+
+def upgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    with op.get_context().autocommit_block():
+        for column in COLUMNS:
+            op.execute(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_parking_spaces_{column}_trgm "
+                f"ON parking_spaces USING gin ({column} gin_trgm_ops)"
+            )
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    with op.get_context().autocommit_block():
+        for column in COLUMNS:
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS ix_parking_spaces_{column}_trgm")
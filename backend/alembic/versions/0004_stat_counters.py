@@ -0,0 +1,56 @@
+"""stat_counters rollup for the admin dashboard, backfilled from the base tables
+
+Revision ID: 0004_stat_counters
+Revises: 0003_search_trigram_indexes
+Create Date: 2026-10-17 12:30:00
+
+From here on crud keeps the counters current (backend/rollups.py);
+`python -m backend.rollups check` compares them with a fresh recount.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0004_stat_counters'
+down_revision = '0003_search_trigram_indexes'
+branch_labels = None
+depends_on = None
+
+TOTALS = [
+    ('total_users', "SELECT COUNT(*) FROM drivers"),
+    ('total_parking_spots', "SELECT COUNT(*) FROM parking_spaces"),
+    ('total_capacity', "SELECT COALESCE(SUM(COALESCE(total_spots, 0)), 0) FROM parking_spaces"),
+    ('occupied_spots',
+     "SELECT COALESCE(SUM(COALESCE(total_spots, 0) - COALESCE(available_spots, 0)), 0) FROM parking_spaces"),
+    ('active_bookings', "SELECT COUNT(*) FROM bookings WHERE status = 'active'"),
+]
+
+def upgrade():
+    # seed.py's create_all may already have made an empty one
+    if not sa.inspect(op.get_bind()).has_table('stat_counters'):
+        op.create_table(
+            'stat_counters',
+            sa.Column('name', sa.String(), primary_key=True),
+            sa.Column('value', sa.Float(), nullable=False),
+            sa.Column('updated_at', sa.DateTime()),
+        )
+    op.execute("DELETE FROM stat_counters")
+    for name, query in TOTALS:
+        op.execute(
+            f"INSERT INTO stat_counters (name, value, updated_at) "
+            f"SELECT '{name}', ({query}), CURRENT_TIMESTAMP"
+        )
+    if op.get_bind().dialect.name == 'postgresql':
+        day = "to_char(b.created_at, 'YYYY-MM-DD')"
+    else:
+        day = "date(b.created_at)"
+    op.execute(
+        f"INSERT INTO stat_counters (name, value, updated_at) "
+        f"SELECT 'revenue:' || {day}, "
+        f"SUM(COALESCE(b.duration_hours, 0) * COALESCE(p.price_per_hour, 0)), CURRENT_TIMESTAMP "
+        f"FROM bookings b JOIN parking_spaces p ON p.id = b.parking_space_id "
+        f"WHERE b.created_at IS NOT NULL AND b.status <> 'cancelled' "
+        f"GROUP BY {day}"
+    )
+
+def downgrade():
+    op.drop_table('stat_counters')
@@ -0,0 +1,35 @@
+"""Append-only activity_events log for the admin feed
+
+Revision ID: 0005_activity_events
+Revises: 0004_stat_counters
+Create Date: 2026-10-17 12:40:00
+
+History is paged newest first by primary key, so no other index is needed.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0005_activity_events'
+down_revision = '0004_stat_counters'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # seed.py's create_all may already have made it
+    if sa.inspect(op.get_bind()).has_table('activity_events'):
+        return
+    op.create_table(
+        'activity_events',
+        sa.Column('id', sa.BigInteger().with_variant(sa.Integer(), 'sqlite'), primary_key=True),
+        sa.Column('type', sa.String(), nullable=False),
+        sa.Column('action', sa.String(), nullable=False),
+        sa.Column('driver_id', sa.Integer()),
+        sa.Column('parking_space_id', sa.Integer()),
+        sa.Column('user_name', sa.String()),
+        sa.Column('location', sa.String()),
+        sa.Column('amount', sa.Float()),
+        sa.Column('created_at', sa.DateTime()),
+    )
+
+def downgrade():
+    op.drop_table('activity_events')
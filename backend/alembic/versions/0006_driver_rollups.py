@@ -0,0 +1,33 @@
+"""Per-driver dashboard rollups
+
+Revision ID: 0006_driver_rollups
+Revises: 0005_activity_events
+Create Date: 2026-10-17 12:50:00
+
+Created empty; `python -m backend.rollups backfill-drivers --missing` (run on
+release) fills it from booking history, after which crud keeps it current.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0006_driver_rollups'
+down_revision = '0005_activity_events'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # seed.py's create_all may already have made it
+    if sa.inspect(op.get_bind()).has_table('driver_rollups'):
+        return
+    op.create_table(
+        'driver_rollups',
+        sa.Column('driver_id', sa.Integer(), sa.ForeignKey('drivers.id'), primary_key=True),
+        sa.Column('total_bookings', sa.Integer(), nullable=False),
+        sa.Column('total_hours', sa.Float(), nullable=False),
+        sa.Column('total_spend', sa.Float(), nullable=False),
+        sa.Column('top_spaces', sa.JSON(), nullable=False),
+        sa.Column('updated_at', sa.DateTime()),
+    )
+
+def downgrade():
+    op.drop_table('driver_rollups')
@@ -0,0 +1,27 @@
+"""Index every booking of a space by time, for occupancy analytics
+
+Revision ID: 0007_booking_history_index
+Revises: 0006_driver_rollups
+Create Date: 2026-10-17 13:00:00
+
+ix_bookings_space_window only covers live bookings; the heatmap also reads completed
+ones. Built CONCURRENTLY on Postgres.
+"""
+from alembic import op
+
+revision = '0007_booking_history_index'
+down_revision = '0006_driver_rollups'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_bookings_space_history', 'bookings', ['parking_space_id', 'start_time', 'end_time'],
+            if_not_exists=True,
+            postgresql_concurrently=True,
+        )
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_bookings_space_history', table_name='bookings', if_exists=True, postgresql_concurrently=True)
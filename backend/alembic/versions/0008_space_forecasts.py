@@ -0,0 +1,32 @@
+"""Per-space occupancy forecast models
+
+Revision ID: 0008_space_forecasts
+Revises: 0007_booking_history_index
+Create Date: 2026-10-17 14:10:00
+
+Created empty; the app fits it from booking history on startup and refits it
+periodically (or run `python -m backend.forecast fit`).
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0008_space_forecasts'
+down_revision = '0007_booking_history_index'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # seed.py's create_all may already have made it
+    if sa.inspect(op.get_bind()).has_table('space_forecasts'):
+        return
+    op.create_table(
+        'space_forecasts',
+        sa.Column('parking_space_id', sa.Integer(), sa.ForeignKey('parking_spaces.id'), primary_key=True),
+        sa.Column('baseline', sa.JSON(), nullable=False),
+        sa.Column('trend', sa.Float(), nullable=False),
+        sa.Column('history_weeks', sa.Integer(), nullable=False),
+        sa.Column('fitted_at', sa.DateTime(), nullable=False),
+    )
+
+def downgrade():
+    op.drop_table('space_forecasts')
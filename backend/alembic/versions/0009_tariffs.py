@@ -0,0 +1,40 @@
+"""Per-space tariffs and the price of each booking
+
+Revision ID: 0009_tariffs
+Revises: 0008_space_forecasts
+Create Date: 2026-10-17 15:30:00
+
+Bookings made before this revision were never charged (creating one cost nothing,
+and extensions were quoted a flat 20 an hour without being recorded), so their
+total_cost stays NULL rather than inventing a price. Revenue counters and driver
+spend, which counted them at duration_hours x price_per_hour, are reset to match.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0009_tariffs'
+down_revision = '0008_space_forecasts'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    # seed.py's create_all may already have made these
+    if not inspector.has_table('tariffs'):
+        op.create_table(
+            'tariffs',
+            sa.Column('parking_space_id', sa.Integer(), sa.ForeignKey('parking_spaces.id'), primary_key=True),
+            sa.Column('bands', sa.JSON(), nullable=False),
+            sa.Column('daily_cap', sa.Float()),
+            sa.Column('surcharges', sa.JSON(), nullable=False),
+            sa.Column('updated_at', sa.DateTime()),
+        )
+    if 'total_cost' not in {column['name'] for column in inspector.get_columns('bookings')}:
+        op.add_column('bookings', sa.Column('total_cost', sa.Float()))
+        # Every booking so far is unpriced, so nothing has earned revenue yet
+        op.execute("DELETE FROM stat_counters WHERE name LIKE 'revenue:%'")
+        op.execute("UPDATE driver_rollups SET total_spend = 0")
+
+def downgrade():
+    op.drop_column('bookings', 'total_cost')
+    op.drop_table('tariffs')
@@ -0,0 +1,264 @@
+# backend/analytics.py
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from datetime import time as clock
+from typing import Dict, Iterator, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import Float, select
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.functions import FunctionElement
+
+from backend import models
+
+HOURS_PER_WEEK = 168
+DAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+
+# Booking rows are fetched and converted to arrays this many at a time
+LOAD_CHUNK_SIZE = 50000
+
+# Bookings in these states never occupied their spot
+EXCLUDED_STATUSES = ("cancelled",)
+
+EPOCH = datetime(1970, 1, 1)
+
+class epoch_seconds(FunctionElement):
+    """Seconds since 1970 for a naive UTC DateTime column, computed by the database."""
+    type = Float()
+    inherit_cache = True
+
+@compiles(epoch_seconds)
+def _epoch_seconds_default(element, compiler, **kw):
+    return f"EXTRACT(EPOCH FROM {compiler.process(element.clauses, **kw)})"
+
+@compiles(epoch_seconds, "sqlite")
+def _epoch_seconds_sqlite(element, compiler, **kw):
+    return f"CAST(strftime('%s', {compiler.process(element.clauses, **kw)}) AS REAL)"
+
+def heatmap_window(now: datetime, weeks: int, utc_offset: int) -> Tuple[datetime, datetime]:
+    """``weeks`` whole local weeks, Monday 00:00 to Monday 00:00, ending with the current one.
+
+    Returned as naive UTC. Every hour-of-week occurs exactly ``weeks`` times in the
+    window, so booked hours divide straight into an average.
+    """
+    local = now + timedelta(hours=utc_offset)
+    monday = local.date() - timedelta(days=local.weekday())
+    window_end = datetime.combine(monday + timedelta(days=7), clock.min) - timedelta(hours=utc_offset)
+    return window_end - timedelta(weeks=weeks), window_end
+
+def hour_of_week_hours(space_index: np.ndarray, starts: np.ndarray, ends: np.ndarray, space_count: int) -> np.ndarray:
+    """Booked hours per ``(space, hour-of-week)`` from interval arrays.
+
+    ``starts``/``ends`` are float hours since a Monday 00:00, clipped to the window;
+    ``space_index`` is each interval's row in the ``(space_count, 168)`` result.
+
+    Each interval splits into a partial first hour, a run of whole hours and a partial
+    last hour. Partial hours are summed with one bincount each. A run of ``n`` hours
+    covers ``n // 168`` whole weeks, added to every bucket of its space, plus a cyclic
+    range of ``n % 168`` buckets, marked +1/-1 in a per-space difference array (split
+    in two where it wraps past Sunday) and resolved by a single cumsum. Nothing loops
+    over bookings or hours in Python.
+    """
+    width = HOURS_PER_WEEK + 1
+    first_full = np.ceil(starts)
+    last_full = np.floor(ends)
+    # Starts and ends inside the same clock hour
+    within = first_full > last_full
+    head = np.where(within, ends - starts, first_full - starts)
+    tail = np.where(within, 0.0, ends - last_full)
+    run = np.where(within, 0.0, last_full - first_full).astype(np.int64)
+
+    cells = space_count * HOURS_PER_WEEK
+    head_cell = space_index * HOURS_PER_WEEK + np.floor(starts).astype(np.int64) % HOURS_PER_WEEK
+    tail_cell = space_index * HOURS_PER_WEEK + last_full.astype(np.int64) % HOURS_PER_WEEK
+    booked = np.bincount(head_cell, weights=head, minlength=cells)
+    booked += np.bincount(tail_cell, weights=tail, minlength=cells)
+    booked = booked.reshape(space_count, HOURS_PER_WEEK)
+    booked += np.bincount(space_index, weights=run // HOURS_PER_WEEK, minlength=space_count)[:, None]
+
+    remainder = run % HOURS_PER_WEEK
+    partial = remainder > 0
+    rows = space_index[partial] * width
+    begin = first_full[partial].astype(np.int64) % HOURS_PER_WEEK
+    stop = begin + remainder[partial]
+    wraps = stop > HOURS_PER_WEEK
+    marks = np.concatenate([
+        rows + begin, rows + np.minimum(stop, HOURS_PER_WEEK),
+        rows[wraps], rows[wraps] + stop[wraps] - HOURS_PER_WEEK
+    ])
+    signs = np.concatenate([
+        np.ones(len(rows)), -np.ones(len(rows)), np.ones(int(wraps.sum())), -np.ones(int(wraps.sum()))
+    ])
+    diff = np.bincount(marks, weights=signs, minlength=space_count * width).reshape(space_count, width)
+    booked += np.cumsum(diff, axis=1)[:, :HOURS_PER_WEEK]
+    return booked
+
+def _intervals_statement(window_start: datetime, window_end: datetime, space_ids: Optional[Sequence[int]] = None):
+    statement = select(
+        models.Booking.parking_space_id,
+        epoch_seconds(models.Booking.start_time),
+        epoch_seconds(models.Booking.end_time)
+    ).filter(
+        models.Booking.parking_space_id.isnot(None),
+        models.Booking.start_time < window_end,
+        models.Booking.end_time > window_start,
+        models.Booking.status.notin_(EXCLUDED_STATUSES)
+    )
+    if space_ids is not None:
+        statement = statement.filter(models.Booking.parking_space_id.in_(space_ids))
+    return statement
+
+def load_intervals(db: Session, window_start: datetime, window_end: datetime,
+                   space_ids: Optional[Sequence[int]] = None,
+                   chunk_size: int = LOAD_CHUNK_SIZE) -> Iterator[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    """Yield ``(space_ids, starts, ends)`` arrays per chunk, times in hours since ``window_start``.
+
+    The database converts timestamps to epoch seconds, so each chunk of plain numeric
+    rows becomes one float array without touching datetime objects.
+    """
+    origin = (window_start - EPOCH).total_seconds()
+    result = db.execute(
+        _intervals_statement(window_start, window_end, space_ids).execution_options(yield_per=chunk_size)
+    )
+    for rows in result.partitions():
+        block = np.array(rows, dtype=np.float64)
+        yield block[:, 0].astype(np.int64), (block[:, 1] - origin) / 3600, (block[:, 2] - origin) / 3600
+
+def clip_intervals(starts: np.ndarray, ends: np.ndarray, window_hours: float, from_hours: float = 0.0):
+    """Intervals cut to ``[from_hours, window_hours]``; returns ``(keep, starts, ends)``."""
+    starts = np.clip(starts, from_hours, window_hours)
+    ends = np.clip(ends, from_hours, window_hours)
+    keep = ends > starts
+    return keep, starts, ends
+
+def compute_heatmaps(db: Session, window_start: datetime, window_end: datetime,
+                     space_ids: Optional[Sequence[int]] = None) -> Dict[int, np.ndarray]:
+    """Booked hours per hour-of-week for every space with bookings in the window."""
+    window_hours = (window_end - window_start).total_seconds() / 3600
+    totals: Dict[int, np.ndarray] = {}
+    for ids, starts, ends in load_intervals(db, window_start, window_end, space_ids):
+        keep, starts, ends = clip_intervals(starts, ends, window_hours)
+        accumulate_hours(totals, ids[keep], starts[keep], ends[keep])
+    return totals
+
+def accumulate_hours(totals: Dict[int, np.ndarray], ids: np.ndarray, starts: np.ndarray, ends: np.ndarray):
+    """Add one chunk's booked hours per hour-of-week into ``totals``, keyed by space id."""
+    spaces, space_index = np.unique(ids, return_inverse=True)
+    booked = hour_of_week_hours(space_index, starts, ends, len(spaces))
+    for space_id, row in zip(spaces.tolist(), booked):
+        totals[space_id] = totals[space_id] + row if space_id in totals else row
+
+def interval_hours(window_start: datetime, window_end: datetime, start: datetime, end: datetime) -> np.ndarray:
+    """One booking's hours per hour-of-week within the window."""
+    hours = np.array([(start - window_start).total_seconds(), (end - window_start).total_seconds()]) / 3600
+    keep, starts, ends = clip_intervals(hours[:1], hours[1:], (window_end - window_start).total_seconds() / 3600)
+    if not keep[0]:
+        return np.zeros(HOURS_PER_WEEK)
+    return hour_of_week_hours(np.zeros(1, dtype=np.int64), starts, ends, 1)[0]
+
+class HeatmapEntry:
+    def __init__(self, window_start: datetime, window_end: datetime, booked: np.ndarray):
+        self.window_start = window_start
+        self.window_end = window_end
+        self.booked = booked
+        self.created_at = time.monotonic()
+
+class HeatmapCache:
+    """Hour-of-week booked hours per space, kept current by this process's bookings.
+
+    Keys are ``(space_id, weeks, utc_offset)``; a ``None`` space id holds the total over
+    all spaces. An entry is reused until its window's current week ends or ``max_age``
+    passes (which also picks up bookings made by other workers). Meanwhile
+    ``add_booking`` folds each booking committed here into every cached entry it
+    touches, so new bookings show up without recomputing. LRU-bounded to ``maxsize``.
+    """
+
+    def __init__(self, maxsize: int = 2048, max_age: float = 3600.0):
+        self.maxsize = maxsize
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self.updates = 0
+        self._entries: "OrderedDict[tuple, HeatmapEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _fresh(self, key, now: datetime) -> Optional[HeatmapEntry]:
+        entry = self._entries.get(key)
+        if entry is None or now >= entry.window_end or time.monotonic() - entry.created_at > self.max_age:
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _store(self, key, entry: HeatmapEntry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def get(self, db: Session, space_id: Optional[int], weeks: int, utc_offset: int,
+            now: Optional[datetime] = None) -> Tuple[datetime, datetime, np.ndarray]:
+        """``(window_start, window_end, booked_hours)`` for one space, or all with ``None``."""
+        now = now or datetime.utcnow()
+        key = (space_id, weeks, utc_offset)
+        with self._lock:
+            entry = self._fresh(key, now)
+            if entry is not None:
+                self.hits += 1
+                return entry.window_start, entry.window_end, entry.booked.copy()
+            self.misses += 1
+        window_start, window_end = heatmap_window(now, weeks, utc_offset)
+        per_space = compute_heatmaps(db, window_start, window_end, None if space_id is None else [space_id])
+        if space_id is None:
+            booked = sum(per_space.values(), np.zeros(HOURS_PER_WEEK))
+        else:
+            booked = per_space.get(space_id, np.zeros(HOURS_PER_WEEK))
+        with self._lock:
+            self._store(key, HeatmapEntry(window_start, window_end, booked))
+        return window_start, window_end, booked.copy()
+
+    def add_booking(self, space_id: int, start: Optional[datetime], end: Optional[datetime], sign: int = 1):
+        """Fold a committed booking into cached entries (``sign=-1`` takes one back out)."""
+        if space_id is None or start is None or end is None or end <= start:
+            return
+        with self._lock:
+            for (cached_space, _, _), entry in self._entries.items():
+                if cached_space is None or cached_space == space_id:
+                    entry.booked += sign * interval_hours(entry.window_start, entry.window_end, start, end)
+                    self.updates += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "max_age_seconds": self.max_age,
+                "hits": self.hits,
+                "misses": self.misses,
+                "incremental_updates": self.updates,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+def heatmap_response(booked: np.ndarray, weeks: int, capacity: Optional[int]) -> dict:
+    """Average concurrent bookings and occupancy per day x hour, plus the busiest hour."""
+    average = booked / weeks
+    occupancy = average / capacity if capacity else np.zeros(HOURS_PER_WEEK)
+    peak = int(np.argmax(occupancy if capacity else average))
+    return {
+        "days": DAYS,
+        "booked": np.round(average.reshape(7, 24), 3).tolist(),
+        "occupancy": np.round(occupancy.reshape(7, 24), 4).tolist(),
+        "peak": {
+            "day": DAYS[peak // 24],
+            "hour": peak % 24,
+            "booked": round(float(average[peak]), 3),
+            "occupancy": round(float(occupancy[peak]), 4)
+        }
+    }
@@ -1,13 +1,15 @@
 # backend/auth.py
 from datetime import datetime, timedelta
 from jose import JWTError, jwt
-from passlib.context import CryptContext
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 from backend.models import Driver
-from backend.schemas import LoginRequest, RegisterRequest, ResetPasswordRequest, VerifyResetRequest, Token, User
+from backend.schemas import LoginRequest, RegisterRequest, ResetPasswordRequest, VerifyResetRequest, Token, User, Principal
 from backend.database import SessionLocal
+from backend.cache import QueryCache
+from backend.hashing import pwd_context
+from typing import Optional
 import os
 
 # Config
@@ -15,9 +17,22 @@ SECRET_KEY = os.getenv("SECRET_KEY", "devsecret")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60
 
-# JWT + password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# JWT; password hashing lives in backend.hashing
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login", auto_error=False)
+
+# How get_current_user resolves a verified token to a user:
+#   "cache"  - short-lived snapshot per subject, one DB lookup per TTL (default)
+#   "claims" - trust the signed uid/role claims, no DB round-trip at all
+#   "db"     - look the driver up on every request
+# crud's Driver writes call invalidate_principals(), which only reaches this worker's cache.
+# Other workers, and edits made outside crud (e.g. a role changed in SQL), see the change
+# within PRINCIPAL_CACHE_TTL seconds.
+PRINCIPAL_MODE = os.getenv("AUTH_PRINCIPAL_MODE", "cache")
+principal_cache = QueryCache(
+    maxsize=int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000")),
+    ttl=float(os.getenv("PRINCIPAL_CACHE_TTL", "60"))
+)
 
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
@@ -32,12 +47,34 @@ def create_access_token(data: dict) -> str:
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+def token_claims(user: Driver) -> dict:
+    """Access token payload; uid/role let claims-only mode skip the user lookup."""
+    return {"sub": user.email, "uid": user.id, "role": user.role}
+
 def get_user(db: Session, email: str):
-    return db.query(models.Driver).filter(models.Driver.email == email).first()
+    return db.query(Driver).filter(Driver.email == email).first()
+
+def load_principal(db: Session, email: str) -> Optional[User]:
+    """Detached snapshot of a driver, safe to cache and share between requests."""
+    user = get_user(db, email=email)
+    if user is None:
+        return None
+    return User.model_validate(user).model_copy(update={"hashed_password": None})
 
-from backend.main import get_db
+def invalidate_principals():
+    """Call after writing to a Driver row so cached snapshots are reloaded."""
+    principal_cache.invalidate()
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+def token_subject(token: Optional[str] = Depends(optional_oauth2_scheme)) -> Optional[str]:
+    """Subject of a valid bearer token, or None; for routes where auth is optional."""
+    if not token:
+        return None
+    try:
+        return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM]).get("sub")
+    except JWTError:
+        return None
+
+def get_current_user(request: Request, token: str = Depends(oauth2_scheme)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -50,7 +87,26 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
             raise credentials_exception
     except JWTError:
         raise credentials_exception
-    user = get_user(db, email=email)
-    if user is None:
-        raise credentials_exception
-    return user
+
+    # Lets read replica routing attribute this request's commits to the user
+    request.state.subject = email
+
+    if PRINCIPAL_MODE == "claims" and "uid" in payload and "role" in payload:
+        return Principal(id=payload["uid"], email=email, role=payload["role"])
+
+    # Only a cache miss (or "db" mode) opens a session
+    def load():
+        with SessionLocal() as db:
+            user = load_principal(db, email)
+        if user is None:
+            raise credentials_exception
+        return user
+
+    if PRINCIPAL_MODE == "db":
+        return load()
+    return principal_cache.get_or_load(email, load)
+
+def get_admin_user(current_user: User = Depends(get_current_user)):
+    if current_user.role != "admin":
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
+    return current_user
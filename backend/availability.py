@@ -0,0 +1,71 @@
+# backend/availability.py
+import math
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Bookings in these states no longer hold a spot
+RELEASED_STATUSES = ("cancelled", "completed")
+
+def to_naive_utc(value: datetime) -> datetime:
+    """Bookings are stored as naive UTC; normalise aware datetimes to match."""
+    if value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+def floor_to_slot(value: datetime, slot_minutes: int) -> datetime:
+    value = value.replace(second=0, microsecond=0)
+    minutes = value.hour * 60 + value.minute
+    return value.replace(hour=0, minute=0) + timedelta(minutes=minutes - minutes % slot_minutes)
+
+def slot_occupancy(intervals: Iterable[Tuple[datetime, datetime]], window_start: datetime,
+                   slot_minutes: int, slot_count: int) -> List[int]:
+    """Bookings overlapping each slot of the window.
+
+    Each interval adds +1 at its first slot and -1 after its last one in a difference
+    array; a single prefix-sum sweep turns that into per-slot counts, so the cost is
+    O(bookings + slots) rather than O(bookings * slots).
+    """
+    slot_seconds = slot_minutes * 60
+    diff = [0] * (slot_count + 1)
+    for start, end in intervals:
+        if start is None or end is None or end <= start:
+            continue
+        first = math.floor((start - window_start).total_seconds() / slot_seconds)
+        last = math.ceil((end - window_start).total_seconds() / slot_seconds)
+        first = max(first, 0)
+        last = min(last, slot_count)
+        if first >= last:
+            continue
+        diff[first] += 1
+        diff[last] -= 1
+    occupancy = []
+    running = 0
+    for delta in diff[:slot_count]:
+        running += delta
+        occupancy.append(running)
+    return occupancy
+
+def occupancy_by_space(rows: Iterable[Tuple[int, datetime, datetime]], window_start: datetime,
+                       slot_minutes: int, slot_count: int) -> Dict[int, List[int]]:
+    """Group ``(space_id, start, end)`` rows and bucket each space's bookings into slots."""
+    grouped: Dict[int, List[Tuple[datetime, datetime]]] = {}
+    for space_id, start, end in rows:
+        grouped.setdefault(space_id, []).append((start, end))
+    return {
+        space_id: slot_occupancy(intervals, window_start, slot_minutes, slot_count)
+        for space_id, intervals in grouped.items()
+    }
+
+def build_slots(window_start: datetime, slot_minutes: int, occupancy: List[int],
+                capacity: Optional[int]) -> List[dict]:
+    capacity = capacity or 0
+    step = timedelta(minutes=slot_minutes)
+    return [
+        {
+            "start": window_start + step * index,
+            "end": window_start + step * (index + 1),
+            "booked": booked,
+            "free": max(capacity - booked, 0)
+        }
+        for index, booked in enumerate(occupancy)
+    ]
@@ -0,0 +1,3 @@
+"""
+Standalone benchmark scripts, run with ``python -m backend.benchmarks.<name>``
+"""
@@ -0,0 +1,86 @@
+# backend/benchmarks/bench_booking_contention.py
+"""Fire parallel bookings at one parking space and check nothing is oversold.
+
+    python -m backend.benchmarks.bench_booking_contention --requests 500 --capacity 100
+
+Runs against --database-url (point it at a scratch Postgres for realistic numbers),
+by default a temporary SQLite file. It never touches the application's DATABASE_URL.
+"""
+import argparse
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+# Scratch tooling: never bind the app engines to the configured (possibly production) database
+os.environ["DATABASE_URL"] = "sqlite://"
+
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from backend import crud, models
+from backend.schemas import CreateBookingRequest
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--capacity", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=32)
+    parser.add_argument("--database-url", default=f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'contention.db')}")
+    args = parser.parse_args()
+
+    if args.database_url.startswith("sqlite"):
+        # Writers queue on SQLite's database lock instead of failing immediately
+        engine = create_engine(args.database_url, connect_args={"timeout": 60, "check_same_thread": False})
+    else:
+        engine = create_engine(args.database_url, pool_size=args.workers, max_overflow=0)
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    models.Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        driver = models.Driver(full_name="Load Test", email=f"load-{time.time_ns()}@example.com", phone="0")
+        space = models.ParkingSpace(
+            name="Contention Lot", address="Benchmark Road", latitude=-1.29, longitude=36.82,
+            total_spots=args.capacity, available_spots=args.capacity, price_per_hour=50, features=""
+        )
+        db.add_all([driver, space])
+        db.commit()
+        driver_id, space_id = driver.id, space.id
+
+    start = datetime.utcnow() + timedelta(hours=1)
+    request = CreateBookingRequest(
+        parking_space_id=space_id, start_time=start, end_time=start + timedelta(hours=2), duration_hours=2
+    )
+
+    def book(_):
+        with SessionLocal() as db:
+            user = db.get(models.Driver, driver_id)
+            try:
+                crud.create_booking(db, user, request)
+                return 201
+            except HTTPException as e:
+                return e.status_code
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        statuses = list(pool.map(book, range(args.requests)))
+    elapsed = time.perf_counter() - started
+
+    with SessionLocal() as db:
+        remaining = db.get(models.ParkingSpace, space_id).available_spots
+        booked = db.query(models.Booking).filter_by(parking_space_id=space_id).count()
+
+    created = statuses.count(201)
+    full = statuses.count(409)
+    errors = len(statuses) - created - full
+    print(f"backend={engine.dialect.name} requests={args.requests} capacity={args.capacity} workers={args.workers}")
+    print(f"created={created} full={full} errors={errors} remaining={remaining} booking_rows={booked}")
+    print(f"throughput: {args.requests / elapsed:.1f} req/s ({elapsed * 1000 / args.requests:.2f} ms/req)")
+    oversold = booked - args.capacity
+    assert oversold <= 0, f"oversold by {oversold}"
+    assert remaining == args.capacity - booked, "counter and booking rows disagree"
+    print("OK: no oversells")
+
+if __name__ == "__main__":
+    main()
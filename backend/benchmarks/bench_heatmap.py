@@ -0,0 +1,73 @@
+# backend/benchmarks/bench_heatmap.py
+"""Vectorised hour-of-week aggregation vs. a per-hour Python loop over synthetic bookings.
+
+    python -m backend.benchmarks.bench_heatmap --bookings 2000000 --spaces 500
+
+The loop walks every clock hour of a random sample of the bookings; its time is
+scaled up to the full set. Both are checked against each other on that sample.
+"""
+import argparse
+import math
+import os
+import time
+
+import numpy as np
+
+# Scratch tooling: never bind the app engines to the configured (possibly production) database
+os.environ["DATABASE_URL"] = "sqlite://"
+
+from backend.analytics import HOURS_PER_WEEK, hour_of_week_hours
+
+def synthetic(bookings: int, spaces: int, weeks: int, seed: int):
+    rng = np.random.default_rng(seed)
+    window_hours = weeks * HOURS_PER_WEEK
+    space_index = rng.integers(0, spaces, bookings)
+    starts = rng.uniform(0, window_hours, bookings)
+    # Mostly short stays, with a long tail of multi-day and multi-week ones
+    durations = rng.lognormal(mean=1.0, sigma=1.2, size=bookings)
+    ends = np.minimum(starts + durations, window_hours)
+    return space_index, starts, ends
+
+def loop_hours(space_index, starts, ends, space_count):
+    booked = [[0.0] * HOURS_PER_WEEK for _ in range(space_count)]
+    for space, start, end in zip(space_index.tolist(), starts.tolist(), ends.tolist()):
+        hour = math.floor(start)
+        while hour < end:
+            booked[space][hour % HOURS_PER_WEEK] += min(end, hour + 1) - max(start, hour)
+            hour += 1
+    return np.array(booked)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bookings", type=int, default=1_000_000)
+    parser.add_argument("--spaces", type=int, default=500)
+    parser.add_argument("--weeks", type=int, default=8)
+    parser.add_argument("--sample", type=int, default=20_000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    space_index, starts, ends = synthetic(args.bookings, args.spaces, args.weeks, args.seed)
+    print(f"{args.bookings:,} bookings across {args.spaces} spaces, {args.weeks} weeks")
+
+    started = time.perf_counter()
+    booked = hour_of_week_hours(space_index, starts, ends, args.spaces)
+    vectorised = time.perf_counter() - started
+    expected = float((ends - starts).sum())
+    print(f"vectorised      {vectorised * 1000:10.1f} ms  (total hours off by {abs(booked.sum() - expected):.2e})")
+
+    sample = min(args.sample, args.bookings)
+    picked = np.random.default_rng(args.seed).choice(args.bookings, sample, replace=False)
+    started = time.perf_counter()
+    reference = loop_hours(space_index[picked], starts[picked], ends[picked], args.spaces)
+    looped = (time.perf_counter() - started) * args.bookings / sample
+    print(f"per-hour loop   {looped * 1000:10.1f} ms  (extrapolated from {sample:,} bookings)")
+    print(f"speedup         {looped / vectorised:10.1f}x")
+
+    sampled = hour_of_week_hours(space_index[picked], starts[picked], ends[picked], args.spaces)
+    error = float(np.abs(sampled - reference).max())
+    print(f"max difference on the sample: {error:.2e}")
+    if error > 1e-6:
+        raise SystemExit("vectorised and loop results disagree")
+
+if __name__ == "__main__":
+    main()
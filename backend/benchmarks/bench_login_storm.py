@@ -0,0 +1,94 @@
+# backend/benchmarks/bench_login_storm.py
+"""Latency of a cheap endpoint while a storm of logins is in flight.
+
+    python -m backend.benchmarks.bench_login_storm --logins 40 --kind process
+    python -m backend.benchmarks.bench_login_storm --logins 40 --kind inline
+
+"inline" hashes on the event loop (the old behaviour) for comparison. Runs the app
+in-process against a temporary SQLite database.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+# Scratch tooling: never bind the app engines to the configured (possibly production) database
+os.environ["DATABASE_URL"] = "sqlite://"
+
+import httpx
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from backend import main, models
+from backend.hashing import hash_password, hashing_pool
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+async def run(args):
+    engine = create_engine(
+        f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'login.db')}",
+        connect_args={"check_same_thread": False}
+    )
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    models.Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        db.add(models.Driver(full_name="Storm", email="storm@example.com", phone="0",
+                             hashed_password=hash_password("storm-password")))
+        db.commit()
+
+    def get_db():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    main.app.dependency_overrides[main.get_db] = get_db
+    hashing_pool.kind = args.kind
+    hashing_pool.max_pending = max(hashing_pool.max_pending, args.logins)
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        latencies = []
+        storm_done = asyncio.Event()
+
+        async def probe():
+            while not storm_done.is_set():
+                started = time.perf_counter()
+                await client.get("/health")
+                latencies.append((time.perf_counter() - started) * 1000)
+                await asyncio.sleep(args.probe_interval)
+
+        async def login():
+            response = await client.post(
+                "/api/auth/login", json={"email": "storm@example.com", "password": "storm-password"}
+            )
+            return response.status_code
+
+        prober = asyncio.create_task(probe())
+        started = time.perf_counter()
+        statuses = await asyncio.gather(*[login() for _ in range(args.logins)])
+        storm_seconds = time.perf_counter() - started
+        storm_done.set()
+        await prober
+
+    hashing_pool.shutdown()
+    main.app.dependency_overrides.clear()
+    print(f"kind={args.kind} logins={args.logins} ok={statuses.count(200)} storm={storm_seconds:.2f}s "
+          f"({args.logins / storm_seconds:.1f} logins/s)")
+    print(f"/health during storm: n={len(latencies)} p50={statistics.median(latencies):.1f} ms "
+          f"p99={percentile(latencies, 99):.1f} ms max={max(latencies):.1f} ms")
+
+def cli():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=40)
+    parser.add_argument("--kind", choices=["process", "thread", "inline"], default="process")
+    parser.add_argument("--probe-interval", type=float, default=0.005)
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,77 @@
+# backend/benchmarks/bench_pricing.py
+"""Batch price quotes: one vectorised pass vs. quoting each candidate on its own.
+
+    python -m backend.benchmarks.bench_pricing --spaces 100000 --quotes 500
+
+Builds a tariff table for synthetic spaces (a share of them with peak bands, daily
+caps and occupancy surcharges), then prices the same candidates both ways and checks
+they agree.
+"""
+import argparse
+import os
+import random
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+# Scratch tooling: never bind the app engines to the configured (possibly production) database
+os.environ["DATABASE_URL"] = "sqlite://"
+
+from backend.pricing import PricingEngine, TariffTable
+
+BANDS = [
+    [{"start_hour": 7, "end_hour": 10, "rate": 150, "days": [0, 1, 2, 3, 4]},
+     {"start_hour": 22, "end_hour": 6, "rate": 20}],
+    [{"start_hour": 9, "end_hour": 18, "rate": 80}],
+]
+SURCHARGES = [{"occupancy": 0.8, "multiplier": 1.25}, {"occupancy": 0.95, "multiplier": 1.5}]
+
+def synthetic_rows(spaces: int, tariffed: float, rng: random.Random):
+    for space_id in range(1, spaces + 1):
+        price = rng.choice([40, 50, 60, 80, 100])
+        if rng.random() < tariffed:
+            yield space_id, price, 20, rng.choice(BANDS), rng.choice([None, 400, 600]), SURCHARGES
+        else:
+            yield space_id, price, 20, None, None, None
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--spaces", type=int, default=100_000)
+    parser.add_argument("--quotes", type=int, default=500)
+    parser.add_argument("--tariffed", type=float, default=0.2, help="share of spaces with a tariff")
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(5)
+    started = time.perf_counter()
+    table = TariffTable(synthetic_rows(args.spaces, args.tariffed, rng))
+    print(f"tariff table: {table.size:,} spaces, {table.profiles} profiles, "
+          f"built in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+    engine = PricingEngine()
+    now = datetime(2026, 10, 19, 6, 0)
+    space_ids = [rng.randint(1, args.spaces) for _ in range(args.quotes)]
+    starts = [now + timedelta(minutes=rng.randint(0, 7 * 1440)) for _ in range(args.quotes)]
+    ends = [start + timedelta(minutes=rng.randint(30, 3 * 1440)) for start in starts]
+    available = [rng.randint(0, 20) for _ in range(args.quotes)]
+
+    started = time.perf_counter()
+    for _ in range(args.rounds):
+        batch, _, _ = engine.quote_many(table, space_ids, starts, ends, available)
+    batched = (time.perf_counter() - started) / args.rounds
+
+    started = time.perf_counter()
+    for _ in range(args.rounds):
+        single = [engine.quote(table, *candidate) for candidate in zip(space_ids, starts, ends, available)]
+    one_by_one = (time.perf_counter() - started) / args.rounds
+
+    print(f"{args.quotes} quotes batched    {batched * 1000:8.2f} ms")
+    print(f"{args.quotes} quotes one by one {one_by_one * 1000:8.2f} ms  ({one_by_one / batched:.1f}x slower)")
+    difference = float(np.abs(batch - np.array(single)).max())
+    print(f"max difference: {difference:.2e}")
+    if difference > 0.01:
+        raise SystemExit("batched and single quotes disagree")
+
+if __name__ == "__main__":
+    main()
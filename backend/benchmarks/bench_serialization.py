@@ -0,0 +1,140 @@
+# backend/benchmarks/bench_serialization.py
+"""Response serialisation of large payloads: stdlib JSON vs. orjson, with and without models.
+
+    python -m backend.benchmarks.bench_serialization --rows 10000
+
+Serves synthetic spot listings and booking histories of ``--rows`` rows through a small
+FastAPI app, one route per combination, and reports the fastest of ``--rounds`` full
+requests over the ASGI transport:
+
+* ``untyped``: no response model, ``JSONResponse`` (jsonable_encoder walks the payload)
+* ``model``: a response model, ``JSONResponse``
+* ``model+orjson``: a response model, ``ORJSONResponse`` (what the API serves)
+
+All three bodies must decode to the same JSON.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+import httpx
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+# Scratch tooling: never bind the app engines to the configured (possibly production) database
+os.environ["DATABASE_URL"] = "sqlite://"
+
+from backend import schemas
+
+def synthetic_spots(rows: int, rng: random.Random) -> List[dict]:
+    created = datetime(2026, 1, 1)
+    return [
+        {
+            "id": space_id,
+            "name": f"Lot {space_id}",
+            "address": f"{rng.randint(1, 999)} Kenyatta Avenue",
+            "latitude": -1.28 + rng.uniform(-0.1, 0.1),
+            "longitude": 36.82 + rng.uniform(-0.1, 0.1),
+            "available_spots": rng.randint(0, 40),
+            "total_spots": 40,
+            "price_per_hour": rng.choice([40.0, 50.0, 80.0]),
+            "features": "covered,cctv",
+            "rating": round(rng.uniform(3, 5), 1),
+            "created_at": created + timedelta(minutes=space_id),
+            "updated_at": created + timedelta(minutes=space_id),
+            "distance": f"{rng.uniform(0.1, 5):.1f} km",
+            "walk_time": f"{rng.randint(1, 60)} min",
+            "forecast": {
+                "arrival_at": datetime(2026, 10, 19, 8),
+                "expected_free_spots": round(rng.uniform(0, 40), 1),
+                "expected_occupancy": round(rng.random(), 3),
+                "model_fitted_at": datetime(2026, 10, 19, 7)
+            }
+        }
+        for space_id in range(1, rows + 1)
+    ]
+
+def synthetic_bookings(rows: int, rng: random.Random) -> List[dict]:
+    start = datetime(2026, 1, 1)
+    bookings = []
+    for booking_id in range(1, rows + 1):
+        begins = start + timedelta(hours=rng.randint(0, 6000))
+        hours = rng.randint(1, 8)
+        bookings.append({
+            "id": booking_id,
+            "driver_id": 1,
+            "parking_space_id": rng.randint(1, 500),
+            "start_time": begins,
+            "end_time": begins + timedelta(hours=hours),
+            "duration_hours": float(hours),
+            "status": rng.choice(["active", "completed", "cancelled"]),
+            "payment_method": "card",
+            "total_cost": hours * 50.0,
+            "created_at": begins,
+            "updated_at": begins,
+            "parking_space": {"id": 1, "name": "Lot 1", "address": "1 Kenyatta Avenue",
+                              "latitude": -1.28, "longitude": 36.82, "price_per_hour": 50.0}
+        })
+    return bookings
+
+def returning(payload):
+    # A closure, not a default argument: FastAPI would treat that as a parameter and copy it
+    def endpoint():
+        return payload
+    return endpoint
+
+def build_app(payloads: dict) -> FastAPI:
+    app = FastAPI()
+    variants = [("untyped", JSONResponse), ("model", JSONResponse), ("model+orjson", ORJSONResponse)]
+    models = {"spots": List[schemas.ParkingSpot], "bookings": List[schemas.BookingWithSpace]}
+    for kind, payload in payloads.items():
+        for variant, response_class in variants:
+            app.add_api_route(
+                f"/{kind}/{variant}", returning(payload),
+                response_model=None if variant == "untyped" else models[kind],
+                response_class=response_class
+            )
+    return app
+
+async def measure(app: FastAPI, path: str, rounds: int):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        body = (await client.get(path)).content
+        best = float("inf")
+        for _ in range(rounds):
+            started = time.perf_counter()
+            await client.get(path)
+            best = min(best, time.perf_counter() - started)
+        return best, body
+
+async def run(args):
+    rng = random.Random(11)
+    payloads = {"spots": synthetic_spots(args.rows, rng), "bookings": synthetic_bookings(args.rows, rng)}
+    app = build_app(payloads)
+    for kind in payloads:
+        print(f"{kind}: {args.rows:,} rows")
+        baseline, expected = None, None
+        for variant in ("untyped", "model", "model+orjson"):
+            elapsed, body = await measure(app, f"/{kind}/{variant}", args.rounds)
+            decoded = json.loads(body)
+            if expected is None:
+                baseline, expected = elapsed, decoded
+            elif decoded != expected:
+                raise SystemExit(f"{kind}/{variant} body differs from the untyped response")
+            print(f"  {variant:<14}{elapsed * 1000:9.1f} ms  {len(body) / 1e6:6.2f} MB  "
+                  f"({baseline / elapsed:.2f}x untyped)")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--rounds", type=int, default=10)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+# backend/benchmarks/bench_spatial.py
+"""Grid index vs. full haversine scan for radius queries over 100k+ parking spaces.
+
+    python -m backend.benchmarks.bench_spatial --spaces 200000
+"""
+import argparse
+import os
+import random
+import time
+
+# Scratch tooling: never bind the app engines to the configured (possibly production) database
+os.environ["DATABASE_URL"] = "sqlite://"
+
+from backend.spatial import GridIndex, haversine_m
+
+NAIROBI = (-1.2921, 36.8219)
+
+def brute_force(points, lat, lng, radius_m):
+    results = []
+    for point_id, plat, plng in points:
+        distance = haversine_m(lat, lng, plat, plng)
+        if distance <= radius_m:
+            results.append((point_id, distance))
+    results.sort(key=lambda item: (item[1], item[0]))
+    return results
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--spaces", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--radius", type=float, default=2000.0)
+    parser.add_argument("--spread", type=float, default=0.5, help="degrees around the metro centre")
+    parser.add_argument("--cell", type=float, default=500.0)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    points = [
+        (i, NAIROBI[0] + rng.uniform(-args.spread, args.spread), NAIROBI[1] + rng.uniform(-args.spread, args.spread))
+        for i in range(1, args.spaces + 1)
+    ]
+    centres = [
+        (NAIROBI[0] + rng.uniform(-args.spread, args.spread), NAIROBI[1] + rng.uniform(-args.spread, args.spread))
+        for _ in range(args.queries)
+    ]
+
+    started = time.perf_counter()
+    grid = GridIndex(points, args.cell)
+    build_ms = (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    grid_results = [grid.query_radius(lat, lng, args.radius) for lat, lng in centres]
+    grid_ms = (time.perf_counter() - started) * 1000 / args.queries
+
+    scan_queries = min(args.queries, 20)
+    started = time.perf_counter()
+    scan_results = [brute_force(points, lat, lng, args.radius) for lat, lng in centres[:scan_queries]]
+    scan_ms = (time.perf_counter() - started) * 1000 / scan_queries
+
+    assert grid_results[:scan_queries] == scan_results, "grid index disagrees with full scan"
+    hits = sum(len(r) for r in grid_results) / args.queries
+    print(f"spaces={args.spaces} radius={args.radius:.0f}m cell={args.cell:.0f}m avg_hits={hits:.1f}")
+    print(f"grid build:        {build_ms:9.1f} ms")
+    print(f"grid query:        {grid_ms:9.3f} ms/query")
+    print(f"full scan query:   {scan_ms:9.3f} ms/query")
+    print(f"speedup:           {scan_ms / grid_ms:9.1f}x")
+
+if __name__ == "__main__":
+    main()
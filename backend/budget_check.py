@@ -0,0 +1,129 @@
+# backend/budget_check.py
+"""Query-count regression check for the budgeted read endpoints.
+
+    python -m backend.budget_check
+    python -m backend.budget_check --bookings 500 --spaces 2000
+
+Runs the app in-process against a fresh temporary SQLite database, calls every route
+that declares a ``@query_budget`` with cold caches and again with warm ones, and exits
+non-zero if any request ran more SQL statements than its budget (for example because
+a relationship started lazy-loading per row).
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+import httpx
+
+def seed(SessionLocal, models, hash_password, spaces: int, bookings: int) -> int:
+    rng = random.Random(17)
+    now = datetime.utcnow()
+    with SessionLocal() as db:
+        driver = models.Driver(full_name="Budget", email="budget@example.com", phone="0", role="admin",
+                               hashed_password=hash_password("budget-password"))
+        db.add(driver)
+        db.add_all([
+            models.ParkingSpace(
+                name=f"Lot {i}", address=f"{i} Budget Road", latitude=-1.2864 + rng.uniform(-0.05, 0.05),
+                longitude=36.8172 + rng.uniform(-0.05, 0.05), total_spots=20, available_spots=rng.randint(0, 20),
+                price_per_hour=100, features="", rating=0.0
+            )
+            for i in range(spaces)
+        ])
+        db.flush()
+        for i in range(bookings):
+            start = now - timedelta(hours=i)
+            db.add(models.Booking(
+                driver_id=driver.id, parking_space_id=rng.randint(1, spaces), start_time=start,
+                end_time=start + timedelta(hours=2), duration_hours=2, status=rng.choice(["active", "completed"]),
+                payment_method="card", created_at=start, updated_at=start
+            ))
+        db.commit()
+        return driver.id
+
+async def run(args) -> bool:
+    from backend import auth, crud, main, models
+    from backend.database import SessionLocal, async_engine, engine
+    from backend.hashing import hash_password
+
+    models.Base.metadata.create_all(bind=engine)
+    seed(SessionLocal, models, hash_password, args.spaces, args.bookings)
+    budgets = {
+        route.path: route.endpoint.__query_budget__
+        for route in main.app.routes
+        if hasattr(getattr(route, "endpoint", None), "__query_budget__")
+    }
+    requests = [
+        ("/api/bookings", "/api/bookings", {"limit": 50}),
+        ("/api/bookings", "/api/bookings", {"status": "active", "search": "lot"}),
+        ("/api/dashboard/stats", "/api/dashboard/stats", {}),
+        ("/api/dashboard/recent-bookings", "/api/dashboard/recent-bookings", {}),
+        ("/api/parking/spots", "/api/parking/spots", {}),
+        ("/api/parking/spots", "/api/parking/spots", {"lat": -1.2864, "lng": 36.8172, "radius": 3000}),
+        ("/api/parking/spots", "/api/parking/spots", {"search": "budget road", "filter": "all"}),
+        ("/api/parking/spots/{spot_id}", "/api/parking/spots/1", {}),
+        ("/api/parking/spots/{spot_id}/availability", "/api/parking/spots/1/availability", {}),
+        ("/api/admin/locations", "/api/admin/locations", {}),
+        ("/api/pricing/quotes", "/api/pricing/quotes", {"items": [
+            {"parking_space_id": space_id, "start_time": (datetime.utcnow() + timedelta(hours=space_id)).isoformat(),
+             "end_time": (datetime.utcnow() + timedelta(hours=space_id + 3)).isoformat()}
+            for space_id in range(1, 51)
+        ]}),
+    ]
+    # Their params are sent as the JSON body
+    posted = {"/api/pricing/quotes"}
+    missing = set(budgets) - {template for template, _, _ in requests}
+    ok = not missing
+    for template in sorted(missing):
+        print(f"[FAIL] {template}: budgeted route has no request in this check")
+
+    token = auth.create_access_token({"sub": "budget@example.com"})
+    headers = {"Authorization": f"Bearer {token}"}
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://budget") as client:
+        for template, path, params in requests:
+            counts = []
+            for cold in (True, False):
+                if cold:
+                    crud.parking_cache.clear()
+                    crud.spatial_index.invalidate()
+                    crud.search_index.invalidate()
+                    crud.pricing_engine.invalidate()
+                    auth.principal_cache.clear()
+                if template in posted:
+                    response = await client.post(path, json=params, headers=headers)
+                else:
+                    response = await client.get(path, params=params, headers=headers)
+                if response.status_code != 200:
+                    print(f"[FAIL] {path} {params}: HTTP {response.status_code} {response.text[:200]}")
+                    ok = False
+                counts.append(int(response.headers.get("X-Query-Count", -1)))
+            budget = budgets.get(template)
+            over = budget is not None and max(counts) > budget
+            ok = ok and not over
+            shown = f"({len(params['items'])} items)" if template in posted else params or ''
+            print(f"[{'FAIL' if over else 'ok':>4}] {path} {shown}: cold={counts[0]} warm={counts[1]} "
+                  f"budget={budget}")
+    await async_engine.dispose()
+    return ok
+
+def cli():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--spaces", type=int, default=500)
+    parser.add_argument("--bookings", type=int, default=200)
+    args = parser.parse_args()
+
+    # Always a throwaway database, whatever .env says
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'budget.db')}"
+    os.environ["DATABASE_REPLICA_URLS"] = ""
+    os.environ["QUERY_BUDGET_MODE"] = "log"
+    ok = asyncio.run(run(args))
+    print("All routes within their query budgets." if ok else "Query budgets exceeded.")
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    cli()
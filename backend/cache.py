@@ -0,0 +1,89 @@
+# backend/cache.py
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable
+
+_MISS = object()
+
+class QueryCache:
+    """In-process read-through cache with TTL expiry and LRU eviction.
+
+    Keys are prefixed with the current version, so ``invalidate()`` is a constant-time
+    version bump; entries from older versions are never read again and age out through
+    LRU eviction. The TTL bounds staleness for writes made by other worker processes.
+    Cached values are shared between callers and must not be mutated.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 30.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _lookup(self, versioned_key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(versioned_key)
+            if entry is not None and entry[0] > now:
+                self._data.move_to_end(versioned_key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            return _MISS
+
+    def _store(self, versioned_key, value):
+        with self._lock:
+            # A write during the load makes this result stale; hand it back but don't keep it
+            if versioned_key[0] == self.version:
+                self._data[versioned_key] = (time.monotonic() + self.ttl, value)
+                self._data.move_to_end(versioned_key)
+                while len(self._data) > self.maxsize:
+                    self._data.popitem(last=False)
+                    self.evictions += 1
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        versioned_key = (self.version, key)
+        value = self._lookup(versioned_key)
+        if value is _MISS:
+            value = loader()
+            self._store(versioned_key, value)
+        return value
+
+    async def aget_or_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """``get_or_load`` with a coroutine loader."""
+        versioned_key = (self.version, key)
+        value = self._lookup(versioned_key)
+        if value is _MISS:
+            value = await loader()
+            self._store(versioned_key, value)
+        return value
+
+    def invalidate(self):
+        with self._lock:
+            self.version += 1
+            self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "version": self.version,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0
+            }
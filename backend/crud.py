@@ -1,13 +1,32 @@
 # backend/crud.py
 import logging
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, contains_eager, joinedload
 from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
 from datetime import datetime, timedelta
-from backend import models, schemas
-from backend.schemas import RegisterRequest, LoginRequest, ResetPasswordRequest, VerifyResetRequest, CreateBookingRequest, UpdateBookingRequest, ExtendBookingRequest, BookSpotRequest, LocationRequest
-from backend.auth import get_password_hash, verify_password, create_access_token
-from sqlalchemy import or_
-from typing import Optional
+from backend import models, rollups, schemas
+from backend.schemas import RegisterRequest, LoginRequest, ResetPasswordRequest, VerifyResetRequest, CreateBookingRequest, UpdateBookingRequest, ExtendBookingRequest, BookSpotRequest, LocationRequest, FleetBookingRequest
+from backend.auth import create_access_token, token_claims, invalidate_principals
+from backend.availability import RELEASED_STATUSES, build_slots, floor_to_slot, slot_occupancy, to_naive_utc
+from backend.cache import QueryCache
+from backend.activity import ActivityLog
+from backend.analytics import HeatmapCache, heatmap_response
+from backend.forecast import ForecastTable
+from backend.pricing import PricingEngine, TariffError, TariffTable, validate_tariff
+from backend.database import SessionLocal, set_statement_timeout, set_statement_timeout_async
+from backend.hashing import hash_password, hashing_pool, verify_and_update
+from backend.pagination import clamp_limit, decode_cursor, encode_cursor, paginate, paginate_async
+from backend.realtime import AvailabilityHub
+from backend.search import SearchIndex
+from backend.spatial import SpatialIndex, format_distance, format_walk_time
+from sqlalchemy import or_, case, func, insert, select, text, update
+from collections import Counter
+from types import SimpleNamespace
+from typing import Dict, Iterable, List, Optional
+import bisect
+import math
+import os
 
 # Configure logging
 logging.basicConfig(
@@ -16,14 +35,108 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Grid index over parking space coordinates, rebuilt lazily after location writes
+spatial_index = SpatialIndex(
+    cell_size_m=float(os.getenv("SPATIAL_CELL_SIZE_M", "500")),
+    max_age=float(os.getenv("SPATIAL_INDEX_MAX_AGE", "300"))
+)
+
+# Token/prefix index over names and addresses; used where pg_trgm isn't available
+search_index = SearchIndex(max_age=float(os.getenv("SEARCH_INDEX_MAX_AGE", "300")))
+
+# Read-through cache for the anonymous parking listing/detail endpoints
+parking_cache = QueryCache(
+    maxsize=int(os.getenv("PARKING_CACHE_SIZE", "1024")),
+    ttl=float(os.getenv("PARKING_CACHE_TTL", "30"))
+)
+
+# Pushes available_spots changes to /ws/parking subscribers
+availability_hub = AvailabilityHub(
+    max_pending=int(os.getenv("REALTIME_MAX_PENDING", "500")),
+    coalesce_window=float(os.getenv("REALTIME_COALESCE_WINDOW", "0.1"))
+)
+
+# Admin activity feed: events queued by the write paths, flushed to activity_events in batches
+activity_log = ActivityLog(
+    SessionLocal,
+    buffer_size=int(os.getenv("ACTIVITY_BUFFER_SIZE", "200")),
+    flush_interval=float(os.getenv("ACTIVITY_FLUSH_INTERVAL", "1")),
+    batch_size=int(os.getenv("ACTIVITY_BATCH_SIZE", "500")),
+    max_pending=int(os.getenv("ACTIVITY_MAX_PENDING", "10000")),
+    max_age=float(os.getenv("ACTIVITY_BUFFER_MAX_AGE", "10"))
+)
+
+# Admin dashboard counter deltas, applied after each write commits, in batches
+stat_counters = rollups.CounterBuffer(
+    SessionLocal,
+    flush_interval=float(os.getenv("STAT_COUNTER_FLUSH_INTERVAL", "1")),
+    reconcile_interval=float(os.getenv("STAT_COUNTER_RECONCILE_INTERVAL", "900"))
+)
+
+# Hour-of-week occupancy per space for the admin analytics view
+heatmap_cache = HeatmapCache(
+    maxsize=int(os.getenv("HEATMAP_CACHE_SIZE", "2048")),
+    max_age=float(os.getenv("HEATMAP_MAX_AGE", "3600"))
+)
+
+# Local time of the heatmap's days and hours; Nairobi (EAT, UTC+3) unless configured
+HEATMAP_UTC_OFFSET = int(os.getenv("HEATMAP_UTC_OFFSET", "3"))
+
+# Per-space occupancy models behind the arrival-time forecasts on the spot endpoints
+occupancy_forecasts = ForecastTable(
+    SessionLocal,
+    history_weeks=int(os.getenv("FORECAST_HISTORY_WEEKS", "8")),
+    trend_weeks=int(os.getenv("FORECAST_TREND_WEEKS", "1")),
+    anomaly_half_life=float(os.getenv("FORECAST_ANOMALY_HALF_LIFE_MINUTES", "60")),
+    refit_interval=float(os.getenv("FORECAST_REFIT_INTERVAL", "3600")),
+    refresh_interval=float(os.getenv("FORECAST_REFRESH_INTERVAL", "300"))
+)
+
+# Furthest ahead an arrival-time forecast may be asked for
+FORECAST_MAX_HOURS = int(os.getenv("FORECAST_MAX_HOURS", "168"))
+
+# Per-space tariffs compiled for quoting; rebuilt lazily after location writes.
+# Tariff bands are in this UTC offset's local time (Nairobi, EAT, unless configured)
+pricing_engine = PricingEngine(
+    utc_offset=int(os.getenv("TARIFF_UTC_OFFSET", "3")),
+    max_age=float(os.getenv("TARIFF_TABLE_MAX_AGE", "300"))
+)
+
+# Upper bounds on one batch price quote
+QUOTE_MAX_ITEMS = int(os.getenv("QUOTE_MAX_ITEMS", "500"))
+QUOTE_MAX_HOURS = int(os.getenv("QUOTE_MAX_HOURS", "720"))
+
+# Upper bound on items in one fleet booking batch
+FLEET_MAX_ITEMS = int(os.getenv("FLEET_MAX_ITEMS", "100"))
+
+# Keyset sort columns for paginated listings
+SPACE_KEYSET = [models.ParkingSpace.created_at, models.ParkingSpace.id]
+BOOKING_KEYSET = [models.Booking.created_at, models.Booking.id]
+
+# Keeps IN (...) lists under SQLite's bound-parameter limit
+ID_CHUNK_SIZE = 900
+
+# Type-ahead search is abandoned rather than left to tie up a pooled connection (ms; 0 disables)
+SEARCH_STATEMENT_TIMEOUT_MS = int(os.getenv("SEARCH_STATEMENT_TIMEOUT_MS", "2000"))
+
 # ------------------ AUTH ------------------
-def register_user(db: Session, data: RegisterRequest):
-    if data.password != data.confirm_password:
-        raise HTTPException(status_code=400, detail="Passwords do not match")
-    if db.query(models.Driver).filter_by(email=data.email).first():
-        raise HTTPException(status_code=400, detail="Email already registered")
+# Password hashing runs in the bounded hashing pool and the blocking DB work in the
+# threadpool, so login/register never stall the event loop.
+def _auth_response(user: models.Driver) -> dict:
+    user_data = schemas.UserResponse.from_orm(user).model_dump()
+    # Only include minimal JSON-serializable data in JWT payload
+    access_token = create_access_token(token_claims(user))
+    return {
+        "access_token": access_token,
+        "token_type": "bearer",
+        "user": user_data,
+        "expires_in": 1800
+    }
+
+def _get_driver_by_email(db: Session, email: str):
+    return db.query(models.Driver).filter_by(email=email).first()
 
-    hashed_pw = get_password_hash(data.password)
+def _create_driver(db: Session, data: RegisterRequest, hashed_pw: str) -> dict:
     new_user = models.Driver(
         full_name=data.full_name,
         email=data.email,
@@ -31,6 +144,7 @@ def register_user(db: Session, data: RegisterRequest):
         hashed_password=hashed_pw
     )
     db.add(new_user)
+    stat_counters.bump(db, {rollups.TOTAL_USERS: 1})
     try:
         db.commit()
     except Exception as e:
@@ -43,40 +157,47 @@ def register_user(db: Session, data: RegisterRequest):
         logger.error("Unexpected DB error during registration: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail="Registration failed")
     db.refresh(new_user)
+    invalidate_principals()
+    activity_log.record("user", "New user registration", driver_id=new_user.id, user_name=new_user.full_name)
+    return _auth_response(new_user)
 
-    user_data = schemas.UserResponse.from_orm(new_user).model_dump()
-    # The token payload should also be lean, but for now, we pass the same response data.
-    # Only include minimal JSON-serializable data in JWT payload
-    access_token = create_access_token({"sub": new_user.email})
-    return {
-        "access_token": access_token,
-        "token_type": "bearer",
-        "user": user_data,
-        "expires_in": 1800
-    }
+def _store_rehash(db: Session, user_id: int, hashed_pw: str):
+    db.query(models.Driver).filter_by(id=user_id).update(
+        {"hashed_password": hashed_pw}, synchronize_session=False
+    )
+    db.commit()
+    invalidate_principals()
 
-def login_user(db: Session, data: LoginRequest):
+async def register_user(db: Session, data: RegisterRequest):
+    if data.password != data.confirm_password:
+        raise HTTPException(status_code=400, detail="Passwords do not match")
+    if await run_in_threadpool(_get_driver_by_email, db, data.email):
+        raise HTTPException(status_code=400, detail="Email already registered")
+
+    hashed_pw = await hashing_pool.run(hash_password, data.password)
+    return await run_in_threadpool(_create_driver, db, data, hashed_pw)
+
+async def login_user(db: Session, data: LoginRequest):
     try:
-        user = db.query(models.Driver).filter_by(email=data.email).first()
-        if not user:
+        user = await run_in_threadpool(_get_driver_by_email, db, data.email)
+        if not user or not user.hashed_password:
             logger.info(f"Login failed: User not found for email {data.email}")
             raise HTTPException(status_code=401, detail="Invalid credentials")
         
-        if not verify_password(data.password, user.hashed_password):
+        valid, new_hash = await hashing_pool.run(verify_and_update, data.password, user.hashed_password)
+        if not valid:
             logger.info(f"Login failed: Invalid password for user {user.id}")
             raise HTTPException(status_code=401, detail="Invalid credentials")
 
-        user_data = schemas.UserResponse.from_orm(user).model_dump()
-        # The token payload should also be lean, but for now, we pass the same response data.
-        # Only include minimal JSON-serializable data in JWT payload
-        access_token = create_access_token({"sub": user.email})
+        result = _auth_response(user)
+        if new_hash:
+            # Stored hash uses an outdated scheme or cost; upgrade it now we know the password
+            await run_in_threadpool(_store_rehash, db, user.id, new_hash)
+            logger.info(f"Upgraded password hash for user {user.id}")
         logger.info(f"Login successful for user {user.id}")
-        return {
-            "access_token": access_token,
-            "token_type": "bearer",
-            "user": user_data,
-            "expires_in": 1800
-        }
+        return result
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Unexpected error during login: {str(e)}", exc_info=True)
         raise
@@ -86,49 +207,294 @@ def send_reset_email(db: Session, data: ResetPasswordRequest):
     return {"message": "Password reset instructions sent to email.", "success": True}
 
 def verify_reset(db: Session, data: VerifyResetRequest):
-    # Stubbed reset confirmation (no token validation yet)
+    # Stubbed reset confirmation (no token validation yet); the new hash will be written here
+    invalidate_principals()
     return {"message": "Password reset successful.", "success": True}
 
 # ------------------ DASHBOARD ------------------
 def get_user_dashboard_stats(db: Session, user):
-    count = db.query(models.Booking).filter_by(driver_id=user.id).count()
-    return {
-        "total_bookings": count,
-        "money_saved": count * 20,  # placeholder
-        "hours_saved": count * 2,   # placeholder
-        "favorite_spots": 1         # placeholder
-    }
+    """The driver's totals and favourite spaces from their ``driver_rollups`` row."""
+    return rollups.driver_dashboard(db, user.id)
+
+def _recent_bookings_statement(user):
+    return (
+        select(models.Booking)
+        .options(joinedload(models.Booking.parking_space))
+        .filter_by(driver_id=user.id)
+        .order_by(models.Booking.created_at.desc())
+        .limit(5)
+    )
 
 def get_recent_bookings(db: Session, user):
-    return db.query(models.Booking).filter_by(driver_id=user.id).order_by(models.Booking.created_at.desc()).limit(5).all()
+    return db.scalars(_recent_bookings_statement(user)).all()
 
 # ------------------ BOOKINGS ------------------
-def get_user_bookings(db: Session, user, status, search):
-    query = db.query(models.Booking).filter(models.Booking.driver_id == user.id)
+def _user_bookings_statement(user, status, search):
+    """A driver's bookings with their parking space loaded in the same query.
+
+    Booking -> ParkingSpace is many-to-one, so the join never multiplies rows and
+    LIMIT/keyset pagination stay exact.
+    """
+    statement = select(models.Booking).filter(models.Booking.driver_id == user.id)
     if status != "all":
-        query = query.filter(models.Booking.status == status)
+        statement = statement.filter(models.Booking.status == status)
     if search:
-        query = query.filter(or_(models.Booking.location.ilike(f"%{search}%")))
-    return query.all()
+        # Reuse the join the search filter needs instead of adding a second one
+        statement = statement.join(models.Booking.parking_space).options(
+            contains_eager(models.Booking.parking_space)
+        ).filter(
+            or_(
+                models.ParkingSpace.name.ilike(f"%{search}%"),
+                models.ParkingSpace.address.ilike(f"%{search}%")
+            )
+        )
+    else:
+        statement = statement.options(joinedload(models.Booking.parking_space))
+    return statement
 
-def create_booking(db: Session, user, data: CreateBookingRequest):
-    spot = db.query(models.ParkingSpace).filter_by(id=data.parking_space_id).first()
-    if not spot:
+def get_user_bookings(db: Session, user, status, search, limit: Optional[int] = None, cursor: Optional[str] = None):
+    """Newest-first page of the user's bookings; returns ``(bookings, next_cursor)``."""
+    return paginate(
+        db, _user_bookings_statement(user, status, search), "bookings", BOOKING_KEYSET, cursor, limit,
+        descending=True
+    )
+
+def _availability_update(row) -> dict:
+    return {
+        "id": row.id,
+        "available_spots": row.available_spots,
+        "latitude": row.latitude,
+        "longitude": row.longitude
+    }
+
+def reserve_spot(db: Session, space_id: int) -> Optional[dict]:
+    """Atomically take one spot from a space inside the caller's transaction.
+
+    A single conditional UPDATE both checks and decrements the counter, so concurrent
+    bookings can never oversell and no row lock is held across a read-modify-write.
+    Returns the space's new availability (pass it to ``spaces_changed`` after commit),
+    or None if the space is full or missing.
+    """
+    row = db.execute(
+        update(models.ParkingSpace)
+        .where(models.ParkingSpace.id == space_id, models.ParkingSpace.available_spots > 0)
+        .values(
+            available_spots=models.ParkingSpace.available_spots - 1,
+            updated_at=datetime.utcnow()
+        )
+        .returning(
+            models.ParkingSpace.id,
+            models.ParkingSpace.available_spots,
+            models.ParkingSpace.latitude,
+            models.ParkingSpace.longitude
+        )
+        .execution_options(synchronize_session=False)
+    ).first()
+    return _availability_update(row) if row else None
+
+def release_spots(db: Session, counts: Dict[int, int]) -> List[dict]:
+    """Give spots back to their spaces in one UPDATE, capped at ``total_spots``.
+
+    ``counts`` maps parking_space_id to the number of spots to return. Runs inside the
+    caller's transaction; returns the new availability of each touched space.
+    """
+    counts = {space_id: count for space_id, count in counts.items() if space_id is not None and count}
+    if not counts:
+        return []
+    restored = models.ParkingSpace.available_spots + case(counts, value=models.ParkingSpace.id, else_=0)
+    rows = db.execute(
+        update(models.ParkingSpace)
+        .where(models.ParkingSpace.id.in_(list(counts)))
+        .values(
+            available_spots=case(
+                (restored > models.ParkingSpace.total_spots, models.ParkingSpace.total_spots),
+                else_=restored
+            ),
+            updated_at=datetime.utcnow()
+        )
+        .returning(
+            models.ParkingSpace.id,
+            models.ParkingSpace.available_spots,
+            models.ParkingSpace.latitude,
+            models.ParkingSpace.longitude
+        )
+        .execution_options(synchronize_session=False)
+    ).all()
+    return [_availability_update(row) for row in rows]
+
+def _expired_bookings_statement(now: datetime, batch_size: int):
+    return select(models.Booking.id).filter(
+        models.Booking.status == "active",
+        models.Booking.end_time <= now
+    ).order_by(models.Booking.end_time).limit(batch_size)
+
+def expire_bookings(db: Session, now: Optional[datetime] = None, batch_size: int = 500) -> int:
+    """Complete active bookings whose end_time has passed and return their spots.
+
+    Works in batches driven by the partial index on active bookings' end_time: one
+    SELECT of ids, one UPDATE ... RETURNING to flip their status and one UPDATE to
+    restore the counters, committed per batch. Returns the number of bookings expired.
+    """
+    now = now or datetime.utcnow()
+    expired = 0
+    released = {}
+    while True:
+        ids = db.scalars(_expired_bookings_statement(now, batch_size)).all()
+        if not ids:
+            break
+        # Re-checking status makes concurrent sweepers skip rows another one already took
+        space_ids = db.execute(
+            update(models.Booking)
+            .where(models.Booking.id.in_(ids), models.Booking.status == "active")
+            .values(status="completed", updated_at=now)
+            .returning(models.Booking.parking_space_id)
+            .execution_options(synchronize_session=False)
+        ).scalars().all()
+        updates = release_spots(db, Counter(space_ids))
+        stat_counters.bump(db, {rollups.ACTIVE_BOOKINGS: -len(space_ids), rollups.OCCUPIED_SPOTS: -len(space_ids)})
+        db.commit()
+        released.update((update["id"], update) for update in updates)
+        expired += len(space_ids)
+        if len(ids) < batch_size:
+            break
+    if expired:
+        spaces_changed(released.values())
+    return expired
+
+def space_exists(db: Session, space_id: int) -> bool:
+    return db.query(models.ParkingSpace.id).filter_by(id=space_id).first() is not None
+
+def _booking_window(booking, sign: int = 1):
+    """Fold a committed booking's interval into (or, with ``sign=-1``, out of) cached heatmaps."""
+    if booking.start_time and booking.end_time:
+        heatmap_cache.add_booking(
+            booking.parking_space_id, to_naive_utc(booking.start_time), to_naive_utc(booking.end_time), sign
+        )
+
+def booking_created(booking: models.Booking):
+    """Derived state for a committed booking: its activity event and cached heatmaps."""
+    activity_log.record("booking", "Booking created", driver_id=booking.driver_id,
+                        parking_space_id=booking.parking_space_id, amount=booking.total_cost)
+    _booking_window(booking)
+
+# ------------------ PRICING ------------------
+def _tariff_rows_statement():
+    return select(
+        models.ParkingSpace.id, models.ParkingSpace.price_per_hour, models.ParkingSpace.total_spots,
+        models.Tariff.bands, models.Tariff.daily_cap, models.Tariff.surcharges
+    ).outerjoin(models.Tariff, models.Tariff.parking_space_id == models.ParkingSpace.id)
+
+def tariff_table(db: Session):
+    return pricing_engine.table(lambda: db.execute(_tariff_rows_statement()).all())
+
+def billing_table(db: Session, space_ids):
+    """The tariff table, or one over just ``space_ids`` if the shared one predates any of them.
+
+    Spaces created by another worker, a seed or plain SQL are missing from the shared
+    table until its next rebuild; a booking must never be charged 0 for that.
+    """
+    table = tariff_table(db)
+    if all(space_id in table.index for space_id in space_ids):
+        return table
+    pricing_engine.invalidate()
+    table = TariffTable(db.execute(
+        _tariff_rows_statement().filter(models.ParkingSpace.id.in_(set(space_ids)))
+    ).all())
+    if any(space_id not in table.index for space_id in space_ids):
         raise HTTPException(status_code=404, detail="Parking space not found")
-    if spot.available_spots <= 0:
+    return table
+
+def price_stay(db: Session, space_id: int, start: datetime, hours: float, available: Optional[int]) -> float:
+    """Price of ``hours`` from ``start``; ``available`` is the space's free spots before this booking."""
+    start = to_naive_utc(start)
+    table = billing_table(db, [space_id])
+    return pricing_engine.quote(table, space_id, start, start + timedelta(hours=hours), available)
+
+def _quote_items(data: schemas.QuoteRequest):
+    items = data.items
+    if not items:
+        raise HTTPException(status_code=400, detail="No quote items given")
+    if len(items) > QUOTE_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"At most {QUOTE_MAX_ITEMS} items per quote")
+    results = []
+    for index, item in enumerate(items):
+        start, end = to_naive_utc(item.start_time), to_naive_utc(item.end_time)
+        hours = (end - start).total_seconds() / 3600
+        error = None
+        if hours <= 0:
+            error = "Start time must be before end time"
+        elif hours > QUOTE_MAX_HOURS:
+            error = f"Stays are quoted for at most {QUOTE_MAX_HOURS} hours"
+        results.append({
+            "index": index, "parking_space_id": item.parking_space_id, "start_time": start, "end_time": end,
+            "hours": round(hours, 4), "amount": None, "surcharge_multiplier": 1.0, "error": error
+        })
+    return results
+
+def _availability_statement(space_ids):
+    return select(models.ParkingSpace.id, models.ParkingSpace.available_spots).filter(
+        models.ParkingSpace.id.in_(space_ids)
+    )
+
+def _price_quotes(table, results: List[dict], available: Dict[int, int]) -> List[dict]:
+    valid = [result for result in results if result["error"] is None]
+    amounts, multipliers, known = pricing_engine.quote_many(
+        table,
+        [result["parking_space_id"] for result in valid],
+        [result["start_time"] for result in valid],
+        [result["end_time"] for result in valid],
+        [available.get(result["parking_space_id"]) or 0 for result in valid]
+    )
+    for result, amount, multiplier, found in zip(valid, amounts.tolist(), multipliers.tolist(), known.tolist()):
+        if found:
+            result["amount"] = amount
+            result["surcharge_multiplier"] = multiplier
+        else:
+            result["error"] = "Parking space not found"
+    return results
+
+def quote_prices(db: Session, data: schemas.QuoteRequest) -> List[dict]:
+    """Price N (space, window) candidates for the map view in one vectorised pass.
+
+    Tariffs come from the in-memory table; the only query reads the spaces' current
+    free spots, for occupancy surcharges. Invalid items get an ``error`` instead.
+    """
+    results = _quote_items(data)
+    table = tariff_table(db)
+    space_ids = sorted({result["parking_space_id"] for result in results if result["parking_space_id"] in table.index})
+    available = {}
+    for start in range(0, len(space_ids), ID_CHUNK_SIZE):
+        available.update(db.execute(_availability_statement(space_ids[start:start + ID_CHUNK_SIZE])).all())
+    return _price_quotes(table, results, available)
+
+def create_booking(db: Session, user, data: CreateBookingRequest):
+    reserved = reserve_spot(db, data.parking_space_id)
+    if reserved is None:
+        db.rollback()
+        if not space_exists(db, data.parking_space_id):
+            raise HTTPException(status_code=404, detail="Parking space not found")
         raise HTTPException(status_code=409, detail="Parking space is full")
 
+    now = datetime.utcnow()
+    cost = price_stay(db, data.parking_space_id, data.start_time, data.duration_hours, reserved["available_spots"] + 1)
     booking = models.Booking(
         driver_id=user.id,
         parking_space_id=data.parking_space_id,
         start_time=data.start_time,
         end_time=data.end_time,
         duration_hours=data.duration_hours,
-        payment_method="card"
+        payment_method="card",
+        total_cost=cost,
+        created_at=now,
+        updated_at=now
     )
-
-    spot.available_spots -= 1
     db.add(booking)
+    stat_counters.bump(db, {
+        rollups.ACTIVE_BOOKINGS: 1,
+        rollups.OCCUPIED_SPOTS: 1,
+        rollups.revenue_counter(now.date()): cost
+    })
+    rollups.driver_bookings_changed(db, user.id, [(data.parking_space_id, 1, data.duration_hours, cost)])
 
     try:
         db.commit()
@@ -136,74 +502,498 @@ def create_booking(db: Session, user, data: CreateBookingRequest):
         db.rollback()
         logger.error("Failed to create booking: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail="Could not create booking")
+    spaces_changed([reserved])
 
     db.refresh(booking)
+    booking_created(booking)
     return {"booking": schemas.Booking.from_orm(booking)}
 
+def create_fleet_bookings(db: Session, user, data: FleetBookingRequest):
+    """Book N (vehicle, space, window) items in one transaction.
+
+    Vehicles and spaces are validated with one query each, capacity is taken with a
+    single CASE-based UPDATE and the bookings go in with one bulk INSERT. With
+    ``all_or_nothing`` any failing item aborts the batch (409); otherwise every item
+    gets its own result and only the successful ones are booked.
+    """
+    items = data.items
+    if not items:
+        raise HTTPException(status_code=400, detail="No booking items given")
+    if len(items) > FLEET_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"At most {FLEET_MAX_ITEMS} items per batch")
+
+    results = [
+        {"index": index, "vehicle_id": item.vehicle_id, "parking_space_id": item.parking_space_id,
+         "status": "failed", "booking_id": None, "total_cost": None, "error": None}
+        for index, item in enumerate(items)
+    ]
+    for result, item in zip(results, items):
+        if item.start_time >= item.end_time:
+            result["error"] = "Start time must be before end time"
+        elif item.duration_hours <= 0:
+            result["error"] = "Duration must be greater than 0"
+
+    owned = {row.vehicle_id for row in db.query(models.vehicle_owner.c.vehicle_id).filter(
+        models.vehicle_owner.c.driver_id == user.id,
+        models.vehicle_owner.c.vehicle_id.in_({item.vehicle_id for item in items})
+    )}
+    # Lock the spaces for the rest of the transaction where the database supports it
+    spaces = {row.id: row for row in db.query(
+        models.ParkingSpace.id, models.ParkingSpace.available_spots
+    ).filter(models.ParkingSpace.id.in_({item.parking_space_id for item in items})).with_for_update()}
+    available = {space_id: row.available_spots or 0 for space_id, row in spaces.items()}
+
+    wanted: Dict[int, List[int]] = {}
+    for result, item in zip(results, items):
+        if result["error"]:
+            continue
+        if item.vehicle_id not in owned:
+            result["error"] = "Vehicle not registered to this driver"
+        elif item.parking_space_id not in available:
+            result["error"] = "Parking space not found"
+        else:
+            wanted.setdefault(item.parking_space_id, []).append(result["index"])
+
+    # First come, first served within the batch for spaces that can't take every item
+    grants = {}
+    for space_id, indexes in wanted.items():
+        granted = min(len(indexes), available[space_id])
+        for index in indexes[granted:]:
+            results[index]["error"] = "Parking space is full"
+        if granted:
+            grants[space_id] = granted
+
+    def abort(detail):
+        db.rollback()
+        raise HTTPException(status_code=409, detail={"message": detail, "items": results})
+
+    if data.all_or_nothing and any(result["error"] for result in results):
+        abort("Batch rejected; no bookings were made")
+
+    updates = []
+    if grants:
+        taken = case(grants, value=models.ParkingSpace.id, else_=0)
+        rows = db.execute(
+            update(models.ParkingSpace)
+            .where(models.ParkingSpace.id.in_(list(grants)), models.ParkingSpace.available_spots >= taken)
+            .values(available_spots=models.ParkingSpace.available_spots - taken, updated_at=datetime.utcnow())
+            .returning(
+                models.ParkingSpace.id,
+                models.ParkingSpace.available_spots,
+                models.ParkingSpace.latitude,
+                models.ParkingSpace.longitude
+            )
+            .execution_options(synchronize_session=False)
+        ).all()
+        updates = [_availability_update(row) for row in rows]
+        # Without row locks (SQLite) a concurrent booking can still win the race; the
+        # guarded UPDATE skips that space rather than overselling it
+        lost = set(grants) - {row.id for row in rows}
+        for result in results:
+            if result["parking_space_id"] in lost and not result["error"]:
+                result["error"] = "Parking space is full"
+        if lost and data.all_or_nothing:
+            abort("Batch rejected; no bookings were made")
+
+    booked = [result for result in results if not result["error"]]
+    if booked:
+        now = datetime.utcnow()
+        # Every item priced in one pass, at the occupancy before this batch
+        booked_items = [items[result["index"]] for result in booked]
+        costs, _, _ = pricing_engine.quote_many(
+            billing_table(db, [item.parking_space_id for item in booked_items]),
+            [item.parking_space_id for item in booked_items],
+            [to_naive_utc(item.start_time) for item in booked_items],
+            [to_naive_utc(item.start_time) + timedelta(hours=item.duration_hours) for item in booked_items],
+            [available[item.parking_space_id] for item in booked_items]
+        )
+        for result, cost in zip(booked, costs.tolist()):
+            result["total_cost"] = cost
+        booking_ids = db.scalars(
+            insert(models.Booking).returning(models.Booking.id, sort_by_parameter_order=True),
+            [
+                {
+                    "driver_id": user.id,
+                    "parking_space_id": items[result["index"]].parking_space_id,
+                    "start_time": items[result["index"]].start_time,
+                    "end_time": items[result["index"]].end_time,
+                    "duration_hours": items[result["index"]].duration_hours,
+                    "status": "active",
+                    "payment_method": "card",
+                    "total_cost": result["total_cost"],
+                    "created_at": now,
+                    "updated_at": now
+                }
+                for result in booked
+            ]
+        ).all()
+        for result, booking_id in zip(booked, booking_ids):
+            result["status"] = "booked"
+            result["booking_id"] = booking_id
+        stat_counters.bump(db, {
+            rollups.ACTIVE_BOOKINGS: len(booked),
+            rollups.OCCUPIED_SPOTS: len(booked),
+            rollups.revenue_counter(now.date()): sum(result["total_cost"] for result in booked)
+        })
+        rollups.driver_bookings_changed(db, user.id, [
+            (items[result["index"]].parking_space_id, 1, items[result["index"]].duration_hours, result["total_cost"])
+            for result in booked
+        ])
+
+    try:
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        logger.error("Failed to create fleet bookings: %s", e, exc_info=True)
+        raise HTTPException(status_code=500, detail="Could not create bookings")
+    spaces_changed(updates)
+    for result in booked:
+        item = items[result["index"]]
+        activity_log.record("booking", "Fleet booking created", driver_id=user.id,
+                            parking_space_id=item.parking_space_id, amount=result["total_cost"])
+        _booking_window(item)
+
+    return {
+        "booked": len(booked),
+        "failed": len(results) - len(booked),
+        "items": results
+    }
+
 def update_booking(db: Session, user, booking_id, data: UpdateBookingRequest):
     booking = db.query(models.Booking).filter_by(id=booking_id, driver_id=user.id).first()
     if not booking:
         raise HTTPException(status_code=404, detail="Booking not found")
+    previous = SimpleNamespace(
+        parking_space_id=booking.parking_space_id, start_time=booking.start_time, end_time=booking.end_time
+    )
     if data.start_time:
         booking.start_time = data.start_time
     if data.end_time:
         booking.end_time = data.end_time
     db.commit()
     db.refresh(booking)
+    if booking.status not in rollups.UNBILLED_STATUSES:
+        _booking_window(previous, -1)
+        _booking_window(booking)
     return {"booking": booking}
 
 def delete_booking(db: Session, user, booking_id):
     booking = db.query(models.Booking).filter_by(id=booking_id, driver_id=user.id).first()
     if not booking:
         raise HTTPException(status_code=404, detail="Booking not found")
+    released = []
+    if booking.status not in RELEASED_STATUSES:
+        released = release_spots(db, {booking.parking_space_id: 1})
+    deltas = {
+        rollups.ACTIVE_BOOKINGS: -1 if booking.status == "active" else 0,
+        rollups.OCCUPIED_SPOTS: -1 if booking.status not in RELEASED_STATUSES else 0
+    }
+    if booking.created_at and booking.status not in rollups.UNBILLED_STATUSES:
+        deltas[rollups.revenue_counter(booking.created_at.date())] = -(booking.total_cost or 0)
+    stat_counters.bump(db, deltas)
+    if booking.status not in rollups.UNBILLED_STATUSES:
+        rollups.driver_bookings_changed(db, booking.driver_id, [
+            (booking.parking_space_id, -1, -(booking.duration_hours or 0), -(booking.total_cost or 0))
+        ])
+    space_id = booking.parking_space_id
+    removed = SimpleNamespace(parking_space_id=space_id, start_time=booking.start_time, end_time=booking.end_time)
+    billed = booking.status not in rollups.UNBILLED_STATUSES
     db.delete(booking)
     db.commit()
+    spaces_changed(released)
+    if billed:
+        _booking_window(removed, -1)
+    activity_log.record("booking", "Booking cancelled", driver_id=user.id, parking_space_id=space_id)
     return {"message": "Booking cancelled"}
 
 def extend_booking(db: Session, user, booking_id, data: ExtendBookingRequest):
     booking = db.query(models.Booking).filter_by(id=booking_id, driver_id=user.id).first()
     if not booking:
         raise HTTPException(status_code=404, detail="Booking not found")
+    # The stay priced with and without the extra hours, so daily caps span the whole stay
+    space = db.get(models.ParkingSpace, booking.parking_space_id)
+    start = to_naive_utc(booking.start_time)
+    hours = booking.duration_hours or 0
+    available = space.available_spots if space else None
+    if available is not None and booking.status == "active":
+        # Occupancy without this booking's own spot, as when it was created
+        available += 1
+    before, after = pricing_engine.quote_many(
+        billing_table(db, [booking.parking_space_id]), [booking.parking_space_id] * 2, [start] * 2,
+        [start + timedelta(hours=hours), start + timedelta(hours=hours + data.additional_hours)],
+        [available] * 2 if available is not None else None
+    )[0].tolist()
+    additional_cost = round(max(after - before, 0.0), 2)
     booking.duration_hours += data.additional_hours
+    booking.total_cost = (booking.total_cost or 0) + additional_cost
+    if booking.created_at and booking.status not in rollups.UNBILLED_STATUSES:
+        stat_counters.bump(db, {rollups.revenue_counter(booking.created_at.date()): additional_cost})
+    if booking.status not in rollups.UNBILLED_STATUSES:
+        rollups.driver_bookings_changed(db, booking.driver_id, [
+            (booking.parking_space_id, 0, data.additional_hours, additional_cost)
+        ])
     db.commit()
     db.refresh(booking)
-    return {"booking": booking, "additional_cost": data.additional_hours * 20}
+    activity_log.record("booking", "Booking extended", driver_id=user.id,
+                        parking_space_id=booking.parking_space_id, amount=additional_cost)
+    return {"booking": booking, "additional_cost": additional_cost}
 
 # ------------------ PARKING ------------------
-def get_parking_spots(db: Session, lat: Optional[float], lng: Optional[float], radius: float, search: str, filter: str):
+def spot_to_dict(space: models.ParkingSpace, distance_m: Optional[float] = None) -> dict:
+    data = {column.name: getattr(space, column.name) for column in models.ParkingSpace.__table__.columns}
+    data["distance"] = format_distance(distance_m) if distance_m is not None else None
+    data["walk_time"] = format_walk_time(distance_m) if distance_m is not None else None
+    return data
+
+def _space_coordinates_statement():
+    return select(models.ParkingSpace.id, models.ParkingSpace.latitude, models.ParkingSpace.longitude)
+
+def _space_text_statement():
+    return select(models.ParkingSpace.id, models.ParkingSpace.name, models.ParkingSpace.address)
+
+def _load_spaces(db: Session, statement, space_ids):
+    spaces = []
+    for start in range(0, len(space_ids), ID_CHUNK_SIZE):
+        chunk = space_ids[start:start + ID_CHUNK_SIZE]
+        spaces.extend(db.scalars(statement.filter(models.ParkingSpace.id.in_(chunk))).all())
+    return spaces
+
+_trigram_available = {}
+
+_TRIGRAM_CHECK = text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+
+def _has_trigram_search(db: Session) -> bool:
+    """True when the pg_trgm indexes from the search index migration can serve ILIKE."""
+    bind = db.get_bind()
+    if bind.dialect.name != "postgresql":
+        return False
+    if bind.url not in _trigram_available:
+        _trigram_available[bind.url] = db.execute(_TRIGRAM_CHECK).first() is not None
+    return _trigram_available[bind.url]
+
+def spaces_changed(updates: Iterable[dict] = ()):
+    """Call after committing a write to ParkingSpace rows.
+
+    Invalidates cached listings and pushes the new availability (dicts from
+    ``reserve_spot``/``release_spots``) to WebSocket subscribers.
+    """
+    parking_cache.invalidate()
+    availability_hub.publish(updates)
+
+def _locations_changed(location: models.ParkingSpace):
+    """Drop derived location structures after a ParkingSpace is created or edited."""
+    spatial_index.invalidate()
+    search_index.invalidate()
+    pricing_engine.invalidate()
+    spaces_changed([_availability_update(location)])
+
+def _read_source(db) -> str:
+    # Replica reads may lag the writer; keep them apart so a read-your-writes request
+    # routed to the writer never gets a replica's older result from the cache
+    return "replica" if db.info.get("replica") else "primary"
+
+def _spot_listing_params(lat, lng, radius, search, limit):
+    # Normalise before keying so equivalent requests share an entry (5 dp is ~1 m)
+    if lat is not None and lng is not None:
+        lat, lng = round(lat, 5), round(lng, 5)
+    else:
+        lat = lng = None
+    return lat, lng, round(radius), (search or "").strip().lower(), clamp_limit(limit)
+
+def get_parking_spots(db: Session, lat: Optional[float], lng: Optional[float], radius: float, search: str, filter: str,
+                      limit: Optional[int] = None, cursor: Optional[str] = None,
+                      arrival_at: Optional[datetime] = None):
+    """Page through parking spaces; returns ``(spots, next_cursor)``.
+
+    With lat/lng, only spaces within ``radius`` metres are returned, nearest first.
+    Otherwise a ``search`` orders results by relevance, name prefix matches first,
+    and a plain listing is ordered by ``(created_at, id)``. With ``arrival_at`` each
+    spot carries a forecast of its free spots at that time.
+    """
+    arrival_at = _arrival_time(arrival_at)
+    lat, lng, radius, search, limit = _spot_listing_params(lat, lng, radius, search, limit)
+    key = ("spots", _read_source(db), lat, lng, radius, search, filter, limit, cursor)
+    spots, next_cursor = parking_cache.get_or_load(
+        key, lambda: _query_parking_spots(db, lat, lng, radius, search, filter, limit, cursor)
+    )
+    return [with_forecast(spot, arrival_at) for spot in spots], next_cursor
+
+def _spots_statement(filter: str):
+    statement = select(models.ParkingSpace)
+    if filter == "available":
+        statement = statement.filter(models.ParkingSpace.available_spots > 0)
+    elif filter == "full":
+        statement = statement.filter(models.ParkingSpace.available_spots == 0)
+    return statement
+
+def _restrict_to_ranked(nearby, ranked):
+    if ranked is None:
+        return nearby
+    matching = {space_id for space_id, _ in ranked}
+    return [item for item in nearby if item[0] in matching]
+
+def _ranked_chunks(kind: str, ranked, cursor: Optional[str], limit: int):
+    """Yield ``(id, sort_key)`` chunks of candidates ordered by ``(sort_key, id)`` after ``cursor``.
+
+    Rows are fetched chunk by chunk because the status filter is applied in SQL and
+    may drop candidates; callers stop once the page is full.
+    """
+    start = 0
+    after = decode_cursor(cursor, kind)
+    if after is not None:
+        start = bisect.bisect_right([(sort_key, space_id) for space_id, sort_key in ranked], tuple(after))
+    chunk_size = min(ID_CHUNK_SIZE, max(limit * 2, 50))
+    for offset in range(start, len(ranked), chunk_size):
+        yield ranked[offset:offset + chunk_size]
+
+def _extend_page(page, chunk, spaces):
+    found = {space.id: space for space in spaces}
+    page.extend((found[space_id], sort_key) for space_id, sort_key in chunk if space_id in found)
+
+def _finish_ranked_page(kind: str, page, limit: int):
+    if len(page) <= limit:
+        return page, None
+    page = page[:limit]
+    last_space, last_key = page[-1]
+    return page, encode_cursor(kind, [last_key, last_space.id])
+
+def _page_ranked(db: Session, statement, kind: str, ranked, cursor: Optional[str], limit: int):
+    page = []
+    for chunk in _ranked_chunks(kind, ranked, cursor, limit):
+        _extend_page(page, chunk, _load_spaces(db, statement, [space_id for space_id, _ in chunk]))
+        if len(page) > limit:
+            break
+    return _finish_ranked_page(kind, page, limit)
+
+def _query_parking_spots(db: Session, lat: Optional[float], lng: Optional[float], radius: float, search: str, filter: str,
+                         limit: int, cursor: Optional[str]):
     try:
-        query = db.query(models.ParkingSpace)
+        statement = _spots_statement(filter)
+
+        # Apply search filter: trigram GIN indexes on Postgres, in-memory token index elsewhere
+        ranked = None
+        if search:
+            if _has_trigram_search(db):
+                if SEARCH_STATEMENT_TIMEOUT_MS:
+                    set_statement_timeout(db, SEARCH_STATEMENT_TIMEOUT_MS)
+                ranked = _trigram_ranking(db.execute(_trigram_statement(search)))
+            else:
+                ranked = search_index.search(lambda: db.execute(_space_text_statement()).all(), search)
+            if not ranked:
+                return [], None
         
-        # Apply location filter if coordinates are provided
         if lat is not None and lng is not None:
-            query = query.filter(
-                models.ParkingSpace.latitude.between(lat - radius, lat + radius),
-                models.ParkingSpace.longitude.between(lng - radius, lng + radius)
-            )
-        
-        # Apply search filter
-        if search:
-            query = query.filter(
-                or_(
-                    models.ParkingSpace.name.ilike(f"%{search}%"),
-                    models.ParkingSpace.address.ilike(f"%{search}%")
-                )
+            # Candidates come from the grid index already haversine-filtered and sorted
+            nearby = spatial_index.nearby(lambda: db.execute(_space_coordinates_statement()).all(), lat, lng, radius)
+            page, next_cursor = _page_ranked(db, statement, "distance", _restrict_to_ranked(nearby, ranked), cursor, limit)
+            return [spot_to_dict(space, distance) for space, distance in page], next_cursor
+
+        if ranked is not None:
+            page, next_cursor = _page_ranked(
+                db, statement, "relevance", [(space_id, -score) for space_id, score in ranked], cursor, limit
             )
+            return [spot_to_dict(space) for space, _ in page], next_cursor
+
+        spaces, next_cursor = paginate(db, statement, "created", SPACE_KEYSET, cursor, limit)
+        return [spot_to_dict(space) for space in spaces], next_cursor
         
-        # Apply status filter
-        if filter == "available":
-            query = query.filter(models.ParkingSpace.available_spots > 0)
-        elif filter == "full":
-            query = query.filter(models.ParkingSpace.available_spots == 0)
-        
-        return query.all()
-        
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error in get_parking_spots: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to fetch parking spots")
 
-def get_parking_spot(db: Session, spot_id):
-    return db.query(models.ParkingSpace).filter_by(id=spot_id).first()
+def _trigram_statement(search: str):
+    """``(id, score)`` matches served by the pg_trgm indexes, best first.
+
+    Name prefix matches get a bonus so type-ahead surfaces them before substring hits.
+    """
+    score = (
+        case((models.ParkingSpace.name.ilike(f"{search}%"), 1.0), else_=0.0)
+        + func.greatest(
+            func.similarity(models.ParkingSpace.name, search),
+            func.similarity(models.ParkingSpace.address, search)
+        )
+    ).label("score")
+    return select(models.ParkingSpace.id, score).filter(
+        or_(
+            models.ParkingSpace.name.ilike(f"%{search}%"),
+            models.ParkingSpace.address.ilike(f"%{search}%")
+        )
+    ).order_by(score.desc(), models.ParkingSpace.id)
+
+def _trigram_ranking(result):
+    return [(row.id, float(row.score)) for row in result]
+
+def get_parking_spot(db: Session, spot_id, arrival_at: Optional[datetime] = None):
+    arrival_at = _arrival_time(arrival_at)
+    def load():
+        space = db.get(models.ParkingSpace, spot_id)
+        return spot_to_dict(space) if space else None
+    return with_forecast(parking_cache.get_or_load(("spot", _read_source(db), spot_id), load), arrival_at)
+
+def _arrival_time(arrival_at: Optional[datetime]) -> Optional[datetime]:
+    if arrival_at is None:
+        return None
+    arrival_at = to_naive_utc(arrival_at)
+    if arrival_at > datetime.utcnow() + timedelta(hours=FORECAST_MAX_HOURS):
+        raise HTTPException(status_code=400, detail=f"arrival_at must be within {FORECAST_MAX_HOURS} hours")
+    return arrival_at
+
+def with_forecast(spot: Optional[dict], arrival_at: Optional[datetime]) -> Optional[dict]:
+    """The spot plus its forecast free spots at ``arrival_at``, served from memory.
+
+    Cached spot dicts are shared, so this returns a copy rather than adding the key.
+    """
+    if spot is None or arrival_at is None:
+        return spot
+    return {
+        **spot,
+        "forecast": occupancy_forecasts.predict(spot["id"], spot["total_spots"], spot["available_spots"], arrival_at)
+    }
+
+def _availability_window(start: Optional[datetime], hours: int, slot_minutes: int):
+    if not 5 <= slot_minutes <= 1440:
+        raise HTTPException(status_code=400, detail="slot_minutes must be between 5 and 1440")
+    if not 1 <= hours <= 168:
+        raise HTTPException(status_code=400, detail="hours must be between 1 and 168")
+    window_start = floor_to_slot(to_naive_utc(start) if start else datetime.utcnow(), slot_minutes)
+    slot_count = math.ceil(hours * 60 / slot_minutes)
+    return window_start, window_start + timedelta(minutes=slot_minutes * slot_count), slot_count
+
+def _booking_intervals_statement(spot_id, window_start: datetime, window_end: datetime):
+    return select(models.Booking.start_time, models.Booking.end_time).filter(
+        models.Booking.parking_space_id == spot_id,
+        models.Booking.start_time < window_end,
+        models.Booking.end_time > window_start,
+        models.Booking.status.notin_(RELEASED_STATUSES)
+    )
+
+def _availability_result(spot: dict, window_start: datetime, window_end: datetime, slot_count: int,
+                         slot_minutes: int, intervals) -> dict:
+    occupancy = slot_occupancy(intervals, window_start, slot_minutes, slot_count)
+    slots = build_slots(window_start, slot_minutes, occupancy, spot["total_spots"])
+    return {
+        **spot,
+        "window_start": window_start,
+        "window_end": window_end,
+        "slot_minutes": slot_minutes,
+        "min_free": min(slot["free"] for slot in slots),
+        "slots": slots
+    }
+
+def get_spot_availability(db: Session, spot_id, start: Optional[datetime], hours: int, slot_minutes: int):
+    """Free capacity per time slot for one space over ``hours`` from ``start``.
+
+    One range query on (parking_space_id, start_time, end_time) fetches every booking
+    overlapping the window; the slot grid is then filled in memory.
+    """
+    window_start, window_end, slot_count = _availability_window(start, hours, slot_minutes)
+    spot = get_parking_spot(db, spot_id)
+    if not spot:
+        raise HTTPException(status_code=404, detail="Parking space not found")
+    intervals = db.execute(_booking_intervals_statement(spot_id, window_start, window_end)).all()
+    return _availability_result(spot, window_start, window_end, slot_count, slot_minutes, intervals)
 
 def book_parking_spot(db: Session, user, spot_id, data: BookSpotRequest):
     return create_booking(db, user, schemas.CreateBookingRequest(
@@ -213,32 +1003,229 @@ def book_parking_spot(db: Session, user, spot_id, data: BookSpotRequest):
         duration_hours=data.duration_hours
     ))
 
+# ------------------ ASYNC READ PATHS ------------------
+# AsyncSession versions of the hottest reads, for async routes. They share statements,
+# caches and indexes with the sync functions above; only the I/O is awaited.
+async def _has_trigram_search_async(db: AsyncSession) -> bool:
+    bind = db.get_bind()
+    if bind.dialect.name != "postgresql":
+        return False
+    if bind.url not in _trigram_available:
+        _trigram_available[bind.url] = (await db.execute(_TRIGRAM_CHECK)).first() is not None
+    return _trigram_available[bind.url]
+
+async def _load_spaces_async(db: AsyncSession, statement, space_ids):
+    spaces = []
+    for start in range(0, len(space_ids), ID_CHUNK_SIZE):
+        chunk = space_ids[start:start + ID_CHUNK_SIZE]
+        spaces.extend((await db.scalars(statement.filter(models.ParkingSpace.id.in_(chunk)))).all())
+    return spaces
+
+async def _page_ranked_async(db: AsyncSession, statement, kind: str, ranked, cursor: Optional[str], limit: int):
+    page = []
+    for chunk in _ranked_chunks(kind, ranked, cursor, limit):
+        _extend_page(page, chunk, await _load_spaces_async(db, statement, [space_id for space_id, _ in chunk]))
+        if len(page) > limit:
+            break
+    return _finish_ranked_page(kind, page, limit)
+
+async def get_parking_spots_async(db: AsyncSession, lat: Optional[float], lng: Optional[float], radius: float,
+                                  search: str, filter: str, limit: Optional[int] = None, cursor: Optional[str] = None,
+                                  arrival_at: Optional[datetime] = None):
+    """``get_parking_spots`` for an AsyncSession."""
+    arrival_at = _arrival_time(arrival_at)
+    lat, lng, radius, search, limit = _spot_listing_params(lat, lng, radius, search, limit)
+    key = ("spots", _read_source(db), lat, lng, radius, search, filter, limit, cursor)
+    spots, next_cursor = await parking_cache.aget_or_load(
+        key, lambda: _query_parking_spots_async(db, lat, lng, radius, search, filter, limit, cursor)
+    )
+    return [with_forecast(spot, arrival_at) for spot in spots], next_cursor
+
+async def _query_parking_spots_async(db: AsyncSession, lat: Optional[float], lng: Optional[float], radius: float,
+                                     search: str, filter: str, limit: int, cursor: Optional[str]):
+    async def load_rows(statement):
+        return (await db.execute(statement)).all()
+
+    try:
+        statement = _spots_statement(filter)
+
+        ranked = None
+        if search:
+            if await _has_trigram_search_async(db):
+                if SEARCH_STATEMENT_TIMEOUT_MS:
+                    await set_statement_timeout_async(db, SEARCH_STATEMENT_TIMEOUT_MS)
+                ranked = _trigram_ranking(await db.execute(_trigram_statement(search)))
+            else:
+                ranked = await search_index.asearch(lambda: load_rows(_space_text_statement()), search)
+            if not ranked:
+                return [], None
+
+        if lat is not None and lng is not None:
+            nearby = await spatial_index.anearby(lambda: load_rows(_space_coordinates_statement()), lat, lng, radius)
+            page, next_cursor = await _page_ranked_async(
+                db, statement, "distance", _restrict_to_ranked(nearby, ranked), cursor, limit
+            )
+            return [spot_to_dict(space, distance) for space, distance in page], next_cursor
+
+        if ranked is not None:
+            page, next_cursor = await _page_ranked_async(
+                db, statement, "relevance", [(space_id, -score) for space_id, score in ranked], cursor, limit
+            )
+            return [spot_to_dict(space) for space, _ in page], next_cursor
+
+        spaces, next_cursor = await paginate_async(db, statement, "created", SPACE_KEYSET, cursor, limit)
+        return [spot_to_dict(space) for space in spaces], next_cursor
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error in get_parking_spots_async: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to fetch parking spots")
+
+async def get_parking_spot_async(db: AsyncSession, spot_id, arrival_at: Optional[datetime] = None):
+    arrival_at = _arrival_time(arrival_at)
+    async def load():
+        space = await db.get(models.ParkingSpace, spot_id)
+        return spot_to_dict(space) if space else None
+    return with_forecast(await parking_cache.aget_or_load(("spot", _read_source(db), spot_id), load), arrival_at)
+
+async def get_spot_availability_async(db: AsyncSession, spot_id, start: Optional[datetime], hours: int,
+                                      slot_minutes: int):
+    """``get_spot_availability`` for an AsyncSession."""
+    window_start, window_end, slot_count = _availability_window(start, hours, slot_minutes)
+    spot = await get_parking_spot_async(db, spot_id)
+    if not spot:
+        raise HTTPException(status_code=404, detail="Parking space not found")
+    intervals = (await db.execute(_booking_intervals_statement(spot_id, window_start, window_end))).all()
+    return _availability_result(spot, window_start, window_end, slot_count, slot_minutes, intervals)
+
+async def get_recent_bookings_async(db: AsyncSession, user):
+    return (await db.scalars(_recent_bookings_statement(user))).all()
+
+async def get_user_bookings_async(db: AsyncSession, user, status, search, limit: Optional[int] = None,
+                                  cursor: Optional[str] = None):
+    return await paginate_async(
+        db, _user_bookings_statement(user, status, search), "bookings", BOOKING_KEYSET, cursor, limit,
+        descending=True
+    )
+
+async def quote_prices_async(db: AsyncSession, data: schemas.QuoteRequest) -> List[dict]:
+    """``quote_prices`` for an AsyncSession."""
+    results = _quote_items(data)
+    table = await pricing_engine.atable(lambda: _load_rows_async(db, _tariff_rows_statement()))
+    space_ids = sorted({result["parking_space_id"] for result in results if result["parking_space_id"] in table.index})
+    available = {}
+    for start in range(0, len(space_ids), ID_CHUNK_SIZE):
+        available.update((await db.execute(_availability_statement(space_ids[start:start + ID_CHUNK_SIZE]))).all())
+    return _price_quotes(table, results, available)
+
+async def _load_rows_async(db: AsyncSession, statement):
+    return (await db.execute(statement)).all()
+
+async def list_parking_locations_async(db: AsyncSession, limit: Optional[int] = None, cursor: Optional[str] = None):
+    return await paginate_async(db, select(models.ParkingSpace), "locations", SPACE_KEYSET, cursor, limit)
+
 # ------------------ ADMIN ------------------
 def get_admin_stats(db: Session):
+    """Dashboard totals from the ``stat_counters`` rollup: one primary-key lookup, no table scans."""
+    return rollups.admin_stats(db)
+
+def get_occupancy_heatmap(db: Session, space_id: Optional[int], weeks: int, utc_offset: Optional[int] = None):
+    """Average occupancy by day of week and hour over the last ``weeks`` weeks.
+
+    For one space, or across all spaces when ``space_id`` is None. Days and hours are
+    local to ``utc_offset`` (hours east of UTC).
+    """
+    if not 1 <= weeks <= 52:
+        raise HTTPException(status_code=400, detail="weeks must be between 1 and 52")
+    utc_offset = HEATMAP_UTC_OFFSET if utc_offset is None else utc_offset
+    if not -12 <= utc_offset <= 14:
+        raise HTTPException(status_code=400, detail="utc_offset must be between -12 and 14")
+    if space_id is not None:
+        space = db.get(models.ParkingSpace, space_id)
+        if space is None:
+            raise HTTPException(status_code=404, detail="Parking space not found")
+        name, capacity = space.name, space.total_spots
+    else:
+        name, capacity = None, rollups.admin_stats(db)["total_capacity"]
+    window_start, window_end, booked = heatmap_cache.get(db, space_id, weeks, utc_offset)
     return {
-        "total_users": db.query(models.Driver).count(),
-        "active_bookings": db.query(models.Booking).filter_by(status='active').count(),
-        "revenue_today": 5000.00,  # Placeholder
-        "total_parking_spots": db.query(models.ParkingSpace).count()
+        "space_id": space_id,
+        "name": name,
+        "total_spots": capacity,
+        "weeks": weeks,
+        "utc_offset": utc_offset,
+        "window_start": window_start,
+        "window_end": window_end,
+        **heatmap_response(booked, weeks, capacity)
     }
 
-def get_admin_activities(db: Session):
-    return []  # Placeholder
+def get_admin_activities(db: Session, limit: Optional[int] = None, cursor: Optional[str] = None):
+    """Newest-first activity feed; returns ``(activities, next_cursor)``."""
+    return activity_log.recent(db, limit, cursor)
+
+def list_parking_locations(db: Session, limit: Optional[int] = None, cursor: Optional[str] = None):
+    """Page of parking locations ordered by ``(created_at, id)``; returns ``(locations, next_cursor)``."""
+    return paginate(db, select(models.ParkingSpace), "locations", SPACE_KEYSET, cursor, limit)
 
-def list_parking_locations(db: Session):
-    return db.query(models.ParkingSpace).all()
+def _set_tariff(db: Session, location: models.ParkingSpace, tariff: Optional[dict]):
+    """Validate and store a space's tariff in the caller's transaction; empty removes it."""
+    if tariff is None:
+        return
+    try:
+        validate_tariff(location.price_per_hour, tariff)
+    except TariffError as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+    current = db.get(models.Tariff, location.id)
+    if not (tariff["bands"] or tariff["surcharges"] or tariff["daily_cap"] is not None):
+        if current is not None:
+            db.delete(current)
+        return
+    if current is None:
+        current = models.Tariff(parking_space_id=location.id)
+        db.add(current)
+    current.bands = tariff["bands"]
+    current.daily_cap = tariff["daily_cap"]
+    current.surcharges = tariff["surcharges"]
+    current.updated_at = datetime.utcnow()
 
 def create_location(db: Session, data: LocationRequest):
-    location = models.ParkingSpace(**data.dict(exclude_unset=True))
+    values = data.dict(exclude_unset=True)
+    tariff = values.pop("tariff", None)
+    location = models.ParkingSpace(**values)
+    # A new space starts empty
+    location.available_spots = location.total_spots
     db.add(location)
+    if tariff is not None:
+        db.flush()
+        _set_tariff(db, location, tariff)
+    stat_counters.bump(db, {
+        rollups.TOTAL_PARKING_SPOTS: 1,
+        **rollups.space_counters(location.total_spots, location.available_spots)
+    })
     db.commit()
     db.refresh(location)
+    _locations_changed(location)
+    activity_log.record("spot", "Parking spot added", parking_space_id=location.id, location=location.name)
     return location
 
 def update_location(db: Session, location_id, data: LocationRequest):
     location = db.query(models.ParkingSpace).filter_by(id=location_id).first()
-    for key, value in data.dict(exclude_unset=True).items():
+    if not location:
+        raise HTTPException(status_code=404, detail="Parking space not found")
+    before = rollups.space_counters(location.total_spots, location.available_spots)
+    values = data.dict(exclude_unset=True)
+    tariff = values.pop("tariff", None)
+    for key, value in values.items():
         setattr(location, key, value)
+    # Write the space row before anything else, the same lock order as the booking paths
+    db.flush()
+    _set_tariff(db, location, tariff)
+    after = rollups.space_counters(location.total_spots, location.available_spots)
+    stat_counters.bump(db, {name: after[name] - before[name] for name in after})
     db.commit()
     db.refresh(location)
+    _locations_changed(location)
+    activity_log.record("spot", "Parking spot updated", parking_space_id=location.id, location=location.name)
     return location
@@ -1,8 +1,12 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-import os
 from dotenv import load_dotenv
+from fastapi import Request
+import os
+from backend.metrics import PoolMetrics
 import logging
 
 # Configure logging
@@ -15,27 +19,115 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Load environment variables from .env file
-load_dotenv()
-
-# Load environment variables from .env file
-load_dotenv()
+# Values already in the environment (deploy config, scratch tooling) win over .env
+load_dotenv(override=False)
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 
 if DATABASE_URL is None:
     raise ValueError("DATABASE_URL is not set in environment variables.")
 
-logger.info(f"Database URL: {DATABASE_URL}")
-engine = create_engine(DATABASE_URL)
+# Pool tuning. Keep (size + overflow) x workers x instances within the database's
+# connection limit; on small hosted Postgres plans that budget is tight.
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+POOL_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+# Server-side cap on any single statement, in milliseconds (Postgres only; 0 disables)
+STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "0"))
+
+def engine_options(url, asynchronous: bool = False) -> dict:
+    """Keyword arguments for create_engine/create_async_engine for ``url``."""
+    url = make_url(url)
+    if url.get_backend_name() == "sqlite":
+        # SQLite uses its own pool classes, which take none of the queue pool settings
+        return {}
+    options = {
+        "pool_size": POOL_SIZE,
+        "max_overflow": POOL_MAX_OVERFLOW,
+        "pool_timeout": POOL_TIMEOUT,
+        "pool_recycle": POOL_RECYCLE,
+        "pool_pre_ping": POOL_PRE_PING
+    }
+    if STATEMENT_TIMEOUT_MS and url.get_backend_name() == "postgresql":
+        if asynchronous:
+            options["connect_args"] = {"server_settings": {"statement_timeout": str(STATEMENT_TIMEOUT_MS)}}
+        else:
+            options["connect_args"] = {"options": f"-c statement_timeout={STATEMENT_TIMEOUT_MS}"}
+    return options
+
+def _statement_timeout_sql(db, milliseconds: int):
+    if db.get_bind().dialect.name != "postgresql":
+        return None
+    # SET LOCAL lasts until the current transaction ends
+    return text(f"SET LOCAL statement_timeout = {int(milliseconds)}")
+
+def set_statement_timeout(db, milliseconds: int):
+    """Cap statements for the rest of ``db``'s current transaction; no-op off Postgres."""
+    statement = _statement_timeout_sql(db, milliseconds)
+    if statement is not None:
+        db.execute(statement)
+
+async def set_statement_timeout_async(db, milliseconds: int):
+    statement = _statement_timeout_sql(db, milliseconds)
+    if statement is not None:
+        await db.execute(statement)
 
-# Test database connection
-try:
-    with engine.connect() as connection:
-        logger.info("Successfully connected to database")
-except Exception as e:
-    logger.error(f"Failed to connect to database: {str(e)}")
-    logger.warning("Continuing with application startup despite database connection failure")
+logger.info(f"Database URL: {make_url(DATABASE_URL).render_as_string(hide_password=True)}")
+# Engines connect lazily: nothing touches the database until the first session needs it
+engine = create_engine(DATABASE_URL, **engine_options(DATABASE_URL))
+pool_metrics = PoolMetrics("sync").instrument(engine.pool)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def check_connection() -> bool:
+    """Open and return one connection; logs instead of raising so startup never depends on it."""
+    try:
+        with engine.connect():
+            logger.info("Successfully connected to database")
+        return True
+    except Exception as e:
+        logger.error(f"Failed to connect to database: {str(e)}")
+        return False
+
+# Async driver for each sync URL scheme we deploy with
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+def async_database_url(url: str):
+    """Translate a sync DATABASE_URL to its asyncpg/aiosqlite equivalent."""
+    parsed = make_url(url)
+    driver = ASYNC_DRIVERS.get(parsed.drivername, parsed.drivername)
+    parsed = parsed.set(drivername=driver)
+    if driver == "postgresql+asyncpg" and "sslmode" in parsed.query:
+        # asyncpg spells libpq's sslmode as ssl
+        sslmode = parsed.query["sslmode"]
+        parsed = parsed.difference_update_query(["sslmode"]).update_query_dict({"ssl": sslmode})
+    return parsed
+
+# Async engine for the hot read paths.
+# Note an in-memory SQLite URL gives the async engine its own, separate database.
+async_engine = create_async_engine(async_database_url(DATABASE_URL), **engine_options(DATABASE_URL, asynchronous=True))
+async_pool_metrics = PoolMetrics("async").instrument(async_engine.sync_engine.pool)
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
 Base = declarative_base()
+
+# Dependency to get DB session
+def get_db(request: Request):
+    db = SessionLocal()
+    # get_current_user puts the token subject here, for read replica routing after commits
+    db.info["request_state"] = request.state
+    try:
+        yield db
+    finally:
+        db.close()
+
+# AsyncSession for the read-heavy routes, which run on the event loop instead of the threadpool
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,239 @@
+# backend/forecast.py
+"""Expected free spots at a driver's arrival time, from per-space occupancy models.
+
+A batch fit turns the last ``history_weeks`` of bookings into one model per parking
+space: ``baseline``, the average occupied spots in each UTC hour of the week, and
+``trend``, how far the last ``trend_weeks`` ran above or below that average. Fits are
+stored in ``space_forecasts`` so every worker serves the same models, and each
+worker holds them in an in-memory table, so a prediction costs no I/O.
+
+The forecast for an arrival at ``T`` is the seasonal level ``baseline[T] + trend``
+plus the space's current deviation from its seasonal level, which fades with a
+half-life of ``anomaly_half_life`` minutes. A space that is unusually full right now
+stays that way for the next half hour, but not into tomorrow.
+
+    python -m backend.forecast fit      # refit now instead of waiting for the next cycle
+"""
+import argparse
+import asyncio
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import delete, func, insert, select, text
+from sqlalchemy.orm import Session
+
+from backend import models
+from backend.analytics import HOURS_PER_WEEK, accumulate_hours, clip_intervals, load_intervals
+
+logger = logging.getLogger(__name__)
+
+# Hour-of-week 0 is Monday 00:00 UTC
+MONDAY = datetime(1970, 1, 5)
+
+def hour_of_week(value: datetime) -> int:
+    return int((value - MONDAY).total_seconds() // 3600) % HOURS_PER_WEEK
+
+def fit(db: Session, now: Optional[datetime] = None, history_weeks: int = 8,
+        trend_weeks: int = 1) -> Dict[int, dict]:
+    """``{space_id: {"baseline", "trend"}}`` for every space booked in the last ``history_weeks``.
+
+    One pass over the booking history: each chunk of intervals is bucketed once for
+    the whole window and once for its trailing ``trend_weeks``.
+    """
+    if not 0 < trend_weeks < history_weeks:
+        raise ValueError("trend_weeks must be at least 1 and less than history_weeks")
+    now = now or datetime.utcnow()
+    window_end = now.replace(minute=0, second=0, microsecond=0)
+    window_start = window_end - timedelta(weeks=history_weeks)
+    window_hours = history_weeks * HOURS_PER_WEEK
+    recent_from = (history_weeks - trend_weeks) * HOURS_PER_WEEK
+    # Offsets from window_start, rotated so bucket 0 is Monday 00:00
+    shift = hour_of_week(window_start)
+    history: Dict[int, np.ndarray] = {}
+    recent: Dict[int, np.ndarray] = {}
+    for ids, starts, ends in load_intervals(db, window_start, window_end):
+        for totals, from_hours in ((history, 0.0), (recent, recent_from)):
+            keep, clipped_starts, clipped_ends = clip_intervals(starts, ends, window_hours, from_hours)
+            accumulate_hours(totals, ids[keep], clipped_starts[keep] + shift, clipped_ends[keep] + shift)
+    fitted = {}
+    for space_id, booked in history.items():
+        baseline = booked / history_weeks
+        recent_level = recent[space_id].mean() / trend_weeks if space_id in recent else 0.0
+        fitted[space_id] = {
+            "baseline": np.round(baseline, 4).tolist(),
+            "trend": round(float(recent_level - baseline.mean()), 4)
+        }
+    return fitted
+
+def store(db: Session, fitted: Dict[int, dict], history_weeks: int, fitted_at: datetime):
+    """Replace every stored model with ``fitted`` in one transaction."""
+    if db.get_bind().dialect.name == "postgresql":
+        # Workers refitting at the same moment take turns instead of colliding on the keys
+        db.execute(text("LOCK TABLE space_forecasts IN EXCLUSIVE MODE"))
+    db.execute(delete(models.SpaceForecast))
+    if fitted:
+        db.execute(insert(models.SpaceForecast), [
+            {"parking_space_id": space_id, "baseline": model["baseline"], "trend": model["trend"],
+             "history_weeks": history_weeks, "fitted_at": fitted_at}
+            for space_id, model in fitted.items()
+        ])
+    db.commit()
+
+class ForecastTable:
+    """In-memory occupancy models, refreshed from ``space_forecasts`` by a background task.
+
+    Every ``refresh_interval`` seconds the task checks the stored fit. When the fit is
+    older than ``refit_interval``, the worker that notices refits it, so with several
+    workers the models are refitted about once per interval. A newer fit is then
+    loaded into memory.
+    """
+
+    def __init__(self, session_factory: Callable, history_weeks: int = 8, trend_weeks: int = 1,
+                 anomaly_half_life: float = 60.0, refit_interval: float = 3600.0,
+                 refresh_interval: float = 300.0):
+        self.session_factory = session_factory
+        self.history_weeks = history_weeks
+        self.trend_weeks = trend_weeks
+        self.anomaly_half_life = anomaly_half_life
+        self.refit_interval = refit_interval
+        self.refresh_interval = refresh_interval
+        self.fitted_at: Optional[datetime] = None
+        self.fits = 0
+        self.loads = 0
+        self.errors = 0
+        self.predictions = 0
+        self.last_fit_ms = 0.0
+        self._models: Dict[int, Tuple[List[float], float]] = {}
+        self._last_fit: Optional[float] = None
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    def refit(self, db: Session) -> int:
+        """Fit from booking history, store and load the result; returns the number of models."""
+        started = time.perf_counter()
+        fitted_at = datetime.utcnow()
+        fitted = fit(db, fitted_at, self.history_weeks, self.trend_weeks)
+        store(db, fitted, self.history_weeks, fitted_at)
+        duration_ms = (time.perf_counter() - started) * 1000
+        self._replace({space_id: (model["baseline"], model["trend"]) for space_id, model in fitted.items()}, fitted_at)
+        with self._lock:
+            self.fits += 1
+            self.last_fit_ms = duration_ms
+            self._last_fit = time.monotonic()
+        logger.info(f"Fitted occupancy forecasts for {len(fitted)} spaces in {duration_ms:.1f} ms")
+        return len(fitted)
+
+    def load(self, db: Session):
+        rows = db.execute(select(
+            models.SpaceForecast.parking_space_id, models.SpaceForecast.baseline,
+            models.SpaceForecast.trend, models.SpaceForecast.fitted_at
+        )).all()
+        self._replace(
+            {row.parking_space_id: (row.baseline, row.trend) for row in rows},
+            max((row.fitted_at for row in rows), default=None)
+        )
+        with self._lock:
+            self.loads += 1
+
+    def _replace(self, fitted: Dict[int, Tuple[List[float], float]], fitted_at: Optional[datetime]):
+        # Readers only ever see a whole table, old or new
+        with self._lock:
+            self._models = fitted
+            self.fitted_at = fitted_at
+
+    def refresh(self):
+        db = self.session_factory()
+        try:
+            stored_at = db.scalar(select(func.max(models.SpaceForecast.fitted_at)))
+            # With no bookings nothing is stored; don't refit that every cycle
+            recently_fitted = self._last_fit is not None and time.monotonic() - self._last_fit < self.refit_interval
+            if (stored_at is None or (datetime.utcnow() - stored_at).total_seconds() > self.refit_interval) \
+                    and not recently_fitted:
+                self.refit(db)
+            elif stored_at is not None and stored_at != self.fitted_at:
+                self.load(db)
+        except Exception:
+            db.rollback()
+            with self._lock:
+                self.errors += 1
+            raise
+        finally:
+            db.close()
+
+    def predict(self, space_id: int, total_spots: Optional[int], available_spots: Optional[int],
+                at: datetime, now: Optional[datetime] = None) -> dict:
+        """Expected free spots at ``at`` (naive UTC) for a space currently at ``available_spots``."""
+        now = now or datetime.utcnow()
+        total = total_spots or 0
+        occupied = total - (available_spots or 0)
+        model = self._models.get(space_id)
+        if model is not None and at > now:
+            baseline, trend = model
+            level_now = max(baseline[hour_of_week(now)] + trend, 0.0)
+            level_at = max(baseline[hour_of_week(at)] + trend, 0.0)
+            decay = 0.5 ** ((at - now).total_seconds() / 60 / self.anomaly_half_life)
+            occupied = level_at + (occupied - level_now) * decay
+        free = min(max(total - occupied, 0.0), total)
+        self.predictions += 1
+        return {
+            "arrival_at": at,
+            "expected_free_spots": round(free, 1),
+            "expected_occupancy": round(1 - free / total, 3) if total else None,
+            "model_fitted_at": self.fitted_at if model is not None else None
+        }
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.to_thread(self.refresh)
+            except Exception as e:
+                logger.error(f"Occupancy forecast refresh failed: {str(e)}", exc_info=True)
+            await asyncio.sleep(self.refresh_interval)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "running": self._task is not None,
+                "models": len(self._models),
+                "fitted_at": self.fitted_at,
+                "history_weeks": self.history_weeks,
+                "trend_weeks": self.trend_weeks,
+                "refit_interval_seconds": self.refit_interval,
+                "fits": self.fits,
+                "last_fit_ms": round(self.last_fit_ms, 3),
+                "loads": self.loads,
+                "errors": self.errors,
+                "predictions": self.predictions
+            }
+
+def cli():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("command", choices=["fit"])
+    args = parser.parse_args()
+
+    from backend.crud import occupancy_forecasts
+    from backend.database import SessionLocal
+
+    with SessionLocal() as db:
+        fitted = occupancy_forecasts.refit(db)
+    print(f"Fitted occupancy forecasts for {fitted} space(s).")
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,90 @@
+# backend/hashing.py
+import asyncio
+import logging
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Optional, Tuple
+
+from fastapi import HTTPException
+from passlib.context import CryptContext
+
+logger = logging.getLogger(__name__)
+
+# bcrypt work factor for new hashes; existing hashes with another cost are
+# upgraded transparently the next time their owner logs in
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+
+def hash_password(password: str) -> str:
+    return pwd_context.hash(password)
+
+def verify_and_update(password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Check a password; the second item is a fresh hash when the stored one is outdated."""
+    return pwd_context.verify_and_update(password, hashed_password)
+
+class HashingPool:
+    """Bounded executor for CPU-bound password hashing.
+
+    ``kind`` is "process" (default; hashes run in parallel across cores), "thread"
+    (bcrypt releases the GIL, so threads also work) or "inline" (runs on the calling
+    thread, for scripts). At most ``max_pending`` hashes may be queued or running;
+    beyond that requests are shed with 503 so a login storm can't build an unbounded
+    backlog.
+    """
+
+    def __init__(self, kind: str = "process", workers: Optional[int] = None, max_pending: int = 64):
+        self.kind = kind
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self._executor: Optional[Executor] = None
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="hashing")
+        return self._executor
+
+    async def run(self, fn: Callable, *args):
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=503,
+                detail="Authentication is busy, please retry",
+                headers={"Retry-After": "1"}
+            )
+        self.pending += 1
+        try:
+            if self.kind == "inline":
+                return fn(*args)
+            return await asyncio.get_running_loop().run_in_executor(self._get_executor(), fn, *args)
+        finally:
+            self.pending -= 1
+            self.completed += 1
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> dict:
+        return {
+            "kind": self.kind,
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "pending": self.pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "bcrypt_rounds": BCRYPT_ROUNDS
+        }
+
+hashing_pool = HashingPool(
+    kind=os.getenv("HASH_POOL_KIND", "process"),
+    workers=int(os.getenv("HASH_POOL_WORKERS", "0")) or None,
+    max_pending=int(os.getenv("HASH_POOL_MAX_PENDING", "64"))
+)
@@ -0,0 +1,70 @@
+# backend/lazy.py
+import asyncio
+import threading
+import time
+from typing import Any, Awaitable, Callable, Generic, Iterable, Optional, TypeVar
+
+T = TypeVar("T")
+
+class LazyRebuild(Generic[T]):
+    """An in-memory structure built from database rows, rebuilt when it goes stale.
+
+    ``build`` turns the rows a loader returns into the structure. It is rebuilt on the
+    first use after ``invalidate()`` or once it is older than ``max_age`` seconds, so
+    changes made by other worker processes are picked up too. Concurrent callers wait
+    for a rebuild already in progress (threads on a lock, coroutines on an asyncio lock)
+    instead of each loading the whole table again.
+    """
+
+    def __init__(self, build: Callable[[Iterable[Any]], T], max_age: float = 300.0):
+        self.build = build
+        self.max_age = max_age
+        self.value: Optional[T] = None
+        self.builds = 0
+        self._built_at = 0.0
+        self._built_version = -1
+        self._version = 0
+        self._lock = threading.Lock()
+        self._async_lock: Optional[asyncio.Lock] = None
+        self._async_lock_loop = None
+
+    def invalidate(self):
+        self._version += 1
+
+    def is_fresh(self) -> bool:
+        return (self.value is not None and self._built_version == self._version
+                and time.monotonic() - self._built_at < self.max_age)
+
+    def _rebuild(self, rows, version: int) -> T:
+        value = self.build(rows)
+        self.value = value
+        self._built_at = time.monotonic()
+        self._built_version = version
+        self.builds += 1
+        return value
+
+    def get(self, loader: Callable[[], Iterable[Any]]) -> T:
+        if self.is_fresh():
+            return self.value
+        with self._lock:
+            if not self.is_fresh():
+                self._rebuild(loader(), self._version)
+            return self.value
+
+    def _loop_lock(self) -> asyncio.Lock:
+        # asyncio locks belong to one event loop; scripts and tests may run several in turn
+        loop = asyncio.get_running_loop()
+        if self._async_lock_loop is not loop:
+            self._async_lock = asyncio.Lock()
+            self._async_lock_loop = loop
+        return self._async_lock
+
+    async def aget(self, loader: Callable[[], Awaitable[Iterable[Any]]]) -> T:
+        """``get`` with a coroutine loader."""
+        if self.is_fresh():
+            return self.value
+        async with self._loop_lock():
+            if not self.is_fresh():
+                version = self._version
+                self._rebuild(await loader(), version)
+            return self.value
@@ -1,17 +1,34 @@
 # backend/main.py
 # Trigger new deployment
+import asyncio
+import hmac
+import json
 import logging
-from fastapi import FastAPI, Depends, HTTPException
+import os
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import List, Optional
+from fastapi import FastAPI, Depends, Header, HTTPException, Response, WebSocket, WebSocketDisconnect
+from fastapi.responses import ORJSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from starlette.status import HTTP_401_UNAUTHORIZED
 from backend.utils.error_handler import handle_exceptions
 
-from backend import crud, models
-from backend.database import SessionLocal, engine
-from backend.auth import get_current_user
+from backend import auth, crud, models, rollups
+from backend.database import (
+    SessionLocal, async_engine, async_pool_metrics, check_connection, engine, get_db, pool_metrics
+)
+from backend.auth import get_admin_user, get_current_user
 from backend.schemas import LoginRequest, RegisterRequest, ResetPasswordRequest, VerifyResetRequest, User, CreateBookingRequest, UpdateBookingRequest, ExtendBookingRequest, BookSpotRequest, LocationRequest, Token
 from backend import schemas  # Import module alias for type annotations/decorators
+from backend.hashing import hashing_pool
+from backend.metrics import render_prometheus
+from backend.replicas import get_async_read_db, get_read_db, replica_router
+from backend import query_stats
+from backend.query_stats import query_budget, query_stats_middleware
+from backend.sweeper import BookingSweeper, sweeper_enabled
 
 # Configure logging
 logging.basicConfig(
@@ -23,13 +40,52 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Completes expired bookings and hands their spots back
+booking_sweeper = BookingSweeper(
+    SessionLocal,
+    interval=float(os.getenv("BOOKING_SWEEP_INTERVAL", "60")),
+    batch_size=int(os.getenv("BOOKING_SWEEP_BATCH_SIZE", "500"))
+)
+
+# Bearer token Prometheus must send to scrape /metrics; unset disables the endpoint
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Nothing here waits on the database, so the app answers /health even while it's unreachable
+    connection_check = asyncio.create_task(asyncio.to_thread(check_connection))
+    crud.availability_hub.bind(asyncio.get_running_loop())
+    if sweeper_enabled():
+        booking_sweeper.start()
+    replica_router.start()
+    crud.activity_log.start()
+    crud.stat_counters.start()
+    crud.occupancy_forecasts.start()
+    yield
+    await crud.occupancy_forecasts.stop()
+    await crud.stat_counters.stop()
+    await crud.activity_log.stop()
+    await booking_sweeper.stop()
+    await replica_router.stop()
+    hashing_pool.shutdown()
+    connection_check.cancel()
+    await async_engine.dispose()
+
 # Initialize FastAPI app
 app = FastAPI(
     title="City Park Hub API",
     version="1.0.0",
-    description="API for City Park Hub parking management system"
+    description="API for City Park Hub parking management system",
+    # orjson serialises the validated response models several times faster than the stdlib encoder
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
+# Per-route latency/SQL histograms and slow query log; also enforces each route's @query_budget
+app.middleware("http")(query_stats_middleware)
+for counted_engine in [engine, async_engine.sync_engine] + replica_router.engines():
+    query_stats.instrument(counted_engine)
+
 # CORS Middleware Setup
 app.add_middleware(
     CORSMiddleware,
@@ -47,21 +103,20 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
-    expose_headers=["Authorization", "Content-Type", "Accept"],
+    expose_headers=["Authorization", "Content-Type", "Accept", "X-Next-Cursor", "X-Query-Count"],
     max_age=86400
 )
 
-# Dependency to get DB session
-def get_db(**kwargs):  # Accept extraneous query params to avoid injection errors
-    db = SessionLocal()  # kwargs ignored
-    try:
-        yield db
-    finally:
-        db.close()
+def paginated(response: Response, page):
+    """Return a page's items, passing the keyset cursor for the next page in X-Next-Cursor."""
+    items, next_cursor = page
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return items
 
 # -------------------- AUTH ROUTES --------------------
 
-@app.get("/")
+@app.get("/", response_model=schemas.Message)
 def root():
     return {"message": "ParkSmart API is running"}
 
@@ -70,7 +125,7 @@ def root():
 async def login(data: LoginRequest, db: Session = Depends(get_db)):
     try:
         logger.info(f"Login attempt for email: {data.email}")
-        result = crud.login_user(db, data)
+        result = await crud.login_user(db, data)
         logger.info("Login successful")
         return result
     except HTTPException as e:
@@ -80,53 +135,62 @@ async def login(data: LoginRequest, db: Session = Depends(get_db)):
         logger.error(f"Unexpected error during login: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail="Internal server error")
 
-@app.post("/api/auth/register")
+@app.post("/api/auth/register", response_model=Token)
 @handle_exceptions
 async def register(data: schemas.RegisterRequest, db: Session = Depends(get_db)):
     logger.info(f"Registration attempt for email: {data.email}")
-    result = crud.register_user(db, data)
+    result = await crud.register_user(db, data)
     logger.info("Registration successful")
     return result
 
-@app.post("/api/auth/reset-password")
+@app.post("/api/auth/reset-password", response_model=schemas.ActionResult)
 def reset_password(data: schemas.ResetPasswordRequest, db: Session = Depends(get_db)):
     return crud.send_reset_email(db, data)
 
-@app.post("/api/auth/verify-reset")
+@app.post("/api/auth/verify-reset", response_model=schemas.ActionResult)
 def verify_reset(data: schemas.VerifyResetRequest, db: Session = Depends(get_db)):
     return crud.verify_reset(db, data)
 
 @app.get("/api/auth/me", response_model=schemas.User)
-def get_me(current_user: schemas.User = Depends(get_current_user)):
+def get_me(current_user: schemas.User = Depends(get_current_user), db: Session = Depends(get_db)):
+    if isinstance(current_user, schemas.Principal):
+        # Claims-only tokens carry identity, not the full profile
+        return auth.load_principal(db, current_user.email)
     return current_user
 
-@app.post("/api/auth/logout")
+@app.post("/api/auth/logout", response_model=schemas.Message)
 def logout():
     return {"message": "Logged out successfully"}
 
 # -------------------- DASHBOARD ROUTES --------------------
 
-@app.get("/api/dashboard/stats")
-def get_stats(current_user: schemas.User = Depends(get_current_user), db: Session = Depends(get_db)):
+@app.get("/api/dashboard/stats", response_model=schemas.DriverDashboard)
+@query_budget(2)
+def get_stats(current_user: schemas.User = Depends(get_current_user), db: Session = Depends(get_read_db)):
     return crud.get_user_dashboard_stats(db, current_user)
 
-@app.get("/api/dashboard/recent-bookings")
-def recent_bookings(current_user: schemas.User = Depends(get_current_user), db: Session = Depends(get_db)):
-    return crud.get_recent_bookings(db, current_user)
+@app.get("/api/dashboard/recent-bookings", response_model=List[schemas.BookingWithSpace])
+@query_budget(2)
+async def recent_bookings(current_user: schemas.User = Depends(get_current_user), db: AsyncSession = Depends(get_async_read_db)):
+    return await crud.get_recent_bookings_async(db, current_user)
 
 # -------------------- BOOKINGS ROUTES --------------------
 
-@app.get("/api/bookings")
-def list_bookings(
+@app.get("/api/bookings", response_model=List[schemas.BookingWithSpace])
+@query_budget(2)
+async def list_bookings(
+    response: Response,
     status: str = "all", 
     search: str = "", 
     local_kw: str = None,
+    limit: int = 50,
+    cursor: str = None,
     current_user: schemas.User = Depends(get_current_user), 
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
-    return crud.get_user_bookings(db, current_user, status, search)
+    return paginated(response, await crud.get_user_bookings_async(db, current_user, status, search, limit, cursor))
 
-@app.post("/api/bookings")
+@app.post("/api/bookings", response_model=schemas.CreatedBooking)
 def create_booking(
     data: schemas.CreateBookingRequest, 
     local_kw: str = "NAIROBI",
@@ -137,17 +201,6 @@ def create_booking(
         logger.info(f"Creating booking for user {current_user.id}, local_kw: {local_kw}")
         logger.info(f"Booking data: parking_space_id={data.parking_space_id}, duration={data.duration_hours}")
         
-        # Validate parking space exists
-        spot = db.query(models.ParkingSpace).filter(models.ParkingSpace.id == data.parking_space_id).first()
-        if not spot:
-            logger.error(f"Parking spot {data.parking_space_id} not found")
-            raise HTTPException(status_code=404, detail="Parking spot not found")
-        
-        # Check availability
-        if spot.available_spots <= 0:
-            logger.error(f"No available spots for parking space {data.parking_space_id}")
-            raise HTTPException(status_code=400, detail="No available spots")
-        
         # Validate time constraints
         if data.start_time >= data.end_time:
             logger.error("Invalid time range: start_time >= end_time")
@@ -157,7 +210,20 @@ def create_booking(
             logger.error(f"Invalid duration: {data.duration_hours}")
             raise HTTPException(status_code=400, detail="Duration must be greater than 0")
 
-        # Create booking
+        # Reserve a spot with one conditional UPDATE; commits together with the booking below
+        reserved = crud.reserve_spot(db, data.parking_space_id)
+        if reserved is None:
+            if not crud.space_exists(db, data.parking_space_id):
+                logger.error(f"Parking spot {data.parking_space_id} not found")
+                raise HTTPException(status_code=404, detail="Parking spot not found")
+            logger.error(f"No available spots for parking space {data.parking_space_id}")
+            raise HTTPException(status_code=400, detail="No available spots")
+
+        # Create booking, priced at the occupancy before it took its spot
+        now = datetime.utcnow()
+        cost = crud.price_stay(
+            db, data.parking_space_id, data.start_time, data.duration_hours, reserved["available_spots"] + 1
+        )
         booking = models.Booking(
             driver_id=current_user.id,
             parking_space_id=data.parking_space_id,
@@ -165,16 +231,24 @@ def create_booking(
             end_time=data.end_time,
             duration_hours=data.duration_hours,
             status="active",
-            payment_method="card"
+            payment_method="card",
+            total_cost=cost,
+            created_at=now,
+            updated_at=now
         )
         
-        # Update available spots
-        spot.available_spots -= 1
-        
-        # Save to database
+        # Save to database, together with the dashboard counters
         db.add(booking)
+        crud.stat_counters.bump(db, {
+            rollups.ACTIVE_BOOKINGS: 1,
+            rollups.OCCUPIED_SPOTS: 1,
+            rollups.revenue_counter(now.date()): cost
+        })
+        rollups.driver_bookings_changed(db, current_user.id, [(data.parking_space_id, 1, data.duration_hours, cost)])
         db.commit()
+        crud.spaces_changed([reserved])
         db.refresh(booking)
+        crud.booking_created(booking)
         
         logger.info(f"Booking created successfully: {booking.id}")
 
@@ -185,7 +259,8 @@ def create_booking(
                 "start_time": booking.start_time,
                 "end_time": booking.end_time,
                 "duration_hours": booking.duration_hours,
-                "status": booking.status
+                "status": booking.status,
+                "total_cost": booking.total_cost
             }
         }
 
@@ -197,7 +272,21 @@ def create_booking(
         logger.error(f"Booking creation failed: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
-@app.put("/api/bookings/{booking_id}")
+@app.post("/api/bookings/batch", response_model=schemas.FleetBookingResponse)
+def create_fleet_bookings(
+    data: schemas.FleetBookingRequest,
+    current_user: schemas.User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    try:
+        return crud.create_fleet_bookings(db, current_user, data)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Fleet booking failed: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.put("/api/bookings/{booking_id}", response_model=schemas.BookingEnvelope)
 def update_booking(
     booking_id: int, 
     data: schemas.UpdateBookingRequest, 
@@ -206,11 +295,13 @@ def update_booking(
 ):
     try:
         return crud.update_booking(db, current_user, booking_id, data)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Booking update failed: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.delete("/api/bookings/{booking_id}")
+@app.delete("/api/bookings/{booking_id}", response_model=schemas.Message)
 def delete_booking(
     booking_id: int, 
     current_user: schemas.User = Depends(get_current_user), 
@@ -218,11 +309,13 @@ def delete_booking(
 ):
     try:
         return crud.delete_booking(db, current_user, booking_id)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Booking deletion failed: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/api/bookings/{booking_id}/extend")
+@app.post("/api/bookings/{booking_id}/extend", response_model=schemas.BookingExtension)
 def extend_booking(
     booking_id: int, 
     data: schemas.ExtendBookingRequest, 
@@ -231,36 +324,79 @@ def extend_booking(
 ):
     try:
         return crud.extend_booking(db, current_user, booking_id, data)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Booking extension failed: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
 # -------------------- PARKING ROUTES --------------------
 
-@app.get("/api/parking/spots")
-def list_parking_spots(
+@app.get("/api/parking/spots", response_model=List[schemas.ParkingSpot])
+@query_budget(4)
+async def list_parking_spots(
+    response: Response,
     lat: float = None, 
     lng: float = None, 
-    radius: float = 5, 
+    radius: float = 5000,  # metres
     search: str = "", 
     filter: str = "available", 
-    db: Session = Depends(get_db)
+    limit: int = 50,
+    cursor: str = None,
+    arrival_at: datetime = None,
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     try:
-        return crud.get_parking_spots(db, lat, lng, radius, search, filter)
+        return paginated(
+            response,
+            await crud.get_parking_spots_async(db, lat, lng, radius, search, filter, limit, cursor, arrival_at)
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Failed to get parking spots: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/api/parking/spots/{spot_id}")
-def get_parking_spot(spot_id: int, db: Session = Depends(get_db)):
+@app.get("/api/parking/spots/{spot_id}", response_model=Optional[schemas.ParkingSpot])
+@query_budget(1)
+async def get_parking_spot(spot_id: int, arrival_at: datetime = None, db: AsyncSession = Depends(get_async_read_db)):
     try:
-        return crud.get_parking_spot(db, spot_id)
+        return await crud.get_parking_spot_async(db, spot_id, arrival_at)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Failed to get parking spot {spot_id}: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/api/parking/spots/{spot_id}/book")
+@app.get("/api/parking/spots/{spot_id}/availability", response_model=schemas.SpotAvailability)
+@query_budget(2)
+async def get_spot_availability(
+    spot_id: int,
+    start: datetime = None,
+    hours: int = 24,
+    slot_minutes: int = 60,
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    try:
+        return await crud.get_spot_availability_async(db, spot_id, start, hours, slot_minutes)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to get availability for spot {spot_id}: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/pricing/quotes", response_model=List[schemas.PriceQuote])
+@query_budget(2)
+async def quote_prices(data: schemas.QuoteRequest, db: AsyncSession = Depends(get_async_read_db)):
+    try:
+        return await crud.quote_prices_async(db, data)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Price quote failed: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/parking/spots/{spot_id}/book", response_model=schemas.BookingEnvelope)
 def book_spot(
     spot_id: int, 
     data: schemas.BookSpotRequest, 
@@ -269,16 +405,56 @@ def book_spot(
 ):
     try:
         return crud.book_parking_spot(db, current_user, spot_id, data)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Failed to book spot {spot_id}: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.websocket("/ws/parking")
+async def parking_updates(websocket: WebSocket):
+    """Push available_spots deltas for subscribed spaces.
+
+    Clients send {"action": "subscribe", "space_ids": [...]} and/or
+    {"action": "subscribe", "viewport": {"south", "west", "north", "east"}}, and receive
+    {"type": "availability", "spaces": [{"id", "available_spots"}]} messages. A
+    {"type": "resync"} message means updates were dropped and the client should refetch.
+    """
+    await websocket.accept()
+    hub = crud.availability_hub
+    subscriber = hub.connect()
+    sender = asyncio.create_task(hub.pump(subscriber, websocket.send_json))
+    try:
+        while True:
+            frame = await websocket.receive_text()
+            try:
+                message = json.loads(frame)
+                if not isinstance(message, dict):
+                    raise ValueError("message must be a JSON object")
+                hub.subscribe(subscriber, message)
+            except ValueError as e:
+                # json.JSONDecodeError is a ValueError too
+                await websocket.send_json({"type": "error", "detail": str(e)})
+                continue
+            await websocket.send_json({"type": "subscribed", "action": message.get("action")})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        sender.cancel()
+        try:
+            await sender
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.warning(f"Parking updates sender failed: {str(e)}")
+        hub.disconnect(subscriber)
+
 # -------------------- ADMIN ROUTES --------------------
 
-@app.get("/api/admin/stats")
+@app.get("/api/admin/stats", response_model=schemas.AdminStats)
 def admin_stats(
-    current_user: schemas.User = Depends(get_current_user), 
-    db: Session = Depends(get_db)
+    current_user: schemas.User = Depends(get_admin_user), 
+    db: Session = Depends(get_read_db)
 ):
     try:
         return crud.get_admin_stats(db)
@@ -286,63 +462,145 @@ def admin_stats(
         logger.error(f"Failed to get admin stats: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/api/admin/activities")
+@app.get("/api/admin/activities", response_model=List[schemas.AdminActivity])
 def admin_activities(
-    current_user: schemas.User = Depends(get_current_user), 
-    db: Session = Depends(get_db)
+    response: Response,
+    limit: int = 20,
+    cursor: str = None,
+    current_user: schemas.User = Depends(get_admin_user), 
+    db: Session = Depends(get_read_db)
 ):
     try:
-        return crud.get_admin_activities(db)
+        return paginated(response, crud.get_admin_activities(db, limit, cursor))
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Failed to get admin activities: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/api/admin/locations")
-def list_locations(
-    current_user: schemas.User = Depends(get_current_user), 
-    db: Session = Depends(get_db)
+@app.get("/api/admin/analytics/occupancy-heatmap", response_model=schemas.OccupancyHeatmap)
+def occupancy_heatmap(
+    space_id: Optional[int] = None,
+    weeks: int = 8,
+    utc_offset: Optional[int] = None,
+    current_user: schemas.User = Depends(get_admin_user),
+    db: Session = Depends(get_read_db)
 ):
     try:
-        return crud.list_parking_locations(db)
+        return crud.get_occupancy_heatmap(db, space_id, weeks, utc_offset)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to build occupancy heatmap: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/admin/cache-stats", response_model=schemas.CacheStats)
+def cache_stats(current_user: schemas.User = Depends(get_admin_user)):
+    return {
+        "parking": crud.parking_cache.stats(),
+        "principals": auth.principal_cache.stats(),
+        "heatmaps": crud.heatmap_cache.stats()
+    }
+
+@app.get("/api/admin/auth-stats", response_model=schemas.HashingStats)
+def auth_stats(current_user: schemas.User = Depends(get_admin_user)):
+    return hashing_pool.stats()
+
+@app.get("/api/admin/realtime-stats", response_model=schemas.RealtimeStats)
+def realtime_stats(current_user: schemas.User = Depends(get_admin_user)):
+    return crud.availability_hub.stats()
+
+@app.get("/api/admin/sweeper-stats", response_model=schemas.SweeperStats)
+def sweeper_stats(current_user: schemas.User = Depends(get_admin_user)):
+    return booking_sweeper.stats()
+
+@app.get("/api/admin/pricing-stats", response_model=schemas.PricingStats)
+def pricing_stats(current_user: schemas.User = Depends(get_admin_user)):
+    return crud.pricing_engine.stats()
+
+@app.get("/api/admin/forecast-stats", response_model=schemas.ForecastStats)
+def forecast_stats(current_user: schemas.User = Depends(get_admin_user)):
+    return crud.occupancy_forecasts.stats()
+
+@app.get("/api/admin/counter-stats", response_model=schemas.CounterStats)
+def counter_stats(current_user: schemas.User = Depends(get_admin_user)):
+    return crud.stat_counters.stats()
+
+@app.get("/api/admin/activity-stats", response_model=schemas.ActivityLogStats)
+def activity_stats(current_user: schemas.User = Depends(get_admin_user)):
+    return crud.activity_log.stats()
+
+@app.get("/api/admin/replica-stats", response_model=schemas.ReplicaStats)
+def replica_stats(current_user: schemas.User = Depends(get_admin_user)):
+    return replica_router.stats()
+
+@app.get("/api/admin/locations", response_model=List[schemas.ParkingSpaceRecord])
+@query_budget(2)
+async def list_locations(
+    response: Response,
+    limit: int = 50,
+    cursor: str = None,
+    current_user: schemas.User = Depends(get_admin_user), 
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    try:
+        return paginated(response, await crud.list_parking_locations_async(db, limit, cursor))
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Failed to list locations: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/api/admin/locations")
+@app.post("/api/admin/locations", response_model=schemas.ParkingSpaceRecord)
 def create_location(
     data: schemas.LocationRequest, 
-    current_user: schemas.User = Depends(get_current_user), 
+    current_user: schemas.User = Depends(get_admin_user), 
     db: Session = Depends(get_db)
 ):
     try:
         return crud.create_location(db, data)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Failed to create location: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.put("/api/admin/locations/{location_id}")
+@app.put("/api/admin/locations/{location_id}", response_model=schemas.ParkingSpaceRecord)
 def update_location(
     location_id: int, 
     data: schemas.LocationRequest, 
-    current_user: schemas.User = Depends(get_current_user), 
+    current_user: schemas.User = Depends(get_admin_user), 
     db: Session = Depends(get_db)
 ):
     try:
         return crud.update_location(db, location_id, data)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Failed to update location {location_id}: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
 # -------------------- HEALTH CHECK --------------------
 
-@app.get("/health")
+@app.get("/health", response_model=schemas.HealthStatus)
 def health_check():
     return {"status": "healthy", "service": "City Park Hub API"}
 
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics(authorization: Optional[str] = Header(None)):
+    """Prometheus scrape endpoint: pool occupancy and checkout times, per-route latency and SQL."""
+    if not METRICS_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not hmac.compare_digest(authorization or "", f"Bearer {METRICS_TOKEN}"):
+        raise HTTPException(status_code=HTTP_401_UNAUTHORIZED, detail="Invalid metrics token")
+    pools = [pool_metrics, async_pool_metrics] + replica_router.pool_metrics()
+    families = [family for pool in pools for family in pool.families()]
+    return render_prometheus(families + query_stats.families())
+
 # -------------------- DEBUG ENDPOINT (Remove in production) --------------------
 
-@app.get("/api/debug/parking-spaces")
-def debug_parking_spaces(db: Session = Depends(get_db)):
+@app.get("/api/debug/parking-spaces", response_model=schemas.DebugParkingSpaces)
+def debug_parking_spaces(db: Session = Depends(get_read_db)):
     """Debug endpoint to check parking spaces in database"""
     try:
         spaces = db.query(models.ParkingSpace).all()
@@ -352,4 +610,4 @@ def debug_parking_spaces(db: Session = Depends(get_db)):
         }
     except Exception as e:
         logger.error(f"Debug endpoint failed: {str(e)}", exc_info=True)
-        return {"error": str(e)}
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
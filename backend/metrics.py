@@ -0,0 +1,149 @@
+# backend/metrics.py
+import bisect
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+# Seconds; tuned for pool checkouts, which are sub-millisecond until the pool runs dry
+WAIT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+HOLD_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus style; thread-safe."""
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        with self._lock:
+            self.counts[bisect.bisect_left(self.buckets, value)] += 1
+            self.sum += value
+            self.count += 1
+
+    def render(self, name: str, labels: str = "") -> List[str]:
+        with self._lock:
+            counts, total, count = list(self.counts), self.sum, self.count
+        prefix = f"{labels}," if labels else ""
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += bucket_count
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            lines.append(f'{name}_bucket{{{prefix}le="{le}"}} {cumulative}')
+        suffix = f"{{{labels}}}" if labels else ""
+        lines.append(f"{name}_sum{suffix} {total:.6f}")
+        lines.append(f"{name}_count{suffix} {count}")
+        return lines
+
+class PoolMetrics:
+    """Counters and histograms for one SQLAlchemy connection pool.
+
+    Checkout hold time comes from the checkout/checkin pool events. Pools have no
+    event for the wait *before* a checkout, so ``instrument`` also wraps the pool's
+    ``_do_get`` to time it; that is where callers queue once the pool and its
+    overflow are exhausted.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.pool = None
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.invalidations = 0
+        self.timeouts = 0
+        self.wait = Histogram(WAIT_BUCKETS)
+        self.hold = Histogram(HOLD_BUCKETS)
+        self._lock = threading.Lock()
+
+    def _count(self, attribute: str):
+        with self._lock:
+            setattr(self, attribute, getattr(self, attribute) + 1)
+
+    def instrument(self, pool):
+        self.pool = pool
+
+        @event.listens_for(pool, "connect")
+        def on_connect(dbapi_connection, connection_record):
+            self._count("connects")
+
+        @event.listens_for(pool, "checkout")
+        def on_checkout(dbapi_connection, connection_record, connection_proxy):
+            connection_record.info["checked_out_at"] = time.perf_counter()
+            self._count("checkouts")
+
+        @event.listens_for(pool, "checkin")
+        def on_checkin(dbapi_connection, connection_record):
+            started = connection_record.info.pop("checked_out_at", None)
+            if started is not None:
+                self.hold.observe(time.perf_counter() - started)
+            self._count("checkins")
+
+        @event.listens_for(pool, "invalidate")
+        def on_invalidate(dbapi_connection, connection_record, exception):
+            self._count("invalidations")
+
+        do_get = pool._do_get
+
+        def timed_do_get():
+            started = time.perf_counter()
+            try:
+                return do_get()
+            except PoolTimeoutError:
+                self._count("timeouts")
+                raise
+            finally:
+                self.wait.observe(time.perf_counter() - started)
+
+        pool._do_get = timed_do_get
+        return self
+
+    def _gauge(self, method: str) -> Optional[int]:
+        # SingletonThreadPool/StaticPool (SQLite) don't report occupancy
+        reader = getattr(self.pool, method, None)
+        return reader() if callable(reader) else None
+
+    def gauges(self) -> Dict[str, Optional[int]]:
+        return {
+            "size": self._gauge("size"),
+            "checked_out": self._gauge("checkedout"),
+            "idle": self._gauge("checkedin"),
+            "overflow": self._gauge("overflow")
+        }
+
+    def families(self) -> List[Tuple[str, str, List[str]]]:
+        labels = f'pool="{self.name}"'
+        families = []
+        for gauge, value in self.gauges().items():
+            if value is not None:
+                families.append((f"db_pool_{gauge}", "gauge", [f"db_pool_{gauge}{{{labels}}} {value}"]))
+        for counter in ("connects", "checkouts", "checkins", "invalidations", "timeouts"):
+            name = f"db_pool_{counter}_total"
+            families.append((name, "counter", [f"{name}{{{labels}}} {getattr(self, counter)}"]))
+        families.append(("db_pool_checkout_wait_seconds", "histogram",
+                         self.wait.render("db_pool_checkout_wait_seconds", labels)))
+        families.append(("db_pool_checkout_hold_seconds", "histogram",
+                         self.hold.render("db_pool_checkout_hold_seconds", labels)))
+        return families
+
+def render_prometheus(families: Iterable[Tuple[str, str, List[str]]]) -> str:
+    """Prometheus text exposition for ``(name, type, sample lines)`` families.
+
+    Samples of a family may come from several sources (one per pool, say); they are
+    grouped under a single TYPE line as the format requires.
+    """
+    grouped: Dict[str, Tuple[str, List[str]]] = {}
+    for name, kind, lines in families:
+        grouped.setdefault(name, (kind, []))[1].extend(lines)
+    output = []
+    for name, (kind, lines) in grouped.items():
+        output.append(f"# TYPE {name} {kind}")
+        output.extend(lines)
+    return "\n".join(output) + "\n"
@@ -1,6 +1,11 @@
 from backend.database import engine, Base
 from backend.models import Driver, Vehicle, ParkingSpace, Booking
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import create_engine, inspect
+from typing import Optional
 import logging
+import os
 
 logger = logging.getLogger(__name__)
 
@@ -27,11 +32,37 @@ def check_tables():
         logger.error(f"Failed to check tables: {str(e)}", exc_info=True)
         return []
 
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.abspath(__file__)), "alembic.ini")
+BASELINE_REVISION = "0001_baseline"
+
+def alembic_config(url: Optional[str] = None) -> Config:
+    config = Config(ALEMBIC_INI)
+    # Keep the application's logging setup
+    config.attributes["configure_logger"] = False
+    if url:
+        config.set_main_option("sqlalchemy.url", url.replace("%", "%%"))
+    return config
+
+def upgrade(url: Optional[str] = None, revision: str = "head"):
+    """Bring the schema up to ``revision`` with Alembic.
+
+    Databases created by create_all before migrations existed have the baseline tables
+    but no alembic_version table; they are stamped at the baseline first.
+    """
+    config = alembic_config(url)
+    target = create_engine(url) if url else engine
+    try:
+        with target.connect() as connection:
+            tables = inspect(connection).get_table_names()
+    finally:
+        if url:
+            target.dispose()
+    if tables and "alembic_version" not in tables:
+        logger.info(f"Existing schema without migration history, stamping {BASELINE_REVISION}")
+        command.stamp(config, BASELINE_REVISION)
+    command.upgrade(config, revision)
+    logger.info(f"Database schema upgraded to {revision}")
+
 if __name__ == "__main__":
     logger.info("Starting database migration...")
-    tables = check_tables()
-    if not tables:
-        logger.info("No tables found, creating them...")
-        create_tables()
-    else:
-        logger.info("Tables already exist")
+    upgrade()
@@ -1,5 +1,5 @@
 # backend/models.py
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Float, Table
+from sqlalchemy import BigInteger, Column, Integer, JSON, String, DateTime, Boolean, ForeignKey, Float, Table, Index, text
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from .database import Base
@@ -52,6 +52,16 @@ class ParkingSpace(Base):
 
     bookings = relationship("Booking", back_populates="parking_space")
 
+    # Created by migrations (backend/alembic); mirrored here so create_all matches them
+    __table_args__ = (
+        # Bounding-box candidate lookups
+        Index('ix_parking_spaces_lat_lng', 'latitude', 'longitude'),
+        # Keyset order of the plain listing, and of the default "available" filter
+        Index('ix_parking_spaces_created', 'created_at', 'id'),
+        Index('ix_parking_spaces_available_created', 'created_at', 'id',
+              postgresql_where=text('available_spots > 0'), sqlite_where=text('available_spots > 0')),
+    )
+
 class Booking(Base):
     __tablename__ = 'bookings'
     id = Column(Integer, primary_key=True, index=True)
@@ -62,8 +72,80 @@ class Booking(Base):
     duration_hours = Column(Float)
     status = Column(String, default='active')
     payment_method = Column(String)
+    # Price of the stay from backend/pricing.py, including extensions; NULL for bookings made before prices were recorded
+    total_cost = Column(Float)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow)
 
     driver = relationship("Driver", back_populates="bookings")
     parking_space = relationship("ParkingSpace", back_populates="bookings")
+
+    __table_args__ = (
+        # A driver's bookings, newest first (keyset on created_at, id)
+        Index('ix_bookings_driver_created', 'driver_id', 'created_at', 'id'),
+        # Availability window lookups: live bookings of one space overlapping [start, end)
+        Index('ix_bookings_space_window', 'parking_space_id', 'start_time', 'end_time',
+              postgresql_where=text("status NOT IN ('cancelled', 'completed')"),
+              sqlite_where=text("status NOT IN ('cancelled', 'completed')")),
+        # Occupancy analytics: every booking of one space, including completed ones
+        Index('ix_bookings_space_history', 'parking_space_id', 'start_time', 'end_time'),
+        # Expiry sweeper: active bookings ordered by end_time
+        Index('ix_bookings_active_end_time', 'end_time',
+              postgresql_where=text("status = 'active'"), sqlite_where=text("status = 'active'")),
+    )
+
+class StatCounter(Base):
+    """Running totals for the admin dashboard, kept in step by the write paths (see backend/rollups.py)."""
+    __tablename__ = 'stat_counters'
+    name = Column(String, primary_key=True)
+    value = Column(Float, nullable=False, default=0.0)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+class DriverRollup(Base):
+    """Per-driver dashboard totals, kept in step by the booking write paths (see backend/rollups.py)."""
+    __tablename__ = 'driver_rollups'
+    driver_id = Column(Integer, ForeignKey('drivers.id'), primary_key=True)
+    total_bookings = Column(Integer, nullable=False, default=0)
+    total_hours = Column(Float, nullable=False, default=0.0)
+    total_spend = Column(Float, nullable=False, default=0.0)
+    # Bounded top-k of the driver's spaces: [{"id", "name", "count"}], most used first
+    top_spaces = Column(JSON, nullable=False, default=list)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+class ActivityEvent(Base):
+    """Append-only admin activity log, written in batches by backend/activity.py.
+
+    Names and amounts are copied in at write time so history reads need no joins.
+    """
+    __tablename__ = 'activity_events'
+    id = Column(BigInteger().with_variant(Integer, 'sqlite'), primary_key=True)
+    type = Column(String, nullable=False)
+    action = Column(String, nullable=False)
+    driver_id = Column(Integer)
+    parking_space_id = Column(Integer)
+    user_name = Column(String)
+    location = Column(String)
+    amount = Column(Float)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class SpaceForecast(Base):
+    """Fitted occupancy model per parking space, refitted periodically by backend/forecast.py."""
+    __tablename__ = 'space_forecasts'
+    parking_space_id = Column(Integer, ForeignKey('parking_spaces.id'), primary_key=True)
+    # Average occupied spots for each UTC hour of the week, Monday 00:00 first (168 values)
+    baseline = Column(JSON, nullable=False)
+    # Recent level minus the baseline's average, in occupied spots
+    trend = Column(Float, nullable=False, default=0.0)
+    history_weeks = Column(Integer, nullable=False)
+    fitted_at = Column(DateTime, nullable=False)
+
+class Tariff(Base):
+    """A parking space's pricing rules, compiled into backend/pricing.py's tariff table."""
+    __tablename__ = 'tariffs'
+    parking_space_id = Column(Integer, ForeignKey('parking_spaces.id'), primary_key=True)
+    # [{"start_hour", "end_hour", "rate", "days"}] in local time; other hours use price_per_hour
+    bands = Column(JSON, nullable=False, default=list)
+    daily_cap = Column(Float)
+    # [{"occupancy", "multiplier"}]
+    surcharges = Column(JSON, nullable=False, default=list)
+    updated_at = Column(DateTime, default=datetime.utcnow)
@@ -0,0 +1,81 @@
+# backend/pagination.py
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Sequence
+
+from fastapi import HTTPException
+from sqlalchemy import and_, or_
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+
+def clamp_limit(limit: Optional[int]) -> int:
+    if limit is None:
+        return DEFAULT_LIMIT
+    return max(1, min(int(limit), MAX_LIMIT))
+
+def _encode_value(value):
+    return {"dt": value.isoformat()} if isinstance(value, datetime) else value
+
+def _decode_value(value):
+    return datetime.fromisoformat(value["dt"]) if isinstance(value, dict) else value
+
+def encode_cursor(kind: str, values: Sequence[Any]) -> str:
+    """Opaque cursor holding the sort key of the last row on a page."""
+    payload = json.dumps({"k": kind, "v": [_encode_value(v) for v in values]}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: Optional[str], kind: str) -> Optional[List[Any]]:
+    """Decode a cursor from ``encode_cursor``; it must come from a listing with the same ordering."""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if payload["k"] != kind:
+            raise ValueError(f"cursor is for {payload['k']} ordering")
+        return [_decode_value(v) for v in payload["v"]]
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def keyset_filter(columns: Sequence, values: Sequence[Any], descending: bool = False):
+    """Row-value comparison ``(c1, c2, ...) > (v1, v2, ...)`` (``<`` when descending).
+
+    Spelled out as OR/AND so it works on every backend and can use a composite index.
+    """
+    clauses = []
+    for position, (column, value) in enumerate(zip(columns, values)):
+        tail = column < value if descending else column > value
+        equal = [columns[i] == values[i] for i in range(position)]
+        clauses.append(and_(*equal, tail) if equal else tail)
+    return or_(*clauses)
+
+def _keyset_statement(statement, kind: str, columns: Sequence, cursor: Optional[str], limit: int, descending: bool):
+    after = decode_cursor(cursor, kind)
+    if after is not None:
+        statement = statement.filter(keyset_filter(columns, after, descending))
+    statement = statement.order_by(*[c.desc() if descending else c.asc() for c in columns])
+    # One extra row tells us whether another page exists
+    return statement.limit(limit + 1)
+
+def _keyset_page(rows, kind: str, columns: Sequence, limit: int):
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(kind, [getattr(last, c.key) for c in columns])
+
+def paginate(db, statement, kind: str, columns: Sequence, cursor: Optional[str], limit: Optional[int],
+             descending: bool = False):
+    """Run ``statement`` (an ORM select) with keyset ordering; return ``(rows, next_cursor)``."""
+    limit = clamp_limit(limit)
+    rows = db.scalars(_keyset_statement(statement, kind, columns, cursor, limit, descending)).all()
+    return _keyset_page(rows, kind, columns, limit)
+
+async def paginate_async(db, statement, kind: str, columns: Sequence, cursor: Optional[str], limit: Optional[int],
+                         descending: bool = False):
+    """``paginate`` for an AsyncSession."""
+    limit = clamp_limit(limit)
+    rows = (await db.scalars(_keyset_statement(statement, kind, columns, cursor, limit, descending))).all()
+    return _keyset_page(rows, kind, columns, limit)
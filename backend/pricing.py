@@ -0,0 +1,251 @@
+# backend/pricing.py
+"""Parking prices from per-space tariffs, compiled into arrays for vectorised quoting.
+
+A tariff (the ``tariffs`` row of a space) has three parts:
+
+* ``bands``: ``{"start_hour", "end_hour", "rate", "days"}`` hourly rates for a
+  time-of-day range in local time, on the given weekdays (0 = Monday; default every
+  day). ``end_hour`` below ``start_hour`` runs past midnight. Later bands win
+  where they overlap, and hours no band covers cost the space's ``price_per_hour``.
+* ``daily_cap``: the most any 24 hours of a stay, counted from its start, can cost.
+* ``surcharges``: ``{"occupancy", "multiplier"}`` tiers. The highest multiplier whose
+  occupancy threshold the space has reached applies to the whole quote.
+
+Spaces without a tariff are charged ``price_per_hour`` around the clock.
+
+Each distinct week of hourly rates is compiled once into a profile of 168 rates and
+their prefix sums. Pricing an interval then costs two lookups into the profile,
+whatever its length, and a batch of quotes is a handful of array operations. Daily
+caps loop once per day of the longest stay, not once per quote.
+"""
+import logging
+import time
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from backend.analytics import HOURS_PER_WEEK
+from backend.lazy import LazyRebuild
+
+logger = logging.getLogger(__name__)
+
+# Local hours are counted from this Monday 00:00
+ANCHOR = np.datetime64("2024-01-01T00:00:00", "us")
+
+class TariffError(ValueError):
+    pass
+
+def week_rates(price_per_hour: Optional[float], bands: Sequence[dict]) -> np.ndarray:
+    """168 local hourly rates, Monday 00:00 first."""
+    rates = np.full(HOURS_PER_WEEK, float(price_per_hour or 0.0))
+    for band in bands:
+        start, end, rate = band.get("start_hour"), band.get("end_hour"), band.get("rate")
+        days = band.get("days") or range(7)
+        if not (isinstance(start, int) and isinstance(end, int) and 0 <= start <= 23 and 0 <= end <= 24):
+            raise TariffError("start_hour must be 0-23 and end_hour 0-24")
+        if start == end % 24:
+            raise TariffError("A band must cover at least one hour")
+        if rate is None or rate < 0:
+            raise TariffError("Band rates must be zero or more")
+        if any(day not in range(7) for day in days):
+            raise TariffError("Band days must be 0 (Monday) to 6 (Sunday)")
+        length = (end - start) % 24 or 24
+        for day in days:
+            hours = (day * 24 + start + np.arange(length)) % HOURS_PER_WEEK
+            rates[hours] = rate
+    return rates
+
+def surcharge_tiers(surcharges: Sequence[dict]) -> List[Tuple[float, float]]:
+    tiers = []
+    for tier in surcharges:
+        occupancy, multiplier = tier.get("occupancy"), tier.get("multiplier")
+        if occupancy is None or not 0 <= occupancy <= 1:
+            raise TariffError("Surcharge occupancy must be between 0 and 1")
+        if multiplier is None or multiplier < 1:
+            raise TariffError("Surcharge multipliers must be at least 1")
+        tiers.append((float(occupancy), float(multiplier)))
+    return sorted(tiers)
+
+def validate_tariff(price_per_hour: Optional[float], tariff: dict):
+    """Raise ``TariffError`` for a tariff the engine couldn't compile."""
+    week_rates(price_per_hour, tariff.get("bands") or [])
+    surcharge_tiers(tariff.get("surcharges") or [])
+    cap = tariff.get("daily_cap")
+    if cap is not None and cap < 0:
+        raise TariffError("daily_cap must be zero or more")
+
+def local_hours(times, utc_offset: int) -> np.ndarray:
+    """Naive UTC datetimes as float local hours since ``ANCHOR``."""
+    values = np.array(times, dtype="datetime64[us]")
+    return (values - ANCHOR) / np.timedelta64(1, "h") + utc_offset
+
+class TariffTable:
+    """Every space's compiled tariff.
+
+    Spaces share profiles: all untariffed spaces use one flat profile scaled by their
+    hourly price, and identical tariffs compile to the same profile.
+    """
+
+    def __init__(self, rows: Iterable[Tuple]):
+        """``rows`` are ``(space_id, price_per_hour, total_spots, bands, daily_cap, surcharges)``."""
+        rows = list(rows)
+        profiles: Dict[bytes, int] = {}
+        # Most tariffs repeat; compile each (price, bands) pair once
+        compiled: Dict[Tuple[float, str], int] = {}
+        rates = [np.ones(HOURS_PER_WEEK)]
+        profile_of, scale, caps, capacity, tiers = [], [], [], [], []
+        self.index: Dict[int, int] = {}
+        for row, (space_id, price, total, bands, cap, surcharges) in enumerate(rows):
+            self.index[space_id] = row
+            capacity.append(total or 0)
+            profile = 0
+            try:
+                space_tiers = surcharge_tiers(surcharges) if surcharges else []
+                if bands:
+                    # Same key order as stored, so equal tariffs from the database share a key
+                    source = (price or 0.0, repr(bands))
+                    if source not in compiled:
+                        week = week_rates(price, bands)
+                        compiled[source] = profiles.setdefault(week.tobytes(), len(rates))
+                        if compiled[source] == len(rates):
+                            rates.append(week)
+                    profile = compiled[source]
+            except TariffError as e:
+                # Edited outside the API; charge the flat price rather than fail every quote
+                logger.warning(f"Ignoring invalid tariff for space {space_id}: {str(e)}")
+                profile, space_tiers, cap = 0, [], None
+            tiers.append(space_tiers)
+            caps.append(np.inf if cap is None else cap)
+            profile_of.append(profile)
+            scale.append(1.0 if profile else price or 0.0)
+        self.rates = np.array(rates)
+        self.prefix = np.concatenate([np.zeros((len(rates), 1)), np.cumsum(self.rates, axis=1)], axis=1)
+        self.profile_of = np.array(profile_of, dtype=np.int64)
+        self.scale = np.array(scale, dtype=np.float64)
+        self.caps = np.array(caps, dtype=np.float64)
+        self.capacity = np.array(capacity, dtype=np.float64)
+        width = max([len(space_tiers) for space_tiers in tiers] + [1])
+        # Padded with thresholds no occupancy reaches
+        self.thresholds = np.full((len(rows), width), np.inf)
+        self.multipliers = np.ones((len(rows), width))
+        for row, space_tiers in enumerate(tiers):
+            if not space_tiers:
+                continue
+            for column, (occupancy, multiplier) in enumerate(space_tiers):
+                self.thresholds[row, column] = occupancy
+                self.multipliers[row, column] = multiplier
+        self.size = len(rows)
+        self.profiles = len(rates)
+
+    def rows(self, space_ids: Sequence[int]) -> np.ndarray:
+        """Row of each space id, -1 for unknown spaces."""
+        return np.array([self.index.get(space_id, -1) for space_id in space_ids], dtype=np.int64)
+
+    def _cumulative(self, profile: np.ndarray, hours: np.ndarray) -> np.ndarray:
+        # Cost of [ANCHOR, hours) at the profile's rates
+        weeks = np.floor(hours / HOURS_PER_WEEK)
+        offset = hours - weeks * HOURS_PER_WEEK
+        hour = np.minimum(offset.astype(np.int64), HOURS_PER_WEEK - 1)
+        return (weeks * self.prefix[profile, HOURS_PER_WEEK] + self.prefix[profile, hour]
+                + (offset - hour) * self.rates[profile, hour])
+
+    def multiplier(self, rows: np.ndarray, occupancy: np.ndarray) -> np.ndarray:
+        reached = occupancy[:, None] >= self.thresholds[rows]
+        return np.where(reached, self.multipliers[rows], 1.0).max(axis=1)
+
+    def quote(self, rows: np.ndarray, starts: np.ndarray, ends: np.ndarray,
+              available: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """``(amounts, multipliers)`` for known ``rows`` over local-hour intervals.
+
+        ``available`` is each space's free spots at quoting time, for surcharges.
+        """
+        if available is None:
+            occupancy = np.zeros(len(rows))
+        else:
+            capacity = self.capacity[rows]
+            occupancy = np.where(capacity > 0, 1 - available / np.maximum(capacity, 1), 0.0)
+        profile = self.profile_of[rows]
+        multiplier = self.multiplier(rows, occupancy)
+        factor = self.scale[rows] * multiplier
+        ends = np.maximum(ends, starts)
+        caps = self.caps[rows]
+        if not np.isfinite(caps).any():
+            return (self._cumulative(profile, ends) - self._cumulative(profile, starts)) * factor, multiplier
+        amounts = np.zeros(len(rows))
+        days = int(np.ceil((ends - starts).max() / 24)) if len(rows) else 0
+        for day in range(days):
+            day_start = starts + day * 24
+            day_end = np.minimum(day_start + 24, ends)
+            cost = (self._cumulative(profile, day_end) - self._cumulative(profile, day_start)) * factor
+            amounts += np.where(day_start < ends, np.minimum(cost, caps), 0.0)
+        return amounts, multiplier
+
+class PricingEngine:
+    """Lazily (re)built ``TariffTable`` over every parking space.
+
+    ``loader`` returns the rows ``TariffTable`` takes. Like the spatial index, the table
+    is rebuilt on the first quote after ``invalidate()`` or once it is older than
+    ``max_age`` seconds, so tariff edits made by other workers are picked up too.
+    """
+
+    def __init__(self, utc_offset: int = 3, max_age: float = 300.0):
+        self.utc_offset = utc_offset
+        self.quotes = 0
+        self._table = LazyRebuild(self._build, max_age)
+
+    def invalidate(self):
+        self._table.invalidate()
+
+    def _build(self, rows) -> TariffTable:
+        started = time.perf_counter()
+        table = TariffTable(rows)
+        logger.info(f"Tariff table rebuilt with {table.size} spaces and {table.profiles} rate profiles "
+                    f"in {(time.perf_counter() - started) * 1000:.1f} ms")
+        return table
+
+    def table(self, loader: Callable[[], Iterable[Tuple]]) -> TariffTable:
+        return self._table.get(loader)
+
+    async def atable(self, loader) -> TariffTable:
+        """``table`` with a coroutine loader."""
+        return await self._table.aget(loader)
+
+    def quote_many(self, table: TariffTable, space_ids: Sequence[int], starts: Sequence[datetime],
+                   ends: Sequence[datetime], available: Optional[Sequence[float]] = None):
+        """Price ``(space, start, end)`` candidates in one pass over ``table``.
+
+        Returns ``(amounts, multipliers, known)``; unknown spaces get amount 0 and
+        ``known`` False.
+        """
+        rows = table.rows(space_ids)
+        known = rows >= 0
+        amounts = np.zeros(len(rows))
+        multipliers = np.ones(len(rows))
+        if known.any():
+            positions = np.flatnonzero(known)
+            amounts[known], multipliers[known] = table.quote(
+                rows[known],
+                local_hours([starts[i] for i in positions], self.utc_offset),
+                local_hours([ends[i] for i in positions], self.utc_offset),
+                None if available is None else np.array(available, dtype=np.float64)[known]
+            )
+        self.quotes += len(rows)
+        return np.round(amounts, 2), multipliers, known
+
+    def quote(self, table: TariffTable, space_id: int, start: datetime, end: datetime,
+              available: Optional[float] = None) -> float:
+        """Price of one stay; unknown spaces cost 0."""
+        amounts, _, _ = self.quote_many(table, [space_id], [start], [end], None if available is None else [available])
+        return float(amounts[0])
+
+    def stats(self) -> dict:
+        table = self._table.value
+        return {
+            "spaces": table.size if table else 0,
+            "profiles": table.profiles if table else 0,
+            "builds": self._table.builds,
+            "quotes": self.quotes,
+            "fresh": self._table.is_fresh(),
+            "utc_offset": self.utc_offset
+        }
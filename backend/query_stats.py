@@ -0,0 +1,159 @@
+# backend/query_stats.py
+import logging
+import os
+import random
+import re
+import threading
+import time
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional, Tuple
+
+from fastapi import Request
+from fastapi.responses import JSONResponse
+from sqlalchemy import event
+
+from backend.metrics import Histogram
+
+logger = logging.getLogger(__name__)
+
+# "log" (default) warns when a route runs more statements than its budget,
+# "raise" also turns the response into a 500 (for CI and local runs), "off" disables the check
+QUERY_BUDGET_MODE = os.getenv("QUERY_BUDGET_MODE", "log")
+# Fraction of requests whose latency, statement count and DB time go into the histograms
+QUERY_STATS_SAMPLE_RATE = float(os.getenv("QUERY_STATS_SAMPLE_RATE", "1.0"))
+# Statements slower than this are logged, for a sampled fraction of occurrences
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+SLOW_QUERY_LOG_SAMPLE_RATE = float(os.getenv("SLOW_QUERY_LOG_SAMPLE_RATE", "1.0"))
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+
+class RequestQueries:
+    """SQL statements issued while serving one request."""
+
+    def __init__(self, scope: dict, sampled: bool):
+        self.scope = scope
+        self.sampled = sampled
+        self.count = 0
+        self.db_seconds = 0.0
+
+    def route(self) -> str:
+        # The router fills scope["route"] in before any handler code runs
+        route = self.scope.get("route")
+        return getattr(route, "path", None) or "unmatched"
+
+_current: ContextVar[Optional[RequestQueries]] = ContextVar("request_queries", default=None)
+
+class RouteStats:
+    def __init__(self):
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.statements = Histogram(STATEMENT_BUCKETS)
+        self.db_time = Histogram(LATENCY_BUCKETS)
+
+_routes: Dict[Tuple[str, str], RouteStats] = {}
+_routes_lock = threading.Lock()
+slow_queries = 0
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LISTS = re.compile(r"\((?:\s*(?:\?|%s|%\(\w+\)s|\$\d+|:\w+)\s*,)+\s*(?:\?|%s|%\(\w+\)s|\$\d+|:\w+)\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+def normalize_statement(statement: str) -> str:
+    """Statement shape for grouping: literals become ?, IN-lists collapse, whitespace folds."""
+    normalized = _LITERALS.sub("?", statement)
+    normalized = _PLACEHOLDER_LISTS.sub("(...)", normalized)
+    return _WHITESPACE.sub(" ", normalized).strip()[:1000]
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    queries = _current.get()
+    if queries is not None:
+        queries.count += 1
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    global slow_queries
+    elapsed = time.perf_counter() - conn.info["query_started"].pop()
+    queries = _current.get()
+    if queries is not None:
+        queries.db_seconds += elapsed
+    if elapsed * 1000 >= SLOW_QUERY_MS:
+        slow_queries += 1
+        if random.random() < SLOW_QUERY_LOG_SAMPLE_RATE:
+            route = queries.route() if queries is not None else "background"
+            logger.warning(f"Slow query ({elapsed * 1000:.1f} ms) on {route}: {normalize_statement(statement)}")
+
+def _handle_error(context):
+    # after_cursor_execute doesn't fire for failed statements
+    started = context.connection.info.get("query_started") if context.connection is not None else None
+    if started:
+        started.pop()
+
+def instrument(engine):
+    """Count and time statements run through ``engine`` (pass ``sync_engine`` for async engines)."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+def query_budget(limit: int) -> Callable:
+    """Declare the most statements a route may run per request, auth lookups included."""
+    def decorate(endpoint):
+        endpoint.__query_budget__ = limit
+        return endpoint
+    return decorate
+
+def _record(method: str, queries: RequestQueries, seconds: float):
+    key = (method, queries.route())
+    stats = _routes.get(key)
+    if stats is None:
+        with _routes_lock:
+            stats = _routes.setdefault(key, RouteStats())
+    stats.latency.observe(seconds)
+    stats.statements.observe(queries.count)
+    stats.db_time.observe(queries.db_seconds)
+
+def _check_budget(request: Request, queries: RequestQueries, response):
+    budget = getattr(request.scope.get("endpoint"), "__query_budget__", None)
+    if QUERY_BUDGET_MODE == "off" or budget is None or queries.count <= budget:
+        return response
+    logger.warning(
+        f"Query budget exceeded: {request.method} {request.url.path} ran {queries.count} statements "
+        f"(budget {budget})"
+    )
+    if QUERY_BUDGET_MODE == "raise":
+        return JSONResponse(
+            status_code=500,
+            content={"detail": f"Query budget exceeded: {queries.count} statements, budget {budget}"},
+            headers={"X-Query-Count": str(queries.count)}
+        )
+    return response
+
+async def query_stats_middleware(request: Request, call_next):
+    """Per-route latency, statement count and DB time; enforces ``@query_budget``."""
+    queries = RequestQueries(request.scope, random.random() < QUERY_STATS_SAMPLE_RATE)
+    token = _current.set(queries)
+    started = time.perf_counter()
+    try:
+        response = await call_next(request)
+    finally:
+        _current.reset(token)
+    if queries.sampled:
+        _record(request.method, queries, time.perf_counter() - started)
+    response.headers["X-Query-Count"] = str(queries.count)
+    return _check_budget(request, queries, response)
+
+def families() -> List[Tuple[str, str, List[str]]]:
+    """Route histograms as ``(name, type, lines)`` for metrics.render_prometheus."""
+    with _routes_lock:
+        routes = sorted(_routes.items())
+    latency, statements, db_time = [], [], []
+    for (method, route), stats in routes:
+        labels = f'method="{method}",route="{route}"'
+        latency.extend(stats.latency.render("http_request_duration_seconds", labels))
+        statements.extend(stats.statements.render("http_request_sql_statements", labels))
+        db_time.extend(stats.db_time.render("http_request_sql_duration_seconds", labels))
+    return [
+        ("http_request_duration_seconds", "histogram", latency),
+        ("http_request_sql_statements", "histogram", statements),
+        ("http_request_sql_duration_seconds", "histogram", db_time),
+        ("sql_slow_queries_total", "counter", [f"sql_slow_queries_total {slow_queries}"]),
+    ]
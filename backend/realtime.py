@@ -0,0 +1,134 @@
+# backend/realtime.py
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, Iterable, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+class Subscriber:
+    """One WebSocket client: what it watches plus its pending, coalesced updates."""
+
+    def __init__(self, max_pending: int):
+        self.max_pending = max_pending
+        self.space_ids: Set[int] = set()
+        self.viewport: Optional[tuple] = None  # (south, west, north, east)
+        # Latest update per space; a burst of changes to one space collapses to one entry
+        self.pending: Dict[int, dict] = {}
+        self.overflowed = False
+        self.ready = asyncio.Event()
+
+    def wants(self, update: dict) -> bool:
+        if update["id"] in self.space_ids:
+            return True
+        if self.viewport is None or update.get("latitude") is None or update.get("longitude") is None:
+            return False
+        south, west, north, east = self.viewport
+        return south <= update["latitude"] <= north and west <= update["longitude"] <= east
+
+    def offer(self, update: dict):
+        if update["id"] not in self.pending and len(self.pending) >= self.max_pending:
+            # Too far behind to be worth catching up item by item; ask for a refetch instead
+            self.pending.clear()
+            self.overflowed = True
+        else:
+            self.pending[update["id"]] = update
+        self.ready.set()
+
+class AvailabilityHub:
+    """In-process pub/sub for ``available_spots`` changes.
+
+    Write paths call ``publish`` from any thread after they commit; delivery happens on
+    the event loop bound at startup. Each subscriber has a bounded pending map, and
+    updates arriving within ``coalesce_window`` seconds go out as a single message.
+    """
+
+    def __init__(self, max_pending: int = 500, coalesce_window: float = 0.1):
+        self.max_pending = max_pending
+        self.coalesce_window = coalesce_window
+        self.published = 0
+        self.delivered = 0
+        self.overflows = 0
+        self._subscribers: Set[Subscriber] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def bind(self, loop: asyncio.AbstractEventLoop):
+        self._loop = loop
+
+    def connect(self) -> Subscriber:
+        subscriber = Subscriber(self.max_pending)
+        self._subscribers.add(subscriber)
+        return subscriber
+
+    def disconnect(self, subscriber: Subscriber):
+        self._subscribers.discard(subscriber)
+
+    def subscribe(self, subscriber: Subscriber, message: dict):
+        """Apply a client ``subscribe``/``unsubscribe`` message; raises ValueError if malformed."""
+        action = message.get("action")
+        if action == "unsubscribe":
+            subscriber.space_ids = set()
+            subscriber.viewport = None
+            subscriber.pending.clear()
+            return
+        if action != "subscribe":
+            raise ValueError("action must be 'subscribe' or 'unsubscribe'")
+        space_ids = message.get("space_ids") or []
+        viewport = message.get("viewport")
+        try:
+            subscriber.space_ids = {int(space_id) for space_id in space_ids}
+            if viewport is not None:
+                subscriber.viewport = tuple(
+                    float(viewport[edge]) for edge in ("south", "west", "north", "east")
+                )
+            else:
+                subscriber.viewport = None
+        except (TypeError, ValueError, KeyError):
+            raise ValueError("space_ids must be integers and viewport needs south/west/north/east")
+
+    def publish(self, updates: Iterable[dict]):
+        """Thread-safe; each update is ``{"id", "available_spots", "latitude", "longitude"}``."""
+        updates = list(updates)
+        if not updates or self._loop is None or self._loop.is_closed():
+            return
+        try:
+            self._loop.call_soon_threadsafe(self._dispatch, updates)
+        except RuntimeError:
+            # Loop shut down between the check and the call
+            pass
+
+    def _dispatch(self, updates):
+        self.published += len(updates)
+        for subscriber in self._subscribers:
+            for update in updates:
+                if subscriber.wants(update):
+                    subscriber.offer(update)
+
+    async def pump(self, subscriber: Subscriber, send: Callable[[dict], Awaitable[None]]):
+        """Forward a subscriber's pending updates through ``send`` until cancelled."""
+        while True:
+            await subscriber.ready.wait()
+            if self.coalesce_window:
+                await asyncio.sleep(self.coalesce_window)
+            subscriber.ready.clear()
+            if subscriber.overflowed:
+                subscriber.overflowed = False
+                self.overflows += 1
+                await send({"type": "resync"})
+                continue
+            if not subscriber.pending:
+                continue
+            spaces = [
+                {"id": update["id"], "available_spots": update["available_spots"]}
+                for update in subscriber.pending.values()
+            ]
+            subscriber.pending.clear()
+            self.delivered += len(spaces)
+            await send({"type": "availability", "spaces": spaces})
+
+    def stats(self) -> dict:
+        return {
+            "subscribers": len(self._subscribers),
+            "published": self.published,
+            "delivered": self.delivered,
+            "overflows": self.overflows
+        }
@@ -0,0 +1,272 @@
+# backend/replicas.py
+import asyncio
+import itertools
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+from fastapi import Depends
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from backend.auth import token_subject
+from backend.database import AsyncSessionLocal, SessionLocal, async_database_url, engine_options
+from backend.metrics import PoolMetrics
+
+logger = logging.getLogger(__name__)
+
+# Seconds behind the primary; only Postgres hot standbys report it
+_REPLICATION_LAG = text(
+    "SELECT COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) "
+    "WHERE pg_is_in_recovery()"
+)
+
+# Postgres query_canceled (statement timeouts); says nothing about the replica's health
+_QUERY_CANCELED = "57014"
+
+def is_connection_error(context) -> bool:
+    """Whether a handle_error context is the replica failing rather than the query."""
+    if context.is_disconnect:
+        return True
+    original = context.original_exception
+    code = getattr(original, "pgcode", None) or getattr(original, "sqlstate", None)
+    return isinstance(context.sqlalchemy_exception, OperationalError) and code != _QUERY_CANCELED
+
+class Replica:
+    """One read replica: sync and async engines plus its health state."""
+
+    def __init__(self, name: str, url: str):
+        self.name = name
+        self.url = make_url(url).render_as_string(hide_password=True)
+        self.engine = create_engine(url, **engine_options(url))
+        self.async_engine = create_async_engine(async_database_url(url), **engine_options(url, asynchronous=True))
+        self.session_factory = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        self.async_session_factory = async_sessionmaker(
+            self.async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+        )
+        self.pool_metrics = [
+            PoolMetrics(name).instrument(self.engine.pool),
+            PoolMetrics(f"{name}_async").instrument(self.async_engine.sync_engine.pool)
+        ]
+        self.failures = 0
+        self.ejected = False
+        self.ejected_until = 0.0
+        self.ejections = 0
+        self.reads = 0
+        self.lag_seconds: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+    def due_for_check(self, now: float) -> bool:
+        return not self.ejected or now >= self.ejected_until
+
+class ReplicaRouter:
+    """Sends read-only sessions to healthy replicas and everything else to the writer.
+
+    - Read-your-writes: for ``ryw_window`` seconds after a user commits, that user's
+      reads go to the writer, so they never see a replica that hasn't caught up. The
+      window is tracked per process.
+    - Ejection: ``eject_after`` consecutive connection errors (disconnects and other
+      OperationalErrors seen by handle_error, or a failed health check), or replication
+      lag above ``max_lag``, take a replica out of rotation for ``eject_seconds``. Any
+      successful statement resets the count. It is readmitted by the first passing
+      health check after that.
+    With no replicas, or none healthy, reads fall back to the writer.
+    """
+
+    def __init__(self, replicas: List[Replica], ryw_window: float = 5.0, eject_after: int = 3,
+                 eject_seconds: float = 30.0, max_lag: float = 10.0, health_interval: float = 5.0):
+        self.replicas = replicas
+        self.ryw_window = ryw_window
+        self.eject_after = eject_after
+        self.eject_seconds = eject_seconds
+        self.max_lag = max_lag
+        self.health_interval = health_interval
+        self.primary_reads = 0
+        self.ryw_reads = 0
+        self.fallback_reads = 0
+        self._recent_writes: Dict[str, float] = {}
+        self._next = itertools.count()
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        for replica in replicas:
+            self._watch_errors(replica)
+
+    def _watch_errors(self, replica: Replica):
+        def on_error(context):
+            # Bad SQL, constraint violations and statement timeouts are the caller's problem
+            if is_connection_error(context):
+                self.mark_failure(replica, context.original_exception)
+
+        def on_success(*args):
+            if replica.failures:
+                self.mark_success(replica)
+
+        for engine in (replica.engine, replica.async_engine.sync_engine):
+            event.listen(engine, "handle_error", on_error)
+            event.listen(engine, "after_cursor_execute", on_success)
+
+    def note_write(self, subject: str):
+        now = time.monotonic()
+        with self._lock:
+            self._recent_writes[subject] = now + self.ryw_window
+            if len(self._recent_writes) > 10000:
+                self._recent_writes = {key: until for key, until in self._recent_writes.items() if until > now}
+
+    def choose(self, subject: Optional[str] = None) -> Optional[Replica]:
+        """Replica for a read-only session, or None for the writer."""
+        now = time.monotonic()
+        with self._lock:
+            if not self.replicas:
+                self.primary_reads += 1
+                return None
+            if subject is not None and self._recent_writes.get(subject, 0) > now:
+                self.ryw_reads += 1
+                return None
+            candidates = [replica for replica in self.replicas if not replica.ejected]
+            if not candidates:
+                self.fallback_reads += 1
+                return None
+            replica = candidates[next(self._next) % len(candidates)]
+            replica.reads += 1
+            return replica
+
+    def _eject(self, replica: Replica, reason: str):
+        replica.ejected_until = time.monotonic() + self.eject_seconds
+        if replica.ejected:
+            return
+        replica.ejected = True
+        replica.ejections += 1
+        logger.warning(f"Ejecting read replica {replica.name} for {self.eject_seconds:.0f}s: {reason}")
+
+    def mark_failure(self, replica: Replica, error: Exception):
+        with self._lock:
+            replica.failures += 1
+            replica.last_error = str(error)
+            if replica.failures >= self.eject_after:
+                self._eject(replica, f"{replica.failures} consecutive errors")
+
+    def mark_success(self, replica: Replica):
+        with self._lock:
+            replica.failures = 0
+
+    def check_health(self):
+        """Ping each replica (and read its lag on Postgres); ejects or readmits it."""
+        for replica in self.replicas:
+            if not replica.due_for_check(time.monotonic()):
+                continue
+            try:
+                with replica.engine.connect() as connection:
+                    lag = None
+                    if replica.engine.dialect.name == "postgresql":
+                        lag = connection.execute(_REPLICATION_LAG).scalar()
+                    else:
+                        connection.execute(text("SELECT 1"))
+            except Exception:
+                # handle_error has already counted it
+                continue
+            with self._lock:
+                replica.lag_seconds = float(lag) if lag is not None else None
+                if replica.lag_seconds is not None and replica.lag_seconds > self.max_lag:
+                    self._eject(replica, f"replication lag {replica.lag_seconds:.1f}s")
+                    continue
+                if replica.ejected:
+                    logger.info(f"Read replica {replica.name} is healthy again")
+                replica.failures = 0
+                replica.ejected = False
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.to_thread(self.check_health)
+            except Exception as e:
+                logger.error(f"Replica health check failed: {str(e)}", exc_info=True)
+            await asyncio.sleep(self.health_interval)
+
+    def start(self):
+        if self.replicas and self._task is None:
+            self._task = asyncio.create_task(self._run())
+            logger.info(f"Routing reads to {len(self.replicas)} replica(s)")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for replica in self.replicas:
+            await replica.async_engine.dispose()
+            replica.engine.dispose()
+
+    def engines(self) -> list:
+        """Sync engines of every replica, including the ones behind the async engines."""
+        return [engine for replica in self.replicas for engine in (replica.engine, replica.async_engine.sync_engine)]
+
+    def pool_metrics(self) -> List[PoolMetrics]:
+        return [metrics for replica in self.replicas for metrics in replica.pool_metrics]
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        with self._lock:
+            return {
+                "replicas": [
+                    {
+                        "name": replica.name,
+                        "url": replica.url,
+                        "ejected": replica.ejected,
+                        "reads": replica.reads,
+                        "failures": replica.failures,
+                        "ejections": replica.ejections,
+                        "lag_seconds": replica.lag_seconds,
+                        "last_error": replica.last_error
+                    }
+                    for replica in self.replicas
+                ],
+                "primary_reads": self.primary_reads,
+                "read_your_writes_reads": self.ryw_reads,
+                "fallback_reads": self.fallback_reads,
+                "read_your_writes_window_seconds": self.ryw_window,
+                "recent_writers": sum(1 for until in self._recent_writes.values() if until > now)
+            }
+
+def _replica_urls() -> List[str]:
+    return [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+
+replica_router = ReplicaRouter(
+    [Replica(f"replica{index}", url) for index, url in enumerate(_replica_urls(), start=1)],
+    ryw_window=float(os.getenv("REPLICA_RYW_WINDOW", "5")),
+    eject_after=int(os.getenv("REPLICA_EJECT_AFTER", "3")),
+    eject_seconds=float(os.getenv("REPLICA_EJECT_SECONDS", "30")),
+    max_lag=float(os.getenv("REPLICA_MAX_LAG", "10")),
+    health_interval=float(os.getenv("REPLICA_HEALTH_INTERVAL", "5"))
+)
+
+@event.listens_for(SessionLocal, "after_commit")
+def _remember_write(session):
+    # get_current_user records the token subject on the request the writer session serves
+    subject = getattr(session.info.get("request_state"), "subject", None)
+    if subject is not None:
+        replica_router.note_write(subject)
+
+# Dependencies for read-only routes; writes must keep using database.get_db
+def get_read_db(subject: Optional[str] = Depends(token_subject)):
+    replica = replica_router.choose(subject)
+    db = replica.session_factory() if replica else SessionLocal()
+    db.info["replica"] = replica.name if replica else None
+    try:
+        yield db
+    finally:
+        db.close()
+
+async def get_async_read_db(subject: Optional[str] = Depends(token_subject)):
+    replica = replica_router.choose(subject)
+    factory = replica.async_session_factory if replica else AsyncSessionLocal
+    async with factory() as db:
+        db.info["replica"] = replica.name if replica else None
+        yield db
@@ -0,0 +1,493 @@
+# backend/rollups.py
+"""Dashboard statistics maintained incrementally by the write paths.
+
+Admin totals are running counters in ``stat_counters``, so the dashboard reads a
+handful of rows by primary key instead of scanning whole tables. Write paths hand
+their deltas to a ``CounterBuffer``, which applies them once their transaction has
+committed, in periodic batches: every booking shares these rows, and updating them
+in each booking's transaction would queue all bookings behind their row locks. The
+dashboard therefore lags writes by up to ``STAT_COUNTER_FLUSH_INTERVAL`` seconds, and
+a worker that dies loses the deltas it hadn't flushed yet.
+
+``reconcile`` recomputes the counters from the base tables and fixes any drift, e.g.
+after a bulk load or a manual edit that bypassed crud. Every worker also runs it at
+startup and then every ``STAT_COUNTER_RECONCILE_INTERVAL`` seconds (see
+``CounterBuffer.reconcile``), so lost deltas are repaired within that interval:
+
+    python -m backend.rollups check          # report drift, exit 1 if any
+    python -m backend.rollups reconcile      # overwrite drifted counters
+    python -m backend.rollups reconcile --revenue-days 0   # rebuild all revenue history
+    python -m backend.rollups backfill-drivers [--missing]  # rebuild driver_rollups
+
+Revenue is each booking's ``total_cost`` (priced by backend/pricing.py when it was
+booked or extended), bucketed by the booking's UTC creation day. By default only
+today's revenue is reconciled, since older days rarely change.
+
+Each driver's dashboard is one ``driver_rollups`` row: booking count, hours, spend
+and a bounded summary of their most used spaces. Booking create, extend and cancel
+update it in their transaction via ``driver_bookings_changed``.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time as clock
+from datetime import date, datetime, time, timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event, func, select, text, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from backend import models
+
+logger = logging.getLogger(__name__)
+
+TOTAL_USERS = "total_users"
+TOTAL_PARKING_SPOTS = "total_parking_spots"
+TOTAL_CAPACITY = "total_capacity"
+OCCUPIED_SPOTS = "occupied_spots"
+ACTIVE_BOOKINGS = "active_bookings"
+REVENUE_PREFIX = "revenue:"
+
+# Bookings in these states don't earn revenue
+UNBILLED_STATUSES = ("cancelled",)
+
+# Slots in each driver's top-spaces summary; the dashboard shows the first few
+DRIVER_TOP_SPACES = int(os.getenv("DRIVER_TOP_SPACES", "10"))
+FAVORITE_SPOTS = 3
+
+def revenue_counter(day: date) -> str:
+    return f"{REVENUE_PREFIX}{day.isoformat()}"
+
+def space_counters(total_spots: Optional[int], available_spots: Optional[int]) -> Dict[str, int]:
+    """Capacity and occupied spots one parking space contributes; no availability counts as empty."""
+    total = total_spots or 0
+    available = total if available_spots is None else available_spots
+    return {TOTAL_CAPACITY: total, OCCUPIED_SPOTS: total - available}
+
+def _insert(db: Session):
+    return postgresql.insert if db.get_bind().dialect.name == "postgresql" else sqlite.insert
+
+def _upsert(db: Session, values: Dict[str, object], additive: bool):
+    # One statement, rows in name order, so concurrent writers lock counters in the same order
+    now = datetime.utcnow()
+    statement = _insert(db)(models.StatCounter).values(
+        [{"name": name, "value": values[name], "updated_at": now} for name in sorted(values)]
+    )
+    value = statement.excluded.value
+    if additive:
+        value = models.StatCounter.value + value
+    db.execute(statement.on_conflict_do_update(
+        index_elements=[models.StatCounter.name],
+        set_={"value": value, "updated_at": statement.excluded.updated_at}
+    ))
+
+class CounterBuffer:
+    """Counter deltas added to ``stat_counters`` after their transaction commits.
+
+    ``bump`` only stages deltas on the session. They move to the buffer when the
+    session commits and are dropped if it rolls back; a background task writes the
+    buffer every ``flush_interval`` seconds in one upsert, and reconciles the counters
+    every ``reconcile_interval`` seconds (0 disables it).
+    """
+
+    def __init__(self, session_factory: Callable, flush_interval: float = 1.0,
+                 reconcile_interval: float = 900.0):
+        self.session_factory = session_factory
+        self.flush_interval = flush_interval
+        self.reconcile_interval = reconcile_interval
+        self.committed = 0
+        self.flushes = 0
+        self.flush_errors = 0
+        self.reconciles = 0
+        self.reconciled_counters = 0
+        self.reconcile_errors = 0
+        self._reconciled_at: Optional[float] = None
+        self._key = f"counter_deltas:{id(self)}"
+        self._pending: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        event.listen(Session, "after_commit", self._committed)
+        event.listen(Session, "after_transaction_end", self._ended)
+
+    def bump(self, db: Session, deltas: Dict[str, float]):
+        """Add ``deltas`` to the counters once ``db``'s transaction commits."""
+        staged = db.info.setdefault(self._key, {})
+        for name, delta in deltas.items():
+            if delta:
+                staged[name] = staged.get(name, 0) + delta
+
+    def _committed(self, session: Session):
+        staged = session.info.pop(self._key, None)
+        if staged:
+            self._merge(staged)
+            with self._lock:
+                self.committed += 1
+
+    def _ended(self, session: Session, transaction):
+        # Whatever is still staged when the outermost transaction ends was rolled back
+        if transaction.parent is None:
+            session.info.pop(self._key, None)
+
+    def _merge(self, deltas: Dict[str, float]):
+        with self._lock:
+            for name, delta in deltas.items():
+                self._pending[name] = self._pending.get(name, 0) + delta
+
+    def flush(self) -> int:
+        """Write the buffered deltas; returns how many counters changed."""
+        with self._flush_lock:
+            with self._lock:
+                deltas, self._pending = self._pending, {}
+            deltas = {name: delta for name, delta in deltas.items() if delta}
+            if not deltas:
+                return 0
+            db = self.session_factory()
+            try:
+                _upsert(db, deltas, additive=True)
+                db.commit()
+            except Exception:
+                db.rollback()
+                self._merge(deltas)
+                with self._lock:
+                    self.flush_errors += 1
+                raise
+            finally:
+                db.close()
+            with self._lock:
+                self.flushes += 1
+            return len(deltas)
+
+    def reconcile(self) -> Dict[str, Tuple[float, float]]:
+        """Fix counters that drifted by the same amount on two checks a few flushes apart.
+
+        Other workers' buffered deltas show up as drift that moves as they flush, while
+        deltas lost with a dead worker stay put; confirming the offset keeps a recount
+        that races a flush from counting those deltas twice.
+        """
+        self.flush()
+        with self.session_factory() as db:
+            drift = reconcile(db, dry_run=True)
+        if drift:
+            clock.sleep(3 * self.flush_interval)
+            self.flush()
+            offsets = {name: stored - actual for name, (stored, actual) in drift.items()}
+            with self.session_factory() as db:
+                drift = reconcile(db, confirm=offsets)
+        with self._lock:
+            self.reconciles += 1
+            self.reconciled_counters += len(drift)
+        if drift:
+            logger.warning(f"Reconciled {len(drift)} drifted stat counter(s): {', '.join(sorted(drift))}")
+        return drift
+
+    def _reconcile_due(self) -> bool:
+        if not self.reconcile_interval:
+            return False
+        return self._reconciled_at is None or clock.monotonic() - self._reconciled_at >= self.reconcile_interval
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await asyncio.to_thread(self.flush)
+            except Exception as e:
+                logger.error(f"Stat counter flush failed: {str(e)}", exc_info=True)
+            if self._reconcile_due():
+                self._reconciled_at = clock.monotonic()
+                try:
+                    await asyncio.to_thread(self.reconcile)
+                except Exception as e:
+                    with self._lock:
+                        self.reconcile_errors += 1
+                    logger.error(f"Stat counter reconcile failed: {str(e)}", exc_info=True)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        try:
+            await asyncio.to_thread(self.flush)
+        except Exception as e:
+            logger.error(f"Final stat counter flush failed: {str(e)}", exc_info=True)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "running": self._task is not None,
+                "flush_interval_seconds": self.flush_interval,
+                "reconcile_interval_seconds": self.reconcile_interval,
+                "pending_counters": len(self._pending),
+                "committed_transactions": self.committed,
+                "flushes": self.flushes,
+                "flush_errors": self.flush_errors,
+                "reconciles": self.reconciles,
+                "reconciled_counters": self.reconciled_counters,
+                "reconcile_errors": self.reconcile_errors
+            }
+
+def admin_stats(db: Session, today: Optional[date] = None) -> dict:
+    """Dashboard totals as flushed, so every worker reports the same numbers."""
+    today = today or datetime.utcnow().date()
+    revenue = revenue_counter(today)
+    names = [TOTAL_USERS, TOTAL_PARKING_SPOTS, TOTAL_CAPACITY, OCCUPIED_SPOTS, ACTIVE_BOOKINGS, revenue]
+    values = dict(db.execute(
+        select(models.StatCounter.name, models.StatCounter.value).filter(models.StatCounter.name.in_(names))
+    ).all())
+    capacity = int(values.get(TOTAL_CAPACITY, 0))
+    occupied = int(values.get(OCCUPIED_SPOTS, 0))
+    return {
+        "total_users": int(values.get(TOTAL_USERS, 0)),
+        "active_bookings": int(values.get(ACTIVE_BOOKINGS, 0)),
+        "revenue_today": round(values.get(revenue, 0.0), 2),
+        "total_parking_spots": int(values.get(TOTAL_PARKING_SPOTS, 0)),
+        "total_capacity": capacity,
+        "occupied_spots": occupied,
+        "occupancy_rate": round(occupied / capacity, 4) if capacity else 0.0
+    }
+
+def _day_key(day) -> str:
+    # SQLite's date() returns text, Postgres returns a date
+    return day if isinstance(day, str) else day.isoformat()
+
+def compute(db: Session, revenue_since: Optional[datetime] = None) -> Dict[str, float]:
+    """Every counter recomputed from the base tables; full scans, for reconciling only."""
+    space_count, capacity, occupied = db.execute(select(
+        func.count(models.ParkingSpace.id),
+        func.coalesce(func.sum(func.coalesce(models.ParkingSpace.total_spots, 0)), 0),
+        func.coalesce(func.sum(
+            func.coalesce(models.ParkingSpace.total_spots, 0)
+            - func.coalesce(models.ParkingSpace.available_spots, models.ParkingSpace.total_spots, 0)
+        ), 0)
+    )).one()
+    values = {
+        TOTAL_USERS: db.scalar(select(func.count(models.Driver.id))),
+        TOTAL_PARKING_SPOTS: space_count,
+        TOTAL_CAPACITY: capacity,
+        OCCUPIED_SPOTS: occupied,
+        ACTIVE_BOOKINGS: db.scalar(select(func.count(models.Booking.id)).filter(models.Booking.status == "active")),
+    }
+    day = func.date(models.Booking.created_at)
+    revenue = select(day, func.sum(func.coalesce(models.Booking.total_cost, 0))).filter(
+        models.Booking.created_at.isnot(None), models.Booking.status.notin_(UNBILLED_STATUSES)
+    ).group_by(day)
+    if revenue_since is not None:
+        revenue = revenue.filter(models.Booking.created_at >= revenue_since)
+    for booked_on, amount in db.execute(revenue):
+        values[REVENUE_PREFIX + _day_key(booked_on)] = amount or 0.0
+    return {name: float(value or 0) for name, value in values.items()}
+
+def reconcile(db: Session, revenue_days: int = 1, dry_run: bool = False,
+              confirm: Optional[Dict[str, float]] = None) -> Dict[str, Tuple[float, float]]:
+    """Recompute the counters and overwrite drifted ones; returns ``name -> (stored, actual)``.
+
+    ``revenue_days`` limits revenue to the last N UTC days (0 rebuilds all of it). On
+    Postgres the counters are locked for the duration. Deltas workers buffered for
+    bookings the recount already includes are still added when they flush, so run it
+    while writes are quiet, or pass ``confirm``: only counters whose ``stored - actual``
+    still equals the offset given for them are fixed.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(text("LOCK TABLE stat_counters IN SHARE ROW EXCLUSIVE MODE"))
+    revenue_since = None
+    if revenue_days:
+        revenue_since = datetime.combine(datetime.utcnow().date() - timedelta(days=revenue_days - 1), time.min)
+    actual = compute(db, revenue_since)
+    stored = dict(db.execute(select(models.StatCounter.name, models.StatCounter.value)).all())
+    for name in stored:
+        in_scope = revenue_since is None or name >= revenue_counter(revenue_since.date())
+        if name.startswith(REVENUE_PREFIX) and in_scope:
+            actual.setdefault(name, 0.0)
+    drift = {
+        name: (stored.get(name, 0.0), value)
+        for name, value in actual.items()
+        if abs(stored.get(name, 0.0) - value) > 1e-6
+    }
+    if confirm is not None:
+        drift = {
+            name: (stored_value, value) for name, (stored_value, value) in drift.items()
+            if name in confirm and abs(stored_value - value - confirm[name]) <= 1e-6
+        }
+    if drift and not dry_run:
+        _upsert(db, {name: value for name, (_, value) in drift.items()}, additive=False)
+        db.commit()
+    else:
+        db.rollback()
+    return drift
+
+# ------------------ PER-DRIVER ROLLUPS ------------------
+def top_k_update(entries: List[dict], space_id: int, name: Optional[str], delta: int,
+                 capacity: int = DRIVER_TOP_SPACES) -> List[dict]:
+    """Apply ``delta`` uses of a space to a Space-Saving top-k summary.
+
+    At most ``capacity`` entries are kept. A space arriving at a full summary takes over
+    the least used slot and inherits its count, so counts may overstate, but a space
+    used more often than every evicted one is never missing. Negative deltas
+    (cancellations) only change a space that is still listed.
+    """
+    entries = [dict(entry) for entry in entries]
+    for entry in entries:
+        if entry["id"] == space_id:
+            entry["count"] += delta
+            entry["name"] = name or entry["name"]
+            break
+    else:
+        if delta > 0 and len(entries) < capacity:
+            entries.append({"id": space_id, "name": name, "count": delta})
+        elif delta > 0:
+            least = min(entries, key=lambda entry: entry["count"])
+            least.update(id=space_id, name=name, count=least["count"] + delta)
+    entries = [entry for entry in entries if entry["count"] > 0]
+    entries.sort(key=lambda entry: (-entry["count"], entry["id"]))
+    return entries
+
+def driver_bookings_changed(db: Session, driver_id: int, changes: Iterable[Tuple[int, int, float, float]]):
+    """Apply booking changes to a driver's rollup in the caller's transaction.
+
+    ``changes`` are ``(parking_space_id, bookings, hours, spend)`` deltas:
+    ``(space, 1, hours, cost)`` for a new booking, ``(space, -1, -hours, -cost)`` for
+    a cancelled one and ``(space, 0, hours, cost)`` for an extension.
+    """
+    changes = [change for change in changes if change[1] or change[2] or change[3]]
+    if not changes:
+        return
+    statement = _insert(db)(models.DriverRollup).values(
+        driver_id=driver_id,
+        total_bookings=sum(bookings for _, bookings, _, _ in changes),
+        total_hours=sum(hours for _, _, hours, _ in changes),
+        total_spend=sum(spend for _, _, _, spend in changes),
+        top_spaces=[],
+        updated_at=datetime.utcnow()
+    )
+    # Also locks the row, so the read-modify-write of top_spaces below can't interleave
+    top_spaces = db.execute(statement.on_conflict_do_update(
+        index_elements=[models.DriverRollup.driver_id],
+        set_={
+            "total_bookings": models.DriverRollup.total_bookings + statement.excluded.total_bookings,
+            "total_hours": models.DriverRollup.total_hours + statement.excluded.total_hours,
+            "total_spend": models.DriverRollup.total_spend + statement.excluded.total_spend,
+            "updated_at": statement.excluded.updated_at
+        }
+    ).returning(models.DriverRollup.top_spaces)).scalar_one()
+    updated = top_spaces or []
+    booked = {space_id for space_id, bookings, _, _ in changes if bookings}
+    names = dict(db.execute(
+        select(models.ParkingSpace.id, models.ParkingSpace.name).filter(models.ParkingSpace.id.in_(booked))
+    ).all()) if booked else {}
+    for space_id, bookings, _, _ in changes:
+        if bookings:
+            updated = top_k_update(updated, space_id, names.get(space_id), bookings)
+    if updated != top_spaces:
+        db.execute(
+            update(models.DriverRollup).where(models.DriverRollup.driver_id == driver_id).values(top_spaces=updated)
+        )
+
+def driver_dashboard(db: Session, driver_id: int) -> dict:
+    """A driver's dashboard totals: one primary-key read."""
+    rollup = db.get(models.DriverRollup, driver_id)
+    if rollup is None:
+        return {"total_bookings": 0, "total_hours": 0.0, "total_spent": 0.0, "favorite_spots": []}
+    return {
+        "total_bookings": rollup.total_bookings,
+        "total_hours": round(rollup.total_hours, 2),
+        "total_spent": round(rollup.total_spend, 2),
+        "favorite_spots": [
+            {"id": entry["id"], "name": entry["name"], "bookings": entry["count"]}
+            for entry in rollup.top_spaces[:FAVORITE_SPOTS]
+        ]
+    }
+
+def backfill_drivers(db: Session, batch_size: int = 500, missing_only: bool = False) -> int:
+    """Rebuild driver rollups from booking history, one transaction per batch of drivers.
+
+    Top spaces come out exact (the ``DRIVER_TOP_SPACES`` most booked) and spend is
+    the sum of the bookings' ``total_cost``. On Postgres each batch locks
+    driver_rollups, so bookings committed meanwhile wait for the batch instead of
+    being counted twice or lost. Returns the number of drivers rebuilt.
+    """
+    rebuilt = 0
+    last_id = 0
+    while True:
+        if db.get_bind().dialect.name == "postgresql":
+            db.execute(text("LOCK TABLE driver_rollups IN SHARE ROW EXCLUSIVE MODE"))
+        drivers = select(models.Driver.id).filter(models.Driver.id > last_id).order_by(models.Driver.id).limit(batch_size)
+        if missing_only:
+            drivers = drivers.outerjoin(
+                models.DriverRollup, models.DriverRollup.driver_id == models.Driver.id
+            ).filter(models.DriverRollup.driver_id.is_(None))
+        driver_ids = db.scalars(drivers).all()
+        if not driver_ids:
+            db.rollback()
+            return rebuilt
+        hours = func.coalesce(models.Booking.duration_hours, 0)
+        usage = db.execute(
+            select(
+                models.Booking.driver_id, models.Booking.parking_space_id, models.ParkingSpace.name,
+                func.count(models.Booking.id), func.sum(hours), func.sum(func.coalesce(models.Booking.total_cost, 0))
+            ).join(models.Booking.parking_space).filter(
+                models.Booking.driver_id.in_(driver_ids), models.Booking.status.notin_(UNBILLED_STATUSES)
+            ).group_by(models.Booking.driver_id, models.Booking.parking_space_id, models.ParkingSpace.name)
+        ).all()
+        now = datetime.utcnow()
+        rows = {
+            driver_id: {"driver_id": driver_id, "total_bookings": 0, "total_hours": 0.0, "total_spend": 0.0,
+                        "top_spaces": [], "updated_at": now}
+            for driver_id in driver_ids
+        }
+        for driver_id, space_id, name, bookings, booked_hours, spend in usage:
+            row = rows[driver_id]
+            row["total_bookings"] += bookings
+            row["total_hours"] += float(booked_hours or 0)
+            row["total_spend"] += float(spend or 0)
+            row["top_spaces"].append({"id": space_id, "name": name, "count": bookings})
+        for row in rows.values():
+            row["top_spaces"].sort(key=lambda entry: (-entry["count"], entry["id"]))
+            del row["top_spaces"][DRIVER_TOP_SPACES:]
+        statement = _insert(db)(models.DriverRollup).values(list(rows.values()))
+        db.execute(statement.on_conflict_do_update(
+            index_elements=[models.DriverRollup.driver_id],
+            set_={column: statement.excluded[column]
+                  for column in ("total_bookings", "total_hours", "total_spend", "top_spaces", "updated_at")}
+        ))
+        db.commit()
+        rebuilt += len(driver_ids)
+        last_id = driver_ids[-1]
+
+def cli():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("command", choices=["check", "reconcile", "backfill-drivers"])
+    parser.add_argument("--revenue-days", type=int, default=1)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--missing", action="store_true", help="only drivers without a rollup yet")
+    args = parser.parse_args()
+
+    from backend.database import SessionLocal
+
+    if args.command == "backfill-drivers":
+        with SessionLocal() as db:
+            rebuilt = backfill_drivers(db, args.batch_size, missing_only=args.missing)
+        print(f"Rebuilt rollups for {rebuilt} driver(s).")
+        return
+    with SessionLocal() as db:
+        drift = reconcile(db, args.revenue_days, dry_run=args.command == "check")
+    for name, (stored, actual) in sorted(drift.items()):
+        print(f"{name}: stored={stored:g} actual={actual:g}")
+    if args.command == "check":
+        print("Counters match the base tables." if not drift else f"{len(drift)} counter(s) drifted.")
+        sys.exit(1 if drift else 0)
+    print(f"Reconciled {len(drift)} counter(s).")
+
+if __name__ == "__main__":
+    cli()
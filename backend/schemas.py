@@ -55,6 +55,12 @@ class User(BaseModel):
     class Config:
         from_attributes = True
 
+class Principal(BaseModel):
+    """Identity taken from a verified access token's claims (claims-only auth mode)."""
+    id: int
+    email: EmailStr
+    role: str
+
 class Booking(BaseModel):
     id: int
     driver_id: int
@@ -64,31 +70,114 @@ class Booking(BaseModel):
     duration_hours: float
     status: str
     payment_method: str
+    total_cost: Optional[float] = None
     created_at: datetime
     updated_at: datetime
 
     class Config:
         from_attributes = True
 
-class ParkingSpot(BaseModel):
+class ParkingSpaceSummary(BaseModel):
+    """The parts of a parking space a booking list needs to render each row."""
     id: int
     name: str
     address: str
-    latitude: float
-    longitude: float
-    available_spots: int
-    total_spots: int
-    price_per_hour: float
-    features: str
-    rating: float
-    created_at: datetime
-    updated_at: datetime
-    distance: Optional[str] = None
-    walk_time: Optional[str] = None
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    price_per_hour: Optional[float] = None
 
     class Config:
         from_attributes = True
 
+class BookingWithSpace(Booking):
+    parking_space: Optional[ParkingSpaceSummary] = None
+
+class BookingEnvelope(BaseModel):
+    booking: Booking
+
+class BookingExtension(BookingEnvelope):
+    additional_cost: float
+
+class BookingSummary(BaseModel):
+    """The booking as returned by POST /api/bookings."""
+    id: int
+    parking_spot_id: int
+    start_time: datetime
+    end_time: datetime
+    duration_hours: float
+    status: str
+    total_cost: Optional[float] = None
+
+class CreatedBooking(BaseModel):
+    booking: BookingSummary
+
+class FleetBookingResult(BaseModel):
+    index: int
+    vehicle_id: int
+    parking_space_id: int
+    status: str
+    booking_id: Optional[int] = None
+    total_cost: Optional[float] = None
+    error: Optional[str] = None
+
+class FleetBookingResponse(BaseModel):
+    booked: int
+    failed: int
+    items: List[FleetBookingResult]
+
+class FavoriteSpot(BaseModel):
+    id: int
+    name: Optional[str] = None
+    bookings: int
+
+class DriverDashboard(BaseModel):
+    total_bookings: int
+    total_hours: float
+    total_spent: float
+    favorite_spots: List[FavoriteSpot]
+
+class ParkingSpaceRecord(BaseModel):
+    """A parking space row; everything but the name and address may be unset."""
+    id: int
+    name: str
+    address: str
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    available_spots: Optional[int] = None
+    total_spots: Optional[int] = None
+    price_per_hour: Optional[float] = None
+    features: Optional[str] = None
+    rating: Optional[float] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+class SpotForecast(BaseModel):
+    arrival_at: datetime
+    expected_free_spots: float
+    expected_occupancy: Optional[float] = None
+    model_fitted_at: Optional[datetime] = None
+
+class ParkingSpot(ParkingSpaceRecord):
+    distance: Optional[str] = None
+    walk_time: Optional[str] = None
+    forecast: Optional[SpotForecast] = None
+
+class AvailabilitySlot(BaseModel):
+    start: datetime
+    end: datetime
+    booked: int
+    free: int
+
+class SpotAvailability(ParkingSpot):
+    window_start: datetime
+    window_end: datetime
+    slot_minutes: int
+    min_free: int
+    slots: List[AvailabilitySlot]
+
 class AdminActivity(BaseModel):
     id: int
     action: str
@@ -101,6 +190,170 @@ class AdminActivity(BaseModel):
     class Config:
         from_attributes = True
 
+class AdminStats(BaseModel):
+    total_users: int
+    active_bookings: int
+    revenue_today: float
+    total_parking_spots: int
+    total_capacity: int
+    occupied_spots: int
+    occupancy_rate: float
+
+class HeatmapPeak(BaseModel):
+    day: str
+    hour: int
+    booked: float
+    occupancy: float
+
+class OccupancyHeatmap(BaseModel):
+    space_id: Optional[int] = None
+    name: Optional[str] = None
+    total_spots: Optional[int] = None
+    weeks: int
+    utc_offset: int
+    window_start: datetime
+    window_end: datetime
+    days: List[str]
+    # 7 x 24 grids, Monday first
+    booked: List[List[float]]
+    occupancy: List[List[float]]
+    peak: HeatmapPeak
+
+# ------------------ Operational stats ------------------
+class QueryCacheStats(BaseModel):
+    size: int
+    maxsize: int
+    ttl_seconds: float
+    version: int
+    hits: int
+    misses: int
+    evictions: int
+    invalidations: int
+    hit_ratio: float
+
+class HeatmapCacheStats(BaseModel):
+    size: int
+    maxsize: int
+    max_age_seconds: float
+    hits: int
+    misses: int
+    incremental_updates: int
+    hit_ratio: float
+
+class CacheStats(BaseModel):
+    parking: QueryCacheStats
+    principals: QueryCacheStats
+    heatmaps: HeatmapCacheStats
+
+class HashingStats(BaseModel):
+    kind: str
+    workers: int
+    max_pending: int
+    pending: int
+    completed: int
+    rejected: int
+    bcrypt_rounds: int
+
+class RealtimeStats(BaseModel):
+    subscribers: int
+    published: int
+    delivered: int
+    overflows: int
+
+class SweeperStats(BaseModel):
+    running: bool
+    interval_seconds: float
+    batch_size: int
+    runs: int
+    errors: int
+    expired_total: int
+    last_expired: int
+    last_run_at: Optional[datetime] = None
+    last_duration_ms: float
+    max_duration_ms: float
+    avg_duration_ms: float
+
+class PricingStats(BaseModel):
+    spaces: int
+    profiles: int
+    builds: int
+    quotes: int
+    fresh: bool
+    utc_offset: int
+
+class ForecastStats(BaseModel):
+    running: bool
+    models: int
+    fitted_at: Optional[datetime] = None
+    history_weeks: int
+    trend_weeks: int
+    refit_interval_seconds: float
+    fits: int
+    last_fit_ms: float
+    loads: int
+    errors: int
+    predictions: int
+
+class CounterStats(BaseModel):
+    running: bool
+    flush_interval_seconds: float
+    reconcile_interval_seconds: float
+    pending_counters: int
+    committed_transactions: int
+    flushes: int
+    flush_errors: int
+    reconciles: int
+    reconciled_counters: int
+    reconcile_errors: int
+
+class ActivityLogStats(BaseModel):
+    recorded: int
+    flushed: int
+    pending: int
+    dropped: int
+    flush_errors: int
+    buffered: int
+    buffer_size: int
+    buffer_hits: int
+    table_reads: int
+
+class ReplicaStatus(BaseModel):
+    name: str
+    url: str
+    ejected: bool
+    reads: int
+    failures: int
+    ejections: int
+    lag_seconds: Optional[float] = None
+    last_error: Optional[str] = None
+
+class ReplicaStats(BaseModel):
+    replicas: List[ReplicaStatus]
+    primary_reads: int
+    read_your_writes_reads: int
+    fallback_reads: int
+    read_your_writes_window_seconds: float
+    recent_writers: int
+
+class DebugSpace(BaseModel):
+    id: int
+    name: Optional[str] = None
+    available_spots: Optional[int] = None
+
+class DebugParkingSpaces(BaseModel):
+    total_spaces: int
+    spaces: List[DebugSpace]
+
+class PriceQuote(BaseModel):
+    index: int
+    parking_space_id: int
+    start_time: datetime
+    end_time: datetime
+    hours: float
+    amount: Optional[float] = None
+    surcharge_multiplier: float = 1.0
+    error: Optional[str] = None
+
 class ParkingLocation(BaseModel):
     id: int
     name: str
@@ -115,6 +368,16 @@ class ParkingLocation(BaseModel):
     class Config:
         from_attributes = True
 
+class Message(BaseModel):
+    message: str
+
+class ActionResult(Message):
+    success: bool
+
+class HealthStatus(BaseModel):
+    status: str
+    service: str
+
 # ------------------ Request DTOs ------------------
 class CreateBookingRequest(BaseModel):
     parking_space_id: int
@@ -129,14 +392,50 @@ class UpdateBookingRequest(BaseModel):
 class ExtendBookingRequest(BaseModel):
     additional_hours: float
 
+class FleetBookingItem(BaseModel):
+    vehicle_id: int
+    parking_space_id: int
+    start_time: datetime
+    end_time: datetime
+    duration_hours: float
+
+class FleetBookingRequest(BaseModel):
+    items: List[FleetBookingItem]
+    all_or_nothing: Optional[bool] = True
+
 class BookSpotRequest(BaseModel):
     start_time: datetime
     duration_hours: float
 
+class TariffBand(BaseModel):
+    start_hour: int
+    end_hour: int
+    rate: float
+    days: Optional[List[int]] = None
+
+class OccupancySurcharge(BaseModel):
+    occupancy: float
+    multiplier: float
+
+class TariffRequest(BaseModel):
+    bands: List[TariffBand] = []
+    daily_cap: Optional[float] = None
+    surcharges: List[OccupancySurcharge] = []
+
 class LocationRequest(BaseModel):
     name: Optional[str] = None
     address: Optional[str] = None
     total_spots: Optional[int] = None
     price_per_hour: Optional[float] = None
+    # Replaces the space's tariff; an empty one reverts it to the flat hourly price
+    tariff: Optional[TariffRequest] = None
+
+class QuoteItem(BaseModel):
+    parking_space_id: int
+    start_time: datetime
+    end_time: datetime
+
+class QuoteRequest(BaseModel):
+    items: List[QuoteItem]
 
 Token.update_forward_refs()
@@ -0,0 +1,87 @@
+# backend/search.py
+import bisect
+import logging
+import re
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from backend.lazy import LazyRebuild
+
+logger = logging.getLogger(__name__)
+
+TOKEN_RE = re.compile(r"[^\W_]+")
+
+# Name matches outrank address matches; whole-word matches outrank prefixes
+NAME_WEIGHT = 2.0
+ADDRESS_WEIGHT = 1.0
+EXACT_BONUS = 2.0
+
+def tokenize(text: Optional[str]) -> List[str]:
+    return TOKEN_RE.findall(text.lower()) if text else []
+
+class InvertedIndex:
+    """Token -> posting map over parking space names and addresses with prefix lookup."""
+
+    def __init__(self, rows: Iterable[Tuple[int, Optional[str], Optional[str]]]):
+        self._postings: Dict[str, Dict[int, float]] = {}
+        self.size = 0
+        for space_id, name, address in rows:
+            for weight, text in ((NAME_WEIGHT, name), (ADDRESS_WEIGHT, address)):
+                for token in set(tokenize(text)):
+                    postings = self._postings.setdefault(token, {})
+                    postings[space_id] = max(postings.get(space_id, 0.0), weight)
+            self.size += 1
+        self._tokens = sorted(self._postings)
+
+    def _expand(self, term: str) -> List[str]:
+        """All indexed tokens starting with ``term`` (type-ahead on partial words)."""
+        start = bisect.bisect_left(self._tokens, term)
+        end = bisect.bisect_left(self._tokens, term + "\uffff", start)
+        return self._tokens[start:end]
+
+    def search(self, query: str) -> List[Tuple[int, float]]:
+        """Return ``(id, score)`` for spaces matching every query term, best first."""
+        terms = tokenize(query)
+        if not terms:
+            return []
+        scores: Optional[Dict[int, float]] = None
+        for term in dict.fromkeys(terms):
+            term_scores: Dict[int, float] = {}
+            for token in self._expand(term):
+                bonus = EXACT_BONUS if token == term else 1.0
+                for space_id, weight in self._postings[token].items():
+                    score = weight * bonus
+                    if score > term_scores.get(space_id, 0.0):
+                        term_scores[space_id] = score
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {space_id: score + term_scores[space_id]
+                          for space_id, score in scores.items() if space_id in term_scores}
+            if not scores:
+                return []
+        return sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+
+class SearchIndex:
+    """Lazily (re)built InvertedIndex; ``loader`` returns ``(id, name, address)`` rows."""
+
+    def __init__(self, max_age: float = 300.0):
+        self._index = LazyRebuild(self._build, max_age)
+
+    def invalidate(self):
+        self._index.invalidate()
+
+    def _build(self, rows) -> InvertedIndex:
+        started = time.perf_counter()
+        index = InvertedIndex(rows)
+        logger.info(f"Search index rebuilt with {index.size} spaces "
+                    f"in {(time.perf_counter() - started) * 1000:.1f} ms")
+        return index
+
+    def search(self, loader: Callable[[], Iterable[Tuple[int, Optional[str], Optional[str]]]],
+               query: str) -> List[Tuple[int, float]]:
+        return self._index.get(loader).search(query)
+
+    async def asearch(self, loader, query: str) -> List[Tuple[int, float]]:
+        """``search`` with a coroutine loader."""
+        return (await self._index.aget(loader)).search(query)
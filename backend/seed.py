@@ -1,5 +1,5 @@
 
-from backend import models, auth
+from backend import models, auth, rollups
 from backend.database import SessionLocal, engine
 
 models.Base.metadata.create_all(bind=engine)
@@ -85,6 +85,8 @@ if not db.query(models.Driver).filter_by(email="admin@parksmart.com").first():
         db.add(spot)
 
     db.commit()
+    # The seed rows bypass crud, so bring the dashboard counters up to date
+    rollups.reconcile(db)
     print("Seed data added successfully with demo users and parking spots.")
 else:
     print("Demo users already exist.")
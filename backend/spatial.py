@@ -0,0 +1,105 @@
+# backend/spatial.py
+import logging
+import math
+import time
+from typing import Callable, Dict, Iterable, List, Tuple
+
+from backend.lazy import LazyRebuild
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_M = 6371008.8
+METRES_PER_DEGREE_LAT = 111320.0
+WALK_SPEED_M_PER_MIN = 80.0  # ~4.8 km/h
+
+# ------------------ GEOMETRY ------------------
+def haversine_m(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Great-circle distance between two points in metres."""
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lng2 - lng1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
+
+def format_distance(distance_m: float) -> str:
+    if distance_m < 1000:
+        return f"{int(round(distance_m))} m"
+    return f"{distance_m / 1000:.1f} km"
+
+def format_walk_time(distance_m: float) -> str:
+    return f"{max(1, int(math.ceil(distance_m / WALK_SPEED_M_PER_MIN)))} min"
+
+# ------------------ GRID INDEX ------------------
+class GridIndex:
+    """Fixed-size lat/lng grid; a radius query only visits the cells its bounding box touches."""
+
+    def __init__(self, points: Iterable[Tuple[int, float, float]], cell_size_m: float = 500.0):
+        self.cell_deg = cell_size_m / METRES_PER_DEGREE_LAT
+        self._cells: Dict[Tuple[int, int], List[Tuple[int, float, float]]] = {}
+        self.size = 0
+        for point_id, lat, lng in points:
+            self._cells.setdefault(self._cell(lat, lng), []).append((point_id, lat, lng))
+            self.size += 1
+
+    def _cell(self, lat: float, lng: float) -> Tuple[int, int]:
+        return int(math.floor(lat / self.cell_deg)), int(math.floor(lng / self.cell_deg))
+
+    def query_radius(self, lat: float, lng: float, radius_m: float) -> List[Tuple[int, float]]:
+        """Return ``(id, distance_m)`` pairs within ``radius_m``, nearest first."""
+        if radius_m <= 0 or not self._cells:
+            return []
+        dlat = radius_m / METRES_PER_DEGREE_LAT
+        # Longitude degrees shrink towards the poles; clamp so the box stays finite.
+        dlng = radius_m / (METRES_PER_DEGREE_LAT * max(math.cos(math.radians(lat)), 0.01))
+        min_i, min_j = self._cell(lat - dlat, lng - dlng)
+        max_i, max_j = self._cell(lat + dlat, lng + dlng)
+
+        results = []
+        cells = self._cells
+        if (max_i - min_i + 1) * (max_j - min_j + 1) > len(cells):
+            # Box covers more cells than exist; walking the populated ones is cheaper.
+            buckets = [bucket for (i, j), bucket in cells.items()
+                       if min_i <= i <= max_i and min_j <= j <= max_j]
+        else:
+            buckets = [cells[(i, j)] for i in range(min_i, max_i + 1)
+                       for j in range(min_j, max_j + 1) if (i, j) in cells]
+        for bucket in buckets:
+            for point_id, plat, plng in bucket:
+                distance = haversine_m(lat, lng, plat, plng)
+                if distance <= radius_m:
+                    results.append((point_id, distance))
+        results.sort(key=lambda item: (item[1], item[0]))
+        return results
+
+class SpatialIndex:
+    """Lazily (re)built GridIndex over parking space coordinates.
+
+    ``loader`` returns ``(id, latitude, longitude)`` rows; see ``LazyRebuild`` for when
+    the index is rebuilt.
+    """
+
+    def __init__(self, cell_size_m: float = 500.0, max_age: float = 300.0):
+        self.cell_size_m = cell_size_m
+        self._grid = LazyRebuild(self._build, max_age)
+
+    def invalidate(self):
+        self._grid.invalidate()
+
+    def _build(self, rows) -> GridIndex:
+        started = time.perf_counter()
+        grid = GridIndex(
+            [(row[0], row[1], row[2]) for row in rows if row[1] is not None and row[2] is not None],
+            self.cell_size_m
+        )
+        logger.info(f"Spatial index rebuilt with {grid.size} spaces "
+                    f"in {(time.perf_counter() - started) * 1000:.1f} ms")
+        return grid
+
+    def nearby(self, loader: Callable[[], Iterable[Tuple[int, float, float]]], lat: float, lng: float,
+               radius_m: float) -> List[Tuple[int, float]]:
+        return self._grid.get(loader).query_radius(lat, lng, radius_m)
+
+    async def anearby(self, loader, lat: float, lng: float, radius_m: float) -> List[Tuple[int, float]]:
+        """``nearby`` with a coroutine loader."""
+        return (await self._grid.aget(loader)).query_radius(lat, lng, radius_m)
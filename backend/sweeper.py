@@ -0,0 +1,100 @@
+# backend/sweeper.py
+import asyncio
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Optional
+
+from backend import crud
+
+logger = logging.getLogger(__name__)
+
+class BookingSweeper:
+    """Periodically completes expired bookings and returns their spots.
+
+    Runs as an asyncio task started from the app lifespan; each sweep happens in a
+    worker thread so the blocking DB work never stalls the event loop.
+    """
+
+    def __init__(self, session_factory: Callable, interval: float = 60.0, batch_size: int = 500):
+        self.session_factory = session_factory
+        self.interval = interval
+        self.batch_size = batch_size
+        self.runs = 0
+        self.errors = 0
+        self.expired_total = 0
+        self.last_expired = 0
+        self.last_run_at: Optional[datetime] = None
+        self.last_duration_ms = 0.0
+        self.max_duration_ms = 0.0
+        self.total_duration_ms = 0.0
+        self._task: Optional[asyncio.Task] = None
+        self._lock = threading.Lock()
+
+    def sweep_once(self) -> int:
+        started = time.perf_counter()
+        db = self.session_factory()
+        try:
+            expired = crud.expire_bookings(db, batch_size=self.batch_size)
+        except Exception:
+            db.rollback()
+            with self._lock:
+                self.errors += 1
+            raise
+        finally:
+            db.close()
+        duration_ms = (time.perf_counter() - started) * 1000
+        with self._lock:
+            self.runs += 1
+            self.expired_total += expired
+            self.last_expired = expired
+            self.last_run_at = datetime.utcnow()
+            self.last_duration_ms = duration_ms
+            self.max_duration_ms = max(self.max_duration_ms, duration_ms)
+            self.total_duration_ms += duration_ms
+        if expired:
+            logger.info(f"Booking sweep expired {expired} bookings in {duration_ms:.1f} ms")
+        return expired
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.to_thread(self.sweep_once)
+            except Exception as e:
+                logger.error(f"Booking sweep failed: {str(e)}", exc_info=True)
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+            logger.info(f"Booking sweeper started (every {self.interval:.0f}s, batch {self.batch_size})")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "running": self._task is not None,
+                "interval_seconds": self.interval,
+                "batch_size": self.batch_size,
+                "runs": self.runs,
+                "errors": self.errors,
+                "expired_total": self.expired_total,
+                "last_expired": self.last_expired,
+                "last_run_at": self.last_run_at,
+                "last_duration_ms": round(self.last_duration_ms, 3),
+                "max_duration_ms": round(self.max_duration_ms, 3),
+                "avg_duration_ms": round(self.total_duration_ms / self.runs, 3) if self.runs else 0.0
+            }
+
+def sweeper_enabled() -> bool:
+    return os.getenv("BOOKING_SWEEP_ENABLED", "true").lower() in ("1", "true", "yes")
@@ -0,0 +1,43 @@
+# backend/tests/test_booking_pricing.py
+import os
+import tempfile
+from datetime import datetime, timedelta
+
+# Never bind the app engines to the configured (possibly production) database
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "pricing.db")
+os.environ["BOOKING_SWEEP_ENABLED"] = "false"
+
+from sqlalchemy import insert
+
+from backend import crud, models
+from backend.database import SessionLocal, engine
+from backend.schemas import CreateBookingRequest, ExtendBookingRequest
+
+models.Base.metadata.create_all(bind=engine)
+
+def add_space(db, name: str) -> int:
+    # Plain SQL, as another worker or a seed would; the tariff table is not invalidated
+    return db.execute(insert(models.ParkingSpace).values(
+        name=name, address="1 Test Road", latitude=-1.28, longitude=36.82, total_spots=10,
+        available_spots=10, price_per_hour=100, features="", rating=0.0
+    )).inserted_primary_key[0]
+
+def test_space_created_behind_a_warm_tariff_table_is_charged():
+    with SessionLocal() as db:
+        driver = models.Driver(full_name="Pricing", email="pricing@example.com", phone="0")
+        db.add(driver)
+        add_space(db, "Warm")
+        db.commit()
+        crud.tariff_table(db)
+        assert crud.pricing_engine.stats()["fresh"]
+
+        space_id = add_space(db, "Late")
+        db.commit()
+        start = datetime.utcnow() + timedelta(hours=1)
+        booking = crud.create_booking(db, driver, CreateBookingRequest(
+            parking_space_id=space_id, start_time=start, end_time=start + timedelta(hours=2), duration_hours=2
+        ))["booking"]
+        assert booking.total_cost > 0
+
+        extended = crud.extend_booking(db, driver, booking.id, ExtendBookingRequest(additional_hours=1))
+        assert extended["additional_cost"] > 0
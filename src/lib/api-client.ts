@@ -105,9 +105,24 @@ export interface Booking {
 // API Functions
 // -----------------------------
 
+// Listings come back a page at a time; follow X-Next-Cursor until the last page
+const PAGE_SIZE = 200;
+
+export async function getAllPages<T>(url: string, params: Record<string, unknown> = {}): Promise<T[]> {
+  const items: T[] = [];
+  let cursor: string | undefined;
+  do {
+    const res = await apiClient.get<T[]>(url, { params: { ...params, limit: PAGE_SIZE, cursor } });
+    items.push(...res.data);
+    const next = res.headers['x-next-cursor'];
+    cursor = typeof next === 'string' && next ? next : undefined;
+  } while (cursor);
+  return items;
+}
+
 export const parkingApi = {
   getAll: (): Promise<ParkingSpot[]> =>
-    apiClient.get('/api/parking/spots').then((res) => res.data),
+    getAllPages<ParkingSpot>('/api/parking/spots'),
 
   getAvailability: (spotId: number): Promise<ParkingSpot> =>
     apiClient.get(`/api/parking/spots/${spotId}/availability`).then((res) => res.data),
@@ -238,7 +253,7 @@ export const bookingApi = {
   },
 
   getAll: (): Promise<Booking[]> =>
-    apiClient.get('/api/bookings').then((res) => res.data),
+    getAllPages<Booking>('/api/bookings'),
 
   update: (id: number, data: Partial<Booking>): Promise<Booking> =>
     apiClient.put(`/api/bookings/${id}`, data).then((res) => res.data),
@@ -1,7 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { useAuth } from '@/context/AuthContext';
 import { useQuery } from '@tanstack/react-query';
-import { apiClient } from '@/lib/api-client';
+import { apiClient, bookingApi } from '@/lib/api-client';
 import {
   Card,
   CardContent,
@@ -35,7 +35,7 @@ export default function Profile() {
 
   const { data: bookings, isLoading: loadingBookings } = useQuery({
     queryKey: ['userBookings'],
-    queryFn: () => apiClient.get('/api/bookings').then(res => res.data),
+    queryFn: bookingApi.getAll,
     enabled: !!user,
   });
 